@@ -0,0 +1,543 @@
+# analytics.py
+"""
+Режим аналітики: знімок витрат у пам'яті процесу (стовпці NumPy), над яким виконуються ті самі
+ReportSpec, що й у БД (reports.py), — без запиту до бази на кожен звіт.
+
+Стовпці відсортовані за датою, потім id: id, день (порядковий номер дати), сума в копійках (int64),
+category_id і коди валюти, назви й опису (словники значень — різних назв у витрат небагато).
+Фільтр за періодом — двійковий пошук по стовпцю днів, суми/мін./макс./кількість — групування масивами.
+
+Оновлення — не частіше ніж раз на ANALYTICS_REFRESH_TTL секунд (одним запитом до cache_versions):
+  - нові витрати дочитуються за id, більшим за найбільший уже завантажений;
+  - зміна чи видалення витрат (лічильник 'expenses', міграція 7) — повне перезавантаження;
+  - курси валют перечитуються за лічильником 'exchange_rates'.
+Витрата з транзакції, що завершилась пізніше за транзакцію з більшим id, з'явиться у знімку
+лише після повного перезавантаження (refresh(full=True)).
+
+Відмінності від SQL: пошук за назвою впорядковується за датою (без ранжування pg_trgm),
+рядки сортуються за кодами символів (як COLLATE "C").
+"""
+import os
+import re
+import time
+import bisect
+import threading
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from db import use_conn
+from categories import get_category_name
+from report_engine import Aggregate, ReportSpec, validate_report
+
+ANALYTICS_REFRESH_TTL = float(os.getenv("ANALYTICS_REFRESH_TTL", "5"))
+ANALYTICS_LOAD_BATCH = int(os.getenv("ANALYTICS_LOAD_BATCH", "50000"))
+
+LOAD_SQL = """
+    SELECT id, expense_date, category_id, amount, currency, title, COALESCE(description, '')
+    FROM expenses
+    WHERE id > %s
+    ORDER BY id;
+"""
+VERSIONS_SQL = "SELECT name, version FROM cache_versions WHERE name IN ('expenses', 'exchange_rates');"
+RATES_SQL = """
+    SELECT currency, rate_date, rate
+    FROM exchange_rates
+    WHERE currency <> 'UAH'
+    ORDER BY currency, rate_date;
+"""
+
+# до стількох груп номеруються напряму (bincount), без сортування ключів
+_DENSE_GROUPS = 1 << 16
+
+_COLUMNS = ("ids", "days", "cents", "category_ids", "currency", "title", "description")
+_DTYPES = (np.int64, np.int32, np.int64, np.int32, np.int16, np.int32, np.int32)
+
+
+def _ordinal(value) -> int:
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+
+def _money(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def _cents(amount) -> int:
+    # через Decimal з округленням: int(amount * 100) відкидав би дріб, і float 0.29 став би 28 копійками
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+class _Dictionary:
+    """Значення <-> код. Лише доповнюється, тож коди в старіших знімках лишаються дійсними."""
+
+    def __init__(self):
+        self.values: list = []
+        self.codes: dict = {}
+        self._ranks = np.empty(0, dtype=np.int64)
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def ranks(self) -> np.ndarray:
+        """Код -> місце значення при сортуванні (None — в кінці, як NULLS LAST)."""
+        ranks = self._ranks
+        if len(ranks) != len(self.values):
+            values = self.values[:]
+            order = sorted(range(len(values)), key=lambda c: (values[c] is None, values[c] or ""))
+            ranks = np.empty(len(values), dtype=np.int64)
+            ranks[order] = np.arange(len(values))
+            self._ranks = ranks
+        return ranks
+
+
+class _Columns:
+    """Один незмінний знімок: оновлення створює новий об'єкт, запити в інших потоках дочитують старий."""
+
+    def __init__(self, arrays: dict, dictionaries: dict, high_water: int):
+        for name in _COLUMNS:
+            setattr(self, name, arrays[name])
+        self.dictionaries = dictionaries   # currency / title / description -> _Dictionary
+        self.high_water = high_water
+        self.category_set = np.unique(self.category_ids).tolist()
+        # у денних агрегатах NULL-валюта рахується як UAH (COALESCE у тригерах rollup)
+        currencies = dictionaries["currency"].codes
+        if None in currencies:
+            self.rollup_currency = np.where(self.currency == currencies[None], currencies["UAH"], self.currency)
+        else:
+            self.rollup_currency = self.currency
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in _COLUMNS)
+
+
+def _read_columns(conn, previous: "_Columns | None") -> "_Columns":
+    """Повне завантаження (previous=None) або дочитування витрат з id > previous.high_water."""
+    if previous is None:
+        dictionaries = {"currency": _Dictionary(), "title": _Dictionary(), "description": _Dictionary()}
+        after = 0
+    else:
+        dictionaries = previous.dictionaries
+        after = previous.high_water
+    currency, title, description = (dictionaries[k].code for k in ("currency", "title", "description"))
+
+    chunks = {name: [] for name in _COLUMNS}
+    with conn.cursor(name="analytics_snapshot") as cur:
+        cur.itersize = ANALYTICS_LOAD_BATCH
+        cur.execute(LOAD_SQL, (after,))
+        while True:
+            rows = cur.fetchmany(ANALYTICS_LOAD_BATCH)
+            if not rows:
+                break
+            if any(r[4] is None for r in rows):
+                currency("UAH")   # для rollup_currency
+            for name, dtype, values in zip(_COLUMNS, _DTYPES, (
+                [r[0] for r in rows],
+                [r[1].toordinal() for r in rows],
+                [_cents(r[3]) for r in rows],
+                [r[2] for r in rows],
+                [currency(r[4]) for r in rows],
+                [title(r[5]) for r in rows],
+                [description(r[6]) for r in rows],
+            )):
+                chunks[name].append(np.array(values, dtype=dtype))
+
+    new = {name: (np.concatenate(parts) if parts else np.empty(0, dtype=dtype))
+           for (name, parts), dtype in zip(chunks.items(), _DTYPES)}
+    if len(new["ids"]):
+        order = np.lexsort((new["ids"], new["days"]))
+        new = {name: values[order] for name, values in new.items()}
+    if previous is None:
+        arrays = new
+    else:
+        arrays = {name: np.concatenate((getattr(previous, name), new[name])) for name in _COLUMNS}
+        # нові витрати зазвичай мають свіжі дати — тоді порядок (дата, id) уже правильний
+        if len(new["ids"]) and len(previous) and new["days"][0] < previous.days[-1]:
+            order = np.lexsort((arrays["ids"], arrays["days"]))
+            arrays = {name: values[order] for name, values in arrays.items()}
+    high_water = max(after, int(new["ids"].max())) if len(new["ids"]) else after
+    return _Columns(arrays, dictionaries, high_water)
+
+
+class _Rates:
+    """Курси як у звітах (exchange_rate_days + exchange_rate_tail): на дату без курсу — попередній, без кінця."""
+
+    def __init__(self, rows):
+        grouped: dict[str, tuple[list, list]] = {}
+        for currency, rate_date, rate in rows:
+            days, rates = grouped.setdefault(currency, ([], []))
+            days.append(_ordinal(rate_date))
+            rates.append(rate)
+        self.by_currency = {
+            currency: (days, np.array(days, dtype=np.int32), rates)
+            for currency, (days, rates) in grouped.items()
+        }
+
+    def available(self, currency, days: np.ndarray) -> np.ndarray:
+        if currency is None or currency == "UAH":
+            return np.ones(len(days), dtype=bool)
+        entry = self.by_currency.get(currency)
+        if entry is None:
+            return np.zeros(len(days), dtype=bool)
+        return np.searchsorted(entry[1], days, side="right") > 0
+
+    def rate_on(self, currency, day: int) -> Decimal | None:
+        if currency is None or currency == "UAH":
+            return Decimal(1)
+        entry = self.by_currency.get(currency)
+        if entry is None:
+            return None
+        i = bisect.bisect_right(entry[0], day) - 1
+        return entry[2][i] if i >= 0 else None
+
+
+def _like(value: str):
+    """LOWER(поле) LIKE LOWER('%value%') -> регулярний вираз (% і _ у value — теж шаблони, як у SQL)."""
+    pattern = "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in f"%{value}%".lower())
+    return re.compile(pattern, re.DOTALL)
+
+
+class _Query:
+    """Виконання ReportSpec над знімком — той самий результат, що й SQL з compile_report()."""
+
+    def __init__(self, spec: ReportSpec, columns: _Columns, rates: _Rates):
+        validate_report(spec)   # ті самі перевірки полів, фільтрів і сортування, що й для SQL
+        self.spec = spec
+        self.cols = columns
+        self.rates = rates
+        self.currency = columns.currency if spec.source == "expenses" else columns.rollup_currency
+        self._category_names: dict[int, str] | None = None
+
+    # ---------- значення полів ----------
+    def category_names(self) -> dict[int, str]:
+        if self._category_names is None:
+            self._category_names = {cid: get_category_name(cid) for cid in self.cols.category_set}
+        return self._category_names
+
+    def key(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """Числовий ключ поля для сортування й групування (рядки — за місцем у порядку сортування)."""
+        cols = self.cols
+        if name == "id":
+            return cols.ids[rows]
+        if name == "date":
+            return cols.days[rows]
+        if name in ("category_id", "category"):
+            ids = cols.category_ids[rows]
+            if name == "category_id" or not len(ids):
+                return ids
+            names = self.category_names()
+            lookup = np.zeros(max(names) + 1, dtype=np.int64)
+            for rank, cid in enumerate(sorted(names, key=lambda c: names[c] or "")):
+                lookup[cid] = rank
+            return lookup[ids]
+        if name == "amount":
+            return cols.cents[rows]
+        if name in ("currency", "title", "description"):
+            codes = self.currency[rows] if name == "currency" else getattr(cols, name)[rows]
+            return cols.dictionaries[name].ranks()[codes]
+        raise ValueError(f"Поле '{name}' у знімку доступне лише в агрегаті sum")
+
+    def values(self, name: str, rows: np.ndarray) -> list:
+        cols = self.cols
+        if name in ("id", "category_id"):
+            return self.key(name, rows).tolist()
+        if name in ("amount", "date"):
+            # Decimal і date — по одному на різне значення, рядки лише посилаються на них
+            uniq, inverse = np.unique(cols.cents[rows] if name == "amount" else cols.days[rows], return_inverse=True)
+            objects = [_money(v) if name == "amount" else date.fromordinal(v) for v in uniq.tolist()]
+            return [objects[i] for i in inverse.tolist()]
+        if name == "category":
+            names = self.category_names()
+            return [names.get(c) for c in cols.category_ids[rows].tolist()]
+        if name in ("currency", "title", "description"):
+            codes = self.currency[rows] if name == "currency" else getattr(cols, name)[rows]
+            values = cols.dictionaries[name].values
+            return [values[c] for c in codes.tolist()]
+        raise ValueError(f"Поле '{name}' у знімку доступне лише в агрегаті sum")
+
+    # ---------- фільтри ----------
+    def condition(self, name: str, value, rows: np.ndarray) -> np.ndarray:
+        cols = self.cols
+        if name == "date_from":
+            return cols.days[rows] >= _ordinal(value)
+        if name == "date_to":
+            return cols.days[rows] <= _ordinal(value)
+        if name == "category_id":
+            return cols.category_ids[rows] == int(value)
+        if name == "currency":
+            code = cols.dictionaries["currency"].codes.get(value)
+            return self.currency[rows] == code if code is not None else np.zeros(len(rows), dtype=bool)
+        if name == "title_like":
+            like = _like(value)
+            matches = [c for c, v in enumerate(cols.dictionaries["title"].values[:]) if like.fullmatch(v.lower())]
+            return np.isin(cols.title[rows], matches)
+        if name == "unconverted":
+            converted = self.converted(rows)
+            return ~converted if value else converted
+        raise ValueError(f"Невідомий фільтр: {name}")
+
+    def where(self, filters: dict, rows: np.ndarray) -> np.ndarray:
+        mask = np.ones(len(rows), dtype=bool)
+        for name, value in filters.items():
+            if value is not None:
+                mask &= self.condition(name, value, rows)
+        return mask
+
+    def select(self) -> np.ndarray:
+        """Позиції рядків, що проходять фільтри звіту; період — двійковим пошуком по днях."""
+        filters = dict(self.spec.filters)
+        lo, hi = 0, len(self.cols)
+        if filters.get("date_from") is not None:
+            lo = int(np.searchsorted(self.cols.days, _ordinal(filters.pop("date_from")), side="left"))
+        if filters.get("date_to") is not None:
+            hi = int(np.searchsorted(self.cols.days, _ordinal(filters.pop("date_to")), side="right"))
+        rows = np.arange(lo, max(lo, hi))
+        return rows[self.where(filters, rows)]
+
+    def converted(self, rows: np.ndarray) -> np.ndarray:
+        """Чи є курс валюти витрати і базової валюти на її дату (amount_base IS NOT NULL)."""
+        days = self.cols.days[rows]
+        codes = self.cols.rollup_currency[rows]   # x.currency = COALESCE(currency, 'UAH')
+        currencies = self.cols.dictionaries["currency"].values
+        ok = np.zeros(len(rows), dtype=bool)
+        for code in np.unique(codes).tolist():
+            same = codes == code
+            ok[same] = self.rates.available(currencies[code], days[same])
+        return ok & self.rates.available(self.spec.base_currency, days)
+
+    # ---------- виконання ----------
+    def run(self) -> list[tuple]:
+        spec = self.spec
+        if spec.windows:
+            raise ValueError("Вікна (windows) у знімку не рахуються — виконайте звіт у БД")
+        rows = self.select()
+        if spec.aggregates or spec.group_by or spec.grouping_sets:
+            return self.run_grouped(rows)
+        if spec.source != "expenses":
+            raise ValueError("Денні агрегати у знімку — лише зі звітами з агрегатами")
+
+        if spec.distinct_on and len(rows) > 1:
+            rows = self.distinct_candidates(rows)
+        if [(n, d.upper()) for n, d in spec.order_by] != [("date", "ASC"), ("id", "ASC")]:
+            keys = [-self.key(n, rows) if d.upper() == "DESC" else self.key(n, rows) for n, d in spec.order_by]
+            if keys:
+                rows = rows[np.lexsort(keys[::-1])]
+        if spec.distinct_on and len(rows) > 1:
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = False
+            for name in spec.distinct_on:
+                key = self.key(name, rows)
+                first[1:] |= key[1:] != key[:-1]
+            rows = rows[first]
+        if spec.limit is not None:
+            rows = rows[:spec.limit]
+        return list(zip(*(self.values(c, rows) for c in spec.columns)))
+
+    def distinct_candidates(self, rows: np.ndarray) -> np.ndarray:
+        """
+        DISTINCT ON: у кожній групі лишає рядки з найкращим значенням першого поля сортування після
+        полів групи (максимальна сума тощо) — лише вони можуть стати першими, тож сортуються тільки вони.
+        """
+        spec = self.spec
+        lead = len(spec.distinct_on)
+        if len(spec.order_by) <= lead or {n for n, _ in spec.order_by[:lead]} != set(spec.distinct_on):
+            return rows
+        name, direction = spec.order_by[lead]
+        key = self.key(name, rows).astype(np.int64)
+        inverse, _, count = self.groups(spec.distinct_on, rows)
+        if direction.upper() == "DESC":
+            best = np.full(count, np.iinfo(np.int64).min)
+            np.maximum.at(best, inverse, key)
+        else:
+            best = np.full(count, np.iinfo(np.int64).max)
+            np.minimum.at(best, inverse, key)
+        return rows[key == best[inverse]]
+
+    def groups(self, names, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray | None, int]:
+        """(номер групи для кожного рядка, по одному рядку з кожної групи, кількість груп)."""
+        if not names:
+            # без групування — один рядок результату навіть без вхідних рядків (як у SQL)
+            return np.zeros(len(rows), dtype=np.int64), None, 1
+        # ключі — невеликі цілі (місця рядків у сортуванні, дні, коди), тож групи нумеруються
+        # складеним ключем і bincount, без сортування; великі діапазони спершу стискаються np.unique
+        limit = max(_DENSE_GROUPS, len(rows))
+        composite, size = np.zeros(len(rows), dtype=np.int64), 1
+        for name in names:
+            key = self.key(name, rows).astype(np.int64)
+            low, width = (int(key.min()), int(key.max() - key.min()) + 1) if len(key) else (0, 1)
+            if width > limit:
+                uniq, key = np.unique(key, return_inverse=True)
+                low, width = 0, len(uniq)
+            composite, size = composite * width + (key - low), size * width
+            if size > limit:
+                uniq, composite = np.unique(composite, return_inverse=True)
+                size = len(uniq)
+        present = np.flatnonzero(np.bincount(composite, minlength=size))
+        dense = np.zeros(size, dtype=np.int64)
+        dense[present] = np.arange(len(present))
+        inverse = dense[composite]
+        first = np.empty(len(present), dtype=np.int64)
+        first[inverse] = np.arange(len(rows))
+        return inverse, first, len(present)
+
+    def aggregate(self, agg: Aggregate, rows: np.ndarray, inverse: np.ndarray, count: int, cents: np.ndarray) -> list:
+        """cents — суми рядків rows (спільні для всіх агрегатів звіту)."""
+        if agg.where:
+            mask = self.where(agg.where, rows)
+            rows, inverse, cents = rows[mask], inverse[mask], cents[mask]
+        n = np.bincount(inverse, minlength=count)
+        if agg.func == "count":
+            return n.tolist()
+        if agg.column == "amount_base":
+            if agg.func != "sum":
+                raise ValueError("amount_base у знімку — лише в агрегаті sum")
+            return self.sum_base(rows, inverse, count)
+        if agg.column != "amount":
+            raise ValueError(f"Агрегати у знімку — лише по amount, не по '{agg.column}'")
+
+        if agg.func in ("sum", "avg"):
+            # суми копійок у float64 точні, поки менші за 2**53 (≈ 9 * 10**13 грн)
+            out = np.rint(np.bincount(inverse, weights=cents, minlength=count)).astype(np.int64)
+        else:
+            ufunc, initial = {
+                "min": (np.minimum, np.iinfo(np.int64).max), "max": (np.maximum, np.iinfo(np.int64).min),
+            }[agg.func]
+            out = np.full(count, initial, dtype=np.int64)
+            ufunc.at(out, inverse, cents)
+        if agg.func == "avg":
+            return [(_money(s) / c if c else None) for s, c in zip(out.tolist(), n.tolist())]
+        return [(_money(v) if c else None) for v, c in zip(out.tolist(), n.tolist())]
+
+    def sum_base(self, rows: np.ndarray, inverse: np.ndarray, count: int) -> list:
+        """SUM(amount * x.rate / b.rate): суми в копійках по (група, день, валюта), далі — Decimal за курсом дня."""
+        totals: list = [None] * count
+        converted = self.converted(rows)
+        rows, inverse = rows[converted], inverse[converted]
+        if not len(rows):
+            return totals
+        days = self.cols.days[rows].astype(np.int64)
+        codes = self.cols.rollup_currency[rows].astype(np.int64)
+        first_day, span = int(days.min()), int(days.max() - days.min()) + 1
+        ncodes = int(codes.max()) + 1
+        parts, part_of = np.unique((inverse * span + (days - first_day)) * ncodes + codes, return_inverse=True)
+        sums = np.zeros(len(parts), dtype=np.int64)
+        np.add.at(sums, part_of, self.cols.cents[rows])
+
+        currencies = self.cols.dictionaries["currency"].values
+        base = self.spec.base_currency
+        factors: dict[tuple[int, int], tuple[Decimal, Decimal]] = {}
+        for part, cents in zip(parts.tolist(), sums.tolist()):
+            rest, code = divmod(part, ncodes)
+            group, offset = divmod(rest, span)
+            day = first_day + offset
+            if (code, day) not in factors:
+                factors[code, day] = (self.rates.rate_on(currencies[code], day), self.rates.rate_on(base, day))
+            x, b = factors[code, day]
+            value = _money(cents) * x / b
+            totals[group] = value if totals[group] is None else totals[group] + value
+        return totals
+
+    def run_grouped(self, rows: np.ndarray) -> list[tuple]:
+        spec = self.spec
+        grouped = [c for c in spec.columns if any(c in s for s in spec.grouping_sets)]
+        names = list(spec.columns) + (["grouping"] if spec.grouping_sets else []) + [a.alias for a in spec.aggregates]
+
+        cents = self.cols.cents[rows]
+        result: list[tuple] = []
+        for grouping_set in spec.grouping_sets or [tuple(spec.group_by)]:
+            inverse, first, count = self.groups(grouping_set, rows)
+            columns = [
+                self.values(c, rows[first]) if first is not None and (not spec.grouping_sets or c in grouping_set)
+                else [None] * count
+                for c in spec.columns
+            ]
+            if spec.grouping_sets:
+                bits = sum(1 << (len(grouped) - 1 - i) for i, c in enumerate(grouped) if c not in grouping_set)
+                columns.append([bits] * count)
+            columns += [self.aggregate(agg, rows, inverse, count, cents) for agg in spec.aggregates]
+            result += zip(*columns)
+
+        # результат згрупованого звіту невеликий — сортуємо в Python (NULL — як найбільше значення)
+        for name, direction in reversed(spec.order_by):
+            if name not in names:
+                raise ValueError(f"Сортування за '{name}' у знімку — лише за колонками звіту")
+            i = names.index(name)
+            result.sort(key=lambda row: (row[i] is None, row[i]), reverse=direction.upper() == "DESC")
+        if spec.distinct_on:
+            positions = [names.index(c) for c in spec.distinct_on]
+            seen = set()
+            result = [row for row in result
+                      if (key := tuple(row[i] for i in positions)) not in seen and not seen.add(key)]
+        if spec.limit is not None:
+            result = result[:spec.limit]
+        return result
+
+
+class Snapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns: _Columns | None = None
+        self._rates: _Rates | None = None
+        self._versions: dict = {}
+        self._checked_at = 0.0
+        self.stats = {"full_loads": 0, "incremental_loads": 0, "rows_loaded": 0, "load_ms": 0.0}
+
+    def refresh(self, conn=None, full: bool = False) -> None:
+        """Звіряє лічильники й дочитує зміни (не частіше ніж раз на ANALYTICS_REFRESH_TTL секунд)."""
+        with self._lock:
+            now = time.monotonic()
+            if self._columns is not None and not full and now - self._checked_at < ANALYTICS_REFRESH_TTL:
+                return
+
+            started = time.perf_counter()
+            with use_conn(conn) as c:
+                with c.cursor() as cur:
+                    cur.execute(VERSIONS_SQL)
+                    versions = dict(cur.fetchall())
+                reload = full or self._columns is None or versions.get("expenses") != self._versions.get("expenses")
+                before = 0 if reload else len(self._columns)
+                columns = _read_columns(c, None if reload else self._columns)
+                if self._rates is None or versions.get("exchange_rates") != self._versions.get("exchange_rates"):
+                    with c.cursor() as cur:
+                        cur.execute(RATES_SQL)
+                        self._rates = _Rates(cur.fetchall())
+
+            self._columns, self._versions, self._checked_at = columns, versions, now
+            self.stats["full_loads" if reload else "incremental_loads"] += 1
+            self.stats["rows_loaded"] += len(columns) - before
+            self.stats["load_ms"] += (time.perf_counter() - started) * 1000
+
+    def run(self, spec: ReportSpec, conn=None) -> list[tuple]:
+        self.refresh(conn)
+        return _Query(spec, self._columns, self._rates).run()
+
+    def info(self) -> dict:
+        columns = self._columns
+        return {
+            "rows": len(columns) if columns is not None else 0,
+            "bytes": columns.nbytes() if columns is not None else 0,
+            "high_water": columns.high_water if columns is not None else 0,
+            **self.stats,
+        }
+
+
+_snapshot: Snapshot | None = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot() -> Snapshot:
+    """Знімок на весь процес (завантажується під час першого звіту)."""
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = Snapshot()
+        return _snapshot
@@ -0,0 +1,210 @@
+# async_api.py
+"""
+Асинхронні версії операцій з категоріями, витратами та всіх звітів — для asyncio-сервісу.
+SQL і специфікації звітів ті самі, що в categories.py / expenses.py / reports.py,
+тож синхронне меню й async-шар не розходяться. Помилки не друкуються, а піднімаються як винятки.
+
+    from async_api import fetch_dashboard
+    data = await fetch_dashboard("2026-01-01", "2026-01-31")   # запити звіту паралельно
+
+Кожна функція приймає необов'язковий conn (як і синхронні fetch_*); без нього — з'єднання з пулу.
+"""
+import asyncio
+
+import reports
+from async_db import async_conn
+from categories import (
+    INSERT_CATEGORY_SQL, UPDATE_CATEGORY_SQL, DELETE_CATEGORY_SQL, SELECT_CATEGORIES_SQL,
+    invalidate_category_cache,
+)
+from expenses import (
+    INSERT_EXPENSE_SQL, SELECT_EXPENSE_SQL, UPDATE_EXPENSE_SQL, DELETE_EXPENSE_SQL, expenses_page_query,
+)
+from report_engine import ReportSpec, compile_report
+from utils import ALLOWED_CURRENCIES
+
+
+async def _fetchall(sql: str, params=(), conn=None) -> list[tuple]:
+    async with async_conn(conn) as c:
+        async with c.cursor() as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+
+async def _execute(sql: str, params=(), conn=None):
+    """Виконує зміну; повертає (rowcount, перший рядок RETURNING або None)."""
+    async with async_conn(conn) as c:
+        async with c.cursor() as cur:
+            await cur.execute(sql, params)
+            row = await cur.fetchone() if cur.description else None
+            return cur.rowcount, row
+
+
+async def run_report(spec: ReportSpec, conn=None) -> list[tuple]:
+    # async-пул — завжди Postgres, хоч би який DB_BACKEND у синхронної частини
+    sql, params = compile_report(spec, "postgres")
+    return await _fetchall(sql, params, conn)
+
+
+# ---------- категорії ----------
+async def list_categories(conn=None) -> list[tuple[int, str]]:
+    return await _fetchall(SELECT_CATEGORIES_SQL, (), conn)
+
+
+async def get_category(category_id: int, conn=None) -> tuple[int, str] | None:
+    rows = await _fetchall("SELECT id, name FROM categories WHERE id = %s;", (category_id,), conn)
+    return rows[0] if rows else None
+
+
+async def add_category(name: str, conn=None) -> int:
+    name = name.strip()
+    if not name:
+        raise ValueError("Назва не може бути порожньою.")
+    _, row = await _execute(INSERT_CATEGORY_SQL, (name,), conn)
+    invalidate_category_cache()
+    return row[0]
+
+
+async def update_category(category_id: int, name: str, conn=None) -> bool:
+    name = name.strip()
+    if not name:
+        raise ValueError("Назва не може бути порожньою.")
+    count, _ = await _execute(UPDATE_CATEGORY_SQL, (name, category_id), conn)
+    invalidate_category_cache()
+    return count > 0
+
+
+async def delete_category(category_id: int, conn=None) -> bool:
+    count, _ = await _execute(DELETE_CATEGORY_SQL, (category_id,), conn)
+    invalidate_category_cache()
+    return count > 0
+
+
+# ---------- витрати ----------
+def _check_expense(amount, currency: str):
+    if amount is not None and amount <= 0:
+        raise ValueError("Сума має бути більшою за 0.")
+    if currency is not None and currency not in ALLOWED_CURRENCIES:
+        raise ValueError(f"Невірна валюта: {currency}")
+
+
+async def list_expenses(filters: dict | None = None, limit: int = 20,
+                        after: tuple | None = None, before: tuple | None = None, conn=None) -> list[tuple]:
+    """Сторінка витрат — як expenses.fetch_expenses_page (keyset по (expense_date, id))."""
+    sql, params, reverse = expenses_page_query(filters or {}, limit, after, before)
+    rows = await _fetchall(sql, params, conn)
+    if reverse:
+        rows.reverse()
+    return rows
+
+
+async def get_expense(expense_id: int, conn=None) -> tuple | None:
+    """(id, назва, дата, категорія, сума, валюта, опис) або None."""
+    rows = await _fetchall(SELECT_EXPENSE_SQL, (expense_id,), conn)
+    return rows[0] if rows else None
+
+
+async def add_expense(title: str, amount, expense_date: str, category_id: int,
+                      currency: str = "UAH", description: str | None = None, conn=None) -> int:
+    _check_expense(amount, currency)
+    _, row = await _execute(
+        INSERT_EXPENSE_SQL, (title, amount, expense_date, category_id, description or None, currency), conn
+    )
+    return row[0]
+
+
+async def update_expense(expense_id: int, conn=None, **changes) -> bool:
+    """
+    Змінює лише передані поля: title, expense_date, category_id, amount, currency, description.
+    False — якщо витрати з таким id немає.
+    """
+    fields = ("title", "expense_date", "category_id", "amount", "currency", "description")
+    unknown = set(changes) - set(fields)
+    if unknown:
+        raise ValueError(f"Невідомі поля: {', '.join(sorted(unknown))}")
+    _check_expense(changes.get("amount"), changes.get("currency"))
+
+    async with async_conn(conn) as c:
+        async with c.cursor() as cur:
+            await cur.execute(
+                "SELECT title, expense_date, category_id, amount, currency, description "
+                "FROM expenses WHERE id = %s FOR UPDATE;", (expense_id,)
+            )
+            row = await cur.fetchone()
+            if row is None:
+                return False
+            current = dict(zip(fields, row))
+            current.update(changes)
+            await cur.execute(UPDATE_EXPENSE_SQL, (*(current[f] for f in fields), expense_id))
+            return True
+
+
+async def delete_expense(expense_id: int, conn=None) -> bool:
+    count, _ = await _execute(DELETE_EXPENSE_SQL, (expense_id,), conn)
+    return count > 0
+
+
+# ---------- звіти (ті самі специфікації, що й у reports.py) ----------
+async def fetch_expenses_by_period(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_expenses_by_period(date_from, date_to), conn)
+
+
+async def search_expenses_by_title(text: str, limit: int, offset: int = 0, conn=None) -> list[tuple]:
+    async with async_conn(conn) as c:
+        rows = await _fetchall("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm';", (), c)
+        sql, params = reports.search_query(text, limit, offset, bool(rows))
+        return await _fetchall(sql, params, c)
+
+
+async def fetch_expenses_by_category(category_id: int, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_expenses_by_category(category_id), conn)
+
+
+async def fetch_extreme_per_category(kind: str, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_extreme_per_category(kind), conn)
+
+
+async def fetch_extreme_in_period(kind: str, date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_extreme_in_period(kind, date_from, date_to), conn)
+
+
+async def fetch_sum_by_category(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_sum_by_category(date_from, date_to), conn)
+
+
+async def fetch_top_category(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_top_category(date_from, date_to), conn)
+
+
+async def fetch_avg_per_day(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    rows = await run_report(reports.spec_total_by_currency(date_from, date_to), conn)
+    return reports.avg_per_day_rows(rows, date_from, date_to)
+
+
+async def fetch_period_dashboard(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    rows = await run_report(reports.spec_period_dashboard(date_from, date_to), conn)
+    return reports.dashboard_rows(rows, date_from, date_to)
+
+
+async def fetch_sum_in_base(date_from: str, date_to: str, base: str, conn=None) -> list[tuple]:
+    return reports.sum_in_base_rows(await run_report(reports.spec_sum_in_base(date_from, date_to, base), conn))
+
+
+async def fetch_unconverted(date_from: str, date_to: str, base: str, conn=None) -> list[tuple]:
+    return await run_report(reports.spec_unconverted(date_from, date_to, base), conn)
+
+
+async def fetch_dashboard(date_from: str, date_to: str) -> dict[str, list[tuple]]:
+    """
+    Незалежні звіти за період — одночасно, кожен на своєму з'єднанні з пулу
+    (скільки паралельно — обмежує DB_POOL_MAX). Колонки — як у reports.REPORTS.
+    """
+    jobs = {
+        "sum-by-category": fetch_sum_by_category(date_from, date_to),
+        "top-category": fetch_top_category(date_from, date_to),
+        "avg-per-day": fetch_avg_per_day(date_from, date_to),
+        "max-in-period": fetch_extreme_in_period("max", date_from, date_to),
+        "min-in-period": fetch_extreme_in_period("min", date_from, date_to),
+    }
+    results = await asyncio.gather(*jobs.values())
+    return dict(zip(jobs, results))
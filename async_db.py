@@ -0,0 +1,80 @@
+# async_db.py
+"""
+Асинхронний пул з'єднань (psycopg 3 + psycopg_pool) для вбудовування трекера в asyncio-сервіс.
+Залежність необов'язкова: консольна програма її не імпортує.
+    pip install "psycopg[binary]" psycopg-pool
+
+Налаштування ті самі, що й у синхронного пулу (db.py): DB_* і DB_POOL_MIN/MAX/TIMEOUT.
+Запити пишуться в той самий журнал SQL (query_log), що й синхронні.
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+
+import db  # noqa: F401 — підвантажує .env так само, як для синхронного коду
+import query_log
+
+_pool = None
+
+
+def _conninfo() -> str:
+    from psycopg.conninfo import make_conninfo
+
+    password = os.getenv("DB_PASSWORD", "")
+    if not password:
+        raise RuntimeError("DB_PASSWORD порожній. Додайте пароль у .env")
+    return make_conninfo(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=int(os.getenv("DB_PORT", "5432")),
+        dbname=os.getenv("DB_NAME", "expense_exam"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=password,
+    )
+
+
+async def get_async_pool():
+    """Пул на весь процес; створюється при першому виклику всередині event loop."""
+    global _pool
+    if _pool is None:
+        try:
+            from psycopg_pool import AsyncConnectionPool
+        except ImportError as e:
+            raise RuntimeError('Для async-режиму встановіть: pip install "psycopg[binary]" psycopg-pool') from e
+
+        pool = AsyncConnectionPool(
+            _conninfo(),
+            min_size=int(os.getenv("DB_POOL_MIN", "1")),
+            max_size=int(os.getenv("DB_POOL_MAX", "5")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            kwargs={"cursor_factory": query_log.async_cursor_factory()} if query_log.SQL_LOG else None,
+            open=False,
+        )
+        await pool.open()
+        if _pool is None:
+            _pool = pool
+        else:
+            await pool.close()   # інша корутина встигла створити пул раніше
+    return _pool
+
+
+@asynccontextmanager
+async def async_conn(conn=None):
+    """
+    Використати передане з'єднання або взяти з пулу.
+    З пулу: commit після блоку, rollback при помилці, потім повернення в пул.
+    """
+    if conn is not None:
+        yield conn
+        return
+    pool = await get_async_pool()
+    started = time.perf_counter()
+    async with pool.connection() as pooled:
+        query_log.note_checkout(pooled, (time.perf_counter() - started) * 1000)
+        yield pooled
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
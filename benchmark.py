@@ -0,0 +1,494 @@
+# benchmark.py
+"""
+Бенчмарк звітів, CRUD, імпорту та експорту на синтетичних даних.
+
+Запускати на ОКРЕМІЙ базі (з --reset усі витрати й категорії в ній видаляються):
+    DB_NAME=expense_bench python benchmark.py --size 10k --reset --output bench.json
+
+Дані генеруються детерміновано (--seed), тож прогони на різних версіях коду можна порівнювати.
+Результат — JSON: p50/p95 затримка, рядків/с і піковий RSS для кожного сценарію.
+
+Порівняння бекендів (або двох версій коду) — два прогони на тих самих даних і --compare:
+    DB_NAME=expense_bench python benchmark.py --size 10k --reset --output pg.json
+    DB_BACKEND=sqlite DB_SQLITE_PATH=bench.db python benchmark.py --size 10k --reset --output sqlite.json
+    python benchmark.py --compare pg.json sqlite.json
+
+Звіти над знімком у пам'яті (analytics.py) проти запитів до БД — так само, з --analytics:
+    DB_NAME=expense_bench python benchmark.py --analytics --output analytics.json
+    python benchmark.py --compare pg.json analytics.json
+"""
+import io
+import os
+import csv
+import sys
+import json
+import time
+import random
+import argparse
+import importlib.util
+import platform
+import resource
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from db import DB_BACKEND, get_conn, init_db, pool_stats
+import reports
+import statements
+from expenses import EXPENSE_BY_ID, fetch_expenses_page
+from importer import import_expenses_csv
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+BASE_CATEGORIES = [
+    "Їжа", "Транспорт", "Кафе", "Комунальні", "Зв'язок", "Одяг", "Здоров'я", "Розваги",
+    "Подорожі", "Освіта", "Подарунки", "Дім", "Спорт", "Книги", "Техніка", "Авто",
+]
+TITLES = ["Покупка", "Оплата", "Замовлення", "Поповнення", "Квиток", "Підписка", "Ремонт", "Доставка"]
+# частка витрат у кожній валюті
+CURRENCY_WEIGHTS = (("UAH", 0.85), ("USD", 0.10), ("EUR", 0.05))
+
+# дані закінчуються фіксованою датою, щоб генерація не залежала від дня запуску
+DATA_END = date(2025, 12, 31)
+DATA_DAYS = 3 * 365
+COPY_CHUNK = 50_000
+
+
+# ---------- генератор даних ----------
+def category_names(count: int) -> list[str]:
+    names = []
+    for i in range(count):
+        base = BASE_CATEGORIES[i % len(BASE_CATEGORIES)]
+        names.append(base if i < len(BASE_CATEGORIES) else f"{base} {i // len(BASE_CATEGORIES) + 1}")
+    return names
+
+
+def generate_expenses(rng: random.Random, count: int, category_ids: list[int]):
+    """
+    Кортежі (title, amount, expense_date, category_id, description, currency).
+    Суми — логнормальні з власною медіаною для кожної категорії, у вихідні витрат більше,
+    частина категорій трапляється значно частіше за інші.
+    """
+    medians = {cid: rng.uniform(50, 2000) for cid in category_ids}
+    cat_weights = [1.0 / (i + 1) for i in range(len(category_ids))]  # закон Ципфа
+    currencies = [c for c, _ in CURRENCY_WEIGHTS]
+    cur_weights = [w for _, w in CURRENCY_WEIGHTS]
+    start = DATA_END - timedelta(days=DATA_DAYS - 1)
+
+    for _ in range(count):
+        day = start + timedelta(days=rng.randrange(DATA_DAYS))
+        if day.weekday() < 5 and rng.random() < 0.3:
+            # зсув частини буднів на вихідні
+            day = min(day + timedelta(days=5 - day.weekday()), DATA_END)
+        cid = rng.choices(category_ids, cat_weights)[0]
+        currency = rng.choices(currencies, cur_weights)[0]
+        amount = round(rng.lognormvariate(0, 0.8) * medians[cid] / (40 if currency != "UAH" else 1), 2)
+        description = f"#{rng.randrange(100000)}" if rng.random() < 0.2 else None
+        # Decimal: у SQLite сума пишеться цілими копійками лише з Decimal (див. sqlite_backend)
+        yield rng.choice(TITLES), Decimal(str(max(amount, 0.01))), day, cid, description, currency
+
+
+def seed_database(n_categories: int, n_expenses: int, seed: int) -> None:
+    rng = random.Random(seed)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM expenses;")
+            if cur.fetchone()[0]:
+                raise RuntimeError("У БД вже є витрати. Запустіть з --reset на окремій базі.")
+
+            if DB_BACKEND == "sqlite":
+                cur.executemany(
+                    "INSERT INTO categories (name) VALUES (%s) ON CONFLICT (name) DO NOTHING;",
+                    [(name,) for name in category_names(n_categories)]
+                )
+            else:
+                cur.execute(
+                    "INSERT INTO categories (name) SELECT unnest(%s::text[]) "
+                    "ON CONFLICT (name) DO NOTHING;",
+                    (category_names(n_categories),)
+                )
+            cur.execute("SELECT id FROM categories ORDER BY id LIMIT %s;", (n_categories,))
+            category_ids = [r[0] for r in cur.fetchall()]
+        conn.commit()
+
+        rows = generate_expenses(rng, n_expenses, category_ids)
+        if DB_BACKEND == "sqlite":
+            _seed_expenses_sqlite(conn, rows, n_expenses)
+            return
+
+        loaded = 0
+        while loaded < n_expenses:
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            chunk = 0
+            for row in rows:
+                writer.writerow(row)
+                chunk += 1
+                if chunk >= COPY_CHUNK:
+                    break
+            if not chunk:
+                break
+            buf.seek(0)
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    "COPY expenses (title, amount, expense_date, category_id, description, currency) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buf
+                )
+            conn.commit()
+            loaded += chunk
+            print(f"  завантажено {loaded}/{n_expenses}", file=sys.stderr)
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE expenses;")
+            cur.execute("VACUUM ANALYZE expense_daily_rollup;")
+    finally:
+        conn.close()
+
+
+def _seed_expenses_sqlite(conn, rows, n_expenses: int) -> None:
+    # COPY у SQLite немає: executemany порціями, одна транзакція на порцію
+    insert = """
+        INSERT INTO expenses (title, amount, expense_date, category_id, description, currency)
+        VALUES (%s, %s, %s, %s, %s, %s);
+    """
+    loaded = 0
+    while loaded < n_expenses:
+        chunk = [row for _, row in zip(range(COPY_CHUNK), rows)]
+        if not chunk:
+            break
+        with conn.cursor() as cur:
+            cur.executemany(insert, chunk)
+        conn.commit()
+        loaded += len(chunk)
+        print(f"  завантажено {loaded}/{n_expenses}", file=sys.stderr)
+
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("ANALYZE;")
+
+
+def reset_database() -> None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if DB_BACKEND == "sqlite":
+                # TRUNCATE у SQLite немає; rollup — першим, щоб тригери видалення не перераховували його
+                cur.execute("DELETE FROM expense_daily_rollup;")
+                cur.execute("DELETE FROM expenses;")
+                cur.execute("DELETE FROM categories;")
+                # журнал змін — після expenses: тригери видалення щойно дописали в нього всі рядки
+                cur.execute("DELETE FROM expense_changes;")
+                cur.execute("DELETE FROM export_watermarks;")
+                cur.execute("DELETE FROM sqlite_sequence WHERE name IN ('expenses', 'categories', 'expense_changes');")
+            else:
+                cur.execute("""
+                    TRUNCATE expenses, categories, expense_daily_rollup, expense_changes, export_watermarks
+                    RESTART IDENTITY;
+                """)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ---------- вимірювання ----------
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль методом найближчого рангу."""
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[k]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: кілобайти на Linux, байти на macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def measure(name: str, fn, repeat: int, warmup: int = 1) -> dict:
+    """fn() повертає кількість оброблених рядків."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - started)
+
+    p50 = percentile(timings, 50)
+    result = {
+        "name": name,
+        "runs": repeat,
+        "rows": rows,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "mean_ms": round(sum(timings) / len(timings) * 1000, 3),
+        "rows_per_sec": round(rows / p50, 1) if p50 > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"  {name}: p50={result['p50_ms']} ms, p95={result['p95_ms']} ms, rows={rows}", file=sys.stderr)
+    return result
+
+
+# ---------- сценарії ----------
+def _data_range() -> tuple[date, date, int]:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MIN(expense_date), MAX(expense_date), MIN(category_id) FROM expenses;")
+            first, last, category_id = cur.fetchone()
+    finally:
+        conn.close()
+    if isinstance(first, str):
+        # SQLite повертає MIN/MAX дати рядком (тип колонки є лише в простих вибірок)
+        first, last = date.fromisoformat(first), date.fromisoformat(last)
+    return first, last, category_id
+
+
+def build_scenarios(tmp_dir: str) -> list[tuple[str, object, int | None]]:
+    """(назва, функція, власна кількість повторів або None)."""
+    first, last, category_id = _data_range()
+    if first is None:
+        raise RuntimeError("У БД немає витрат — запустіть з --size для генерації даних.")
+
+    periods = {
+        "month": (str(last - timedelta(days=29)), str(last)),
+        "year": (str(last - timedelta(days=364)), str(last)),
+        "all": (str(first), str(last)),
+    }
+
+    def report(spec_fn, *args):
+        return lambda: len(reports.run_spec(spec_fn(*args)))
+
+    scenarios = []
+    if reports.analytics_enabled():
+        snapshot = reports.analytics_snapshot()
+
+        def full_load():
+            snapshot.refresh(full=True)
+            return snapshot.info()["rows"]
+
+        # повне завантаження знімка; звіти нижче читають уже завантажений
+        scenarios.append(("analytics.full_load", full_load, None))
+    scenarios += [
+        ("report.expenses_by_category", report(reports.spec_expenses_by_category, category_id), None),
+        ("report.max_per_category", report(reports.spec_extreme_per_category, "max"), None),
+        ("report.min_per_category", report(reports.spec_extreme_per_category, "min"), None),
+        ("report.filter_by_title", lambda: len(reports.search_expenses_by_title("опла", 50)), None),
+    ]
+    for label, (date_from, date_to) in periods.items():
+        scenarios += [
+            (f"report.expenses_by_period.{label}", report(reports.spec_expenses_by_period, date_from, date_to), None),
+            (f"report.max_in_period.{label}", report(reports.spec_extreme_in_period, "max", date_from, date_to), None),
+            (f"report.min_in_period.{label}", report(reports.spec_extreme_in_period, "min", date_from, date_to), None),
+            (f"report.sum_by_category.{label}", report(reports.spec_sum_by_category, date_from, date_to), None),
+            (f"report.top_category.{label}", report(reports.spec_top_category, date_from, date_to), None),
+            (f"report.avg_per_day.{label}", report(reports.spec_total_by_currency, date_from, date_to), None),
+            (f"report.dashboard.{label}", report(reports.spec_period_dashboard, date_from, date_to), None),
+            (f"report.rolling_spend.{label}", report(reports.spec_rolling_spend, date_from, date_to), None),
+            (f"report.running_totals.{label}", report(reports.spec_running_totals, date_from, date_to), None),
+        ]
+
+    middle = first + (last - first) / 2
+    scenarios += [
+        ("list_expenses.first_page", lambda: len(fetch_expenses_page({}, 20)), None),
+        ("list_expenses.deep_page", lambda: len(fetch_expenses_page({}, 20, after=(middle, 0))), None),
+    ]
+
+    lookup_ids = iter(range(1, 10**9))
+
+    def lookup_by_id():
+        # з'єднання з пулу, як у меню: підготовлений запит переживає повернення з'єднання в пул
+        with get_conn() as conn, conn.cursor() as cur:
+            statements.execute(cur, EXPENSE_BY_ID, (next(lookup_ids),))
+            return len(cur.fetchall())
+
+    scenarios.append(("lookup.expense_by_id", lookup_by_id, 500))
+
+    inserted_ids: list[int] = []
+
+    def single_insert():
+        conn = get_conn()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO expenses (title, amount, expense_date, category_id, description, currency)
+                    VALUES (%s, %s, %s, %s, %s, %s) RETURNING id;
+                """, ("benchmark", Decimal("10.50"), last, category_id, None, "UAH"))
+                inserted_ids.append(cur.fetchone()[0])
+        finally:
+            conn.close()
+        return 1
+
+    bulk_path = os.path.join(tmp_dir, "bulk.csv")
+    with open(bulk_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["date", "category", "title", "amount", "currency", "description"])
+        for i in range(10_000):
+            writer.writerow([last, "benchmark", f"bulk {i}", f"{1 + i % 500}.25", "UAH", ""])
+
+    def bulk_import():
+        return import_expenses_csv(bulk_path)["inserted"]
+
+    export_path = os.path.join(tmp_dir, "export.csv")
+    year_from, year_to = periods["year"]
+
+    scenarios += [
+        ("export.csv.year", lambda: reports.write_period_csv(year_from, year_to, export_path), 3),
+    ]
+    if importlib.util.find_spec("pyarrow") is not None:
+        for fmt in ("parquet", "arrow"):
+            path = os.path.join(tmp_dir, f"export.{fmt}")
+            scenarios.append((
+                f"export.{fmt}.year",
+                lambda fmt=fmt, path=path: reports.write_period_columnar(year_from, year_to, path, fmt), 3,
+            ))
+
+    # вставки — в кінці, щоб не змінювати дані для звітів і експорту
+    scenarios += [
+        ("insert.single", single_insert, 50),
+        ("insert.bulk_csv_10k", bulk_import, 3),
+    ]
+    return scenarios
+
+
+def cleanup_benchmark_rows() -> None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM expenses
+                WHERE title = 'benchmark'
+                   OR category_id IN (SELECT id FROM categories WHERE name = 'benchmark');
+            """)
+            cur.execute("DELETE FROM categories WHERE name = 'benchmark';")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def database_version() -> str:
+    if DB_BACKEND == "sqlite":
+        import sqlite_backend
+        return sqlite_backend.database_label()
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SHOW server_version;")
+            return "PostgreSQL " + cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def compare_results(left: dict, right: dict) -> list[dict]:
+    """Сценарії, що є в обох прогонах: p50/p95 кожного і відношення right/left (менше 1 — right швидший)."""
+    right_by_name = {r["name"]: r for r in right["scenarios"]}
+    rows = []
+    for l in left["scenarios"]:
+        r = right_by_name.get(l["name"])
+        if r is None:
+            continue
+        rows.append({
+            "name": l["name"],
+            "left_p50_ms": l["p50_ms"],
+            "right_p50_ms": r["p50_ms"],
+            "left_p95_ms": l["p95_ms"],
+            "right_p95_ms": r["p95_ms"],
+            "ratio_p50": round(r["p50_ms"] / l["p50_ms"], 3) if l["p50_ms"] else None,
+        })
+    return rows
+
+
+def print_comparison(left_path: str, right_path: str) -> None:
+    with open(left_path, encoding="utf-8") as f:
+        left = json.load(f)
+    with open(right_path, encoding="utf-8") as f:
+        right = json.load(f)
+
+    def label(result, path):
+        meta = result["meta"]
+        mode = " + analytics" if meta.get("analytics") else ""
+        return f"{meta.get('backend', 'postgres')}{mode} ({meta.get('database') or meta.get('postgres')}, {path})"
+
+    print(f"A: {label(left, left_path)}")
+    print(f"B: {label(right, right_path)}")
+    print(f"\n{'сценарій':40} {'A p50, мс':>12} {'B p50, мс':>12} {'B/A':>8}")
+    print("-" * 76)
+    for row in compare_results(left, right):
+        ratio = f"{row['ratio_p50']:.2f}" if row["ratio_p50"] is not None else "-"
+        print(f"{row['name']:40} {row['left_p50_ms']:>12.3f} {row['right_p50_ms']:>12.3f} {ratio:>8}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк expense tracker на синтетичних даних")
+    parser.add_argument("--size", choices=sorted(SIZES), help="згенерувати дані: 10k, 1m або 10m витрат")
+    parser.add_argument("--rows", type=int, help="довільна кількість витрат замість --size")
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="видалити всі витрати й категорії перед генерацією")
+    parser.add_argument("--repeat", type=int, default=5, help="повторів на сценарій (типово 5)")
+    parser.add_argument("--only", help="лише сценарії, назва яких містить цей текст")
+    parser.add_argument("--output", help="файл для JSON (типово stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("A.json", "B.json"),
+                        help="лише порівняти два збережені прогони (p50 по сценаріях), без вимірювань")
+    parser.add_argument("--analytics", action="store_true",
+                        help="звіти над знімком витрат у пам'яті (analytics.py) замість запитів до БД")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print_comparison(*args.compare)
+        return 0
+
+    init_db()
+    if args.analytics:
+        reports.set_analytics_mode(True)
+    n_expenses = args.rows or (SIZES[args.size] if args.size else 0)
+    if args.reset:
+        reset_database()
+    if n_expenses:
+        print(f"Генерація {n_expenses} витрат (seed={args.seed})...", file=sys.stderr)
+        started = time.perf_counter()
+        seed_database(args.categories, n_expenses, args.seed)
+        print(f"  готово за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            for name, fn, repeat in build_scenarios(tmp_dir):
+                if args.only and args.only not in name:
+                    continue
+                results.append(measure(name, fn, repeat or args.repeat))
+        finally:
+            cleanup_benchmark_rows()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "seed": args.seed,
+            "generated_rows": n_expenses,
+            "categories": args.categories,
+            "repeat": args.repeat,
+            "backend": DB_BACKEND,
+            "database": database_version(),
+            "python": platform.python_version(),
+            "pool": pool_stats(),
+            "statements": statements.stats(),
+            "analytics": reports.analytics_snapshot().info() if reports.analytics_enabled() else None,
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+# bulk.py
+"""
+Масове редагування і видалення витрат за фільтром (період, категорія, валюта, частина назви).
+Фільтри ті самі, що у звітах (report_engine), зміни — одним UPDATE/DELETE ... WHERE.
+
+Без chunk_size усе виконується однією транзакцією. З chunk_size — порціями по id
+(кожна порція — окрема транзакція), щоб не тримати блокування на всі рядки великого вибору.
+"""
+import os
+from db import use_conn
+from report_engine import compile_filters, money_alias
+from categories import get_category_name, find_category_id_by_text
+from utils import ALLOWED_CURRENCIES, read_optional_date, read_optional_currency
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "5000"))
+
+# поле -> колонка; суму масово не змінюємо — у кожної витрати вона своя
+BULK_FIELDS = {
+    "category_id": "category_id",
+    "currency": "currency",
+    "title": "title",
+    "expense_date": "expense_date",
+    "description": "description",
+}
+
+
+def _check_changes(changes: dict) -> dict:
+    if not changes:
+        raise ValueError("Немає змін")
+    unknown = set(changes) - set(BULK_FIELDS)
+    if unknown:
+        raise ValueError(f"Невідомі поля: {', '.join(sorted(unknown))}")
+    if "currency" in changes and changes["currency"] not in ALLOWED_CURRENCIES:
+        raise ValueError(f"Невірна валюта: {changes['currency']}")
+    if "title" in changes and not (changes["title"] or "").strip():
+        raise ValueError("Назва не може бути порожньою")
+    return changes
+
+
+def preview_matching(filters: dict, limit: int = 5, conn=None) -> dict:
+    """
+    Сухий прогін: скільки витрат підпадає під фільтр, суми по валютах і перші limit рядків.
+    {"count", "totals": [(валюта, сума, кількість)], "sample": [(id, дата, назва, сума, валюта)]}.
+    """
+    where, params = compile_filters(filters)
+    with use_conn(conn) as c:
+        with c.cursor() as cur:
+            cur.execute(f"""
+                SELECT e.currency, SUM(e.amount) AS {money_alias("total")}, COUNT(*)
+                FROM expenses e
+                WHERE {where}
+                GROUP BY e.currency
+                ORDER BY e.currency;
+            """, params)
+            totals = cur.fetchall()
+            cur.execute(f"""
+                SELECT e.id, e.expense_date, e.title, e.amount, e.currency
+                FROM expenses e
+                WHERE {where}
+                ORDER BY e.expense_date, e.id
+                LIMIT %s;
+            """, [*params, limit])
+            sample = cur.fetchall()
+    return {"count": sum(t[2] for t in totals), "totals": totals, "sample": sample}
+
+
+def _run_chunked(c, statement: str, lead_params: list, where: str, params: list, chunk_size: int) -> int:
+    """
+    statement — UPDATE/DELETE з {batch}: підзапит, що повертає id наступної порції;
+    lead_params — параметри statement до {batch} (значення SET).
+    Порції йдуть за зростанням id; межа — найбільший id на момент старту
+    (витрати, додані під час операції, не зачіпаються).
+    """
+    with c.cursor() as cur:
+        cur.execute(f"SELECT MAX(e.id) FROM expenses e WHERE {where};", params)
+        max_id = cur.fetchone()[0]
+    c.commit()
+    if max_id is None:
+        return 0
+
+    batch = f"SELECT e.id FROM expenses e WHERE {where} AND e.id > %s AND e.id <= %s ORDER BY e.id LIMIT %s"
+    sql = statement.format(batch=batch) + " RETURNING id;"
+    total, last_id = 0, 0
+    while True:
+        with c.cursor() as cur:
+            cur.execute(sql, [*lead_params, *params, last_id, max_id, chunk_size])
+            ids = [r[0] for r in cur.fetchall()]
+        c.commit()
+        if not ids:
+            return total
+        total += len(ids)
+        last_id = max(ids)
+
+
+def bulk_update(filters: dict, changes: dict, chunk_size: int | None = None, conn=None) -> int:
+    """Змінює поля changes (див. BULK_FIELDS) у всіх витратах за фільтром. Повертає кількість змінених."""
+    changes = _check_changes(dict(changes))
+    where, params = compile_filters(filters)
+    set_sql = ", ".join(f"{BULK_FIELDS[k]} = %s" for k in changes)
+    set_params = list(changes.values())
+
+    with use_conn(conn) as c:
+        if chunk_size:
+            statement = f"UPDATE expenses SET {set_sql} WHERE id IN ({{batch}})"
+            return _run_chunked(c, statement, set_params, where, params, chunk_size)
+        with c.cursor() as cur:
+            cur.execute(f"UPDATE expenses AS e SET {set_sql} WHERE {where};", [*set_params, *params])
+            count = cur.rowcount
+        c.commit()
+        return count
+
+
+def bulk_delete(filters: dict, chunk_size: int | None = None, conn=None) -> int:
+    """Видаляє всі витрати за фільтром. Повертає кількість видалених."""
+    where, params = compile_filters(filters)
+    with use_conn(conn) as c:
+        if chunk_size:
+            return _run_chunked(c, "DELETE FROM expenses WHERE id IN ({batch})", [], where, params, chunk_size)
+        with c.cursor() as cur:
+            cur.execute(f"DELETE FROM expenses AS e WHERE {where};", params)
+            count = cur.rowcount
+        c.commit()
+        return count
+
+
+# ---------- меню ----------
+def _read_category(prompt: str) -> int | None | bool:
+    """ID категорії, None — Enter, False — категорію не знайдено."""
+    raw = input(prompt).strip()
+    if not raw:
+        return None
+    cat_id = int(raw) if raw.isdigit() else find_category_id_by_text(raw)
+    if cat_id is None or get_category_name(cat_id) is None:
+        print(" Категорію не знайдено.")
+        return False
+    return cat_id
+
+
+def _read_bulk_filters() -> dict | None:
+    print("Фільтр (Enter = без обмеження):")
+    filters = {
+        "date_from": read_optional_date("Дата ВІД: "),
+        "date_to": read_optional_date("Дата ДО: "),
+    }
+    cat_id = _read_category("Категорія (ID/слово): ")
+    if cat_id is False:
+        return None
+    filters["category_id"] = cat_id
+    filters["currency"] = read_optional_currency("Валюта (UAH/USD/EUR): ")
+    filters["title_like"] = input("Частина назви: ").strip() or None
+
+    filters = {k: v for k, v in filters.items() if v is not None}
+    if not filters:
+        print(" Потрібен хоча б один фільтр — змінювати всі витрати разом не можна.")
+        return None
+    return filters
+
+
+def _read_bulk_changes() -> dict | None:
+    print("\nНові значення (Enter = не змінювати):")
+    changes = {}
+    cat_id = _read_category("Нова категорія (ID/слово): ")
+    if cat_id is False:
+        return None
+    if cat_id is not None:
+        changes["category_id"] = cat_id
+    currency = read_optional_currency("Нова валюта (UAH/USD/EUR): ")
+    if currency:
+        changes["currency"] = currency
+    title = input("Нова назва: ").strip()
+    if title:
+        changes["title"] = title
+    new_date = read_optional_date("Нова дата: ")
+    if new_date:
+        changes["expense_date"] = new_date
+    desc = input("Новий опис ('-' = очистити): ").strip()
+    if desc:
+        changes["description"] = None if desc == "-" else desc
+
+    if not changes:
+        print(" Нічого не змінено.")
+        return None
+    return changes
+
+
+def _confirm(prompt: str) -> bool:
+    while True:
+        answer = input(prompt).strip().lower()
+        if answer in ("так", "ні"):
+            return answer == "так"
+        print(" Введіть саме 'так' або 'ні'.")
+
+
+def bulk_edit_expenses():
+    print("\n--- Масове редагування / видалення витрат за фільтром ---")
+    filters = _read_bulk_filters()
+    if filters is None:
+        return
+
+    try:
+        preview = preview_matching(filters)
+    except Exception as e:
+        print(" Не вдалося виконати пошук.")
+        print(e)
+        return
+
+    if not preview["count"]:
+        print("Під фільтр не підпадає жодна витрата.")
+        return
+
+    print(f"\nЗнайдено витрат: {preview['count']}")
+    for curr, total, count in preview["totals"]:
+        print(f"  {curr}: {total} ({count} шт.)")
+    print("Перші з них:")
+    for eid, dt, title, amount, curr in preview["sample"]:
+        print(f"  ID={eid} | {dt} | {title} | {amount} {curr}")
+
+    print("\n1. Змінити поля\n2. Видалити\n0. Скасувати")
+    action = input("Ваш вибір: ").strip()
+    if action not in ("1", "2"):
+        print(" Скасовано.")
+        return
+
+    changes = None
+    if action == "1":
+        changes = _read_bulk_changes()
+        if changes is None:
+            return
+
+    chunk_size = None
+    if preview["count"] > BULK_CHUNK_SIZE:
+        print(f"\nВитрат більше за {BULK_CHUNK_SIZE}. Частинами — кожна порція окремою транзакцією "
+              f"(коротші блокування, але при помилці вже виконані порції лишаться).")
+        if _confirm("Виконувати частинами? (так/ні): "):
+            chunk_size = BULK_CHUNK_SIZE
+
+    verb = "змінити" if changes else "видалити"
+    if not _confirm(f"Підтвердіть: {verb} {preview['count']} витрат (так/ні): "):
+        print(" Скасовано.")
+        return
+
+    try:
+        if changes:
+            count = bulk_update(filters, changes, chunk_size)
+        else:
+            count = bulk_delete(filters, chunk_size)
+    except Exception as e:
+        if chunk_size:
+            print(" Не вдалося виконати операцію (поточну порцію відкочено, попередні збережено).")
+        else:
+            print(" Не вдалося виконати операцію (зміни відкочено).")
+        print(e)
+        return
+
+    print(f" Готово: {'змінено' if changes else 'видалено'} витрат: {count}")
@@ -1,5 +1,18 @@
+import os
+import time
+import threading
+import statements
 from db import get_conn
 
+# SQL спільний для меню нижче та async_api.py
+INSERT_CATEGORY_SQL = "INSERT INTO categories (name) VALUES (%s) RETURNING id;"
+UPDATE_CATEGORY_SQL = "UPDATE categories SET name = %s WHERE id = %s;"
+DELETE_CATEGORY_SQL = "DELETE FROM categories WHERE id = %s;"
+SELECT_CATEGORIES_SQL = "SELECT id, name FROM categories ORDER BY id;"
+
+# get_category_name зазвичай відповідає з кешу; до БД іде лише звірка версії — її готуємо один раз на з'єднання
+CACHE_VERSION = statements.register("cache_version", "SELECT version FROM cache_versions WHERE name = %s;")
+
 
 def add_category():
     name = input("Введіть назву категорії: ").strip()
@@ -11,7 +24,8 @@ def add_category():
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute("INSERT INTO categories (name) VALUES (%s);", (name,))
+            cur.execute(INSERT_CATEGORY_SQL, (name,))
+        invalidate_category_cache()
         print(" Категорію додано")
     except Exception as e:
         print(" Не вдалося додати категорію (можливо, така вже існує)")
@@ -20,52 +34,115 @@ def add_category():
         conn.close()
 
 
-def list_categories() -> list[tuple[int, str]]:
+# ---------- кеш категорій ----------
+# Категорій мало і змінюються вони рідко, тож тримаємо їх у пам'яті.
+# Свої зміни скидають кеш одразу; зміни з інших процесів помічаємо за лічильником
+# cache_versions (не частіше ніж раз на CATEGORY_CACHE_TTL секунд).
+CATEGORY_CACHE_TTL = float(os.getenv("CATEGORY_CACHE_TTL", "5"))
+
+# _cache_lock тримаємо лише на звірку й заміну словників: запити до БД — без нього, бо get_conn()
+# може чекати на вільне з'єднання, а invalidate_category_cache викликають і з циклу подій async_api
+_cache_lock = threading.Lock()
+_cache = {
+    "version": None,       # версія з cache_versions на момент завантаження
+    "checked_at": 0.0,     # коли востаннє звіряли версію
+    "generation": 0,       # +1 на кожне скидання: завантаження, що почалось раніше, не вважається свіжим
+    "by_id": {},           # id -> name
+    "by_name": {},         # lower(name) -> id
+    "by_word": {},         # слово з назви (lower) -> [id, ...]
+}
+
+
+def invalidate_category_cache():
+    with _cache_lock:
+        _cache["version"] = None
+        _cache["generation"] += 1
+
+
+def _load_categories(force_check: bool = False) -> dict[int, str]:
+    with _cache_lock:
+        now = time.monotonic()
+        if (_cache["version"] is not None and not force_check
+                and now - _cache["checked_at"] < CATEGORY_CACHE_TTL):
+            return _cache["by_id"]
+        cached_version, generation = _cache["version"], _cache["generation"]
+
+    loaded = None
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT id, name FROM categories ORDER BY id;")
-            rows = cur.fetchall()
-
-        if not rows:
-            print("Поки немає жодної категорії.")
-            return []
-
-        print("\nКатегорії:")
-        for cid, name in rows:
-            print(f"{cid}. {name}")
-        print()
-        return rows
+            statements.execute(cur, CACHE_VERSION, ("categories",))
+            row = cur.fetchone()
+            version = row[0] if row else 0
+
+            if version != cached_version:
+                cur.execute(SELECT_CATEGORIES_SQL)
+                by_id = dict(cur.fetchall())
+                by_word: dict[str, list[int]] = {}
+                for cid, name in by_id.items():
+                    for word in name.lower().split():
+                        by_word.setdefault(word, []).append(cid)
+                loaded = {
+                    "by_id": by_id,
+                    "by_name": {name.lower(): cid for cid, name in reversed(by_id.items())},
+                    "by_word": by_word,
+                }
     finally:
         conn.close()
 
+    with _cache_lock:
+        # друга перевірка: інший потік міг тим часом звірити версію пізніше за нас
+        if _cache["checked_at"] > now:
+            return _cache["by_id"]
+        if loaded is not None:
+            _cache.update(loaded)
+        elif version != _cache["version"]:
+            # без перезавантаження ми лише підтвердили cached_version, а кеш тим часом скинули
+            return _cache["by_id"]
+        if _cache["generation"] == generation:
+            _cache["version"] = version
+            _cache["checked_at"] = now
+        return _cache["by_id"]
+
+
+def list_categories() -> list[tuple[int, str]]:
+    rows = list(_load_categories().items())
+
+    if not rows:
+        print("Поки немає жодної категорії.")
+        return []
+
+    print("\nКатегорії:")
+    for cid, name in rows:
+        print(f"{cid}. {name}")
+    print()
+    return rows
+
 
 def get_category_name(cat_id: int) -> str | None:
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT name FROM categories WHERE id = %s;", (cat_id,))
-            row = cur.fetchone()
-            return row[0] if row else None
-    finally:
-        conn.close()
+    name = _load_categories().get(cat_id)
+    if name is None:
+        # можливо, категорію щойно додав інший процес
+        name = _load_categories(force_check=True).get(cat_id)
+    return name
 
 
 def find_category_id_by_text(text: str) -> int | None:
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id
-                FROM categories
-                WHERE LOWER(name) LIKE LOWER(%s)
-                ORDER BY id
-                LIMIT 1;
-            """, (f"%{text}%",))
-            row = cur.fetchone()
-            return row[0] if row else None
-    finally:
-        conn.close()
+    """Точна назва -> ціле слово з назви -> підрядок (серед кількох — з меншим id)."""
+    text = text.strip().lower()
+    if not text:
+        return None
+
+    by_id = _load_categories()
+    with _cache_lock:
+        if text in _cache["by_name"]:
+            return _cache["by_name"][text]
+        if text in _cache["by_word"]:
+            return _cache["by_word"][text][0]
+    for cid, name in by_id.items():
+        if text in name.lower():
+            return cid
+    return None
 
 
 def update_category():
@@ -87,10 +164,11 @@ def update_category():
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute("UPDATE categories SET name = %s WHERE id = %s;", (new_name, cid))
+            cur.execute(UPDATE_CATEGORY_SQL, (new_name, cid))
             if cur.rowcount == 0:
                 print(" Категорію з таким ID не знайдено")
             else:
+                invalidate_category_cache()
                 print(" Категорію оновлено")
     except Exception as e:
         print(" Не вдалося оновити категорію (можливо, така назва вже існує)")
@@ -111,10 +189,11 @@ def delete_category():
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute("DELETE FROM categories WHERE id = %s;", (cid,))
+            cur.execute(DELETE_CATEGORY_SQL, (cid,))
             if cur.rowcount == 0:
                 print(" Категорію з таким ID не знайдено")
             else:
+                invalidate_category_cache()
                 print(" Категорію видалено")
     except Exception as e:
         print(" Не вдалося видалити категорію (можливо, вона вже використовується у витратах)")
@@ -0,0 +1,394 @@
+# cli.py
+"""
+Неінтерактивний режим: звіти й експорт з командного рядка (для cron, скриптів, пайплайнів).
+
+    python cli.py sum-by-category --from 2026-01-01 --to 31.01.2026 --format csv
+    python cli.py export-csv --from 2026-01-01 --to 2026-12-31
+    python cli.py export --from 2026-01-01 --to 2026-12-31 --format parquet
+    python cli.py export-changes --from 2020-01-01 --to 2026-12-31   # лише зміни з минулого запуску
+    python cli.py pack --from 2026-01-01 --to 2026-01-31
+    python cli.py batch jobs.txt
+    python cli.py --analytics batch jobs.txt     # звіти над знімком у пам'яті (analytics.py)
+
+У batch-файлі — по одній команді на рядок (як аргументи cli.py, порожні рядки і # ігноруються).
+Усі завдання виконуються в одному процесі через одне з'єднання; init_db() — один раз.
+"""
+import time
+
+_started = time.perf_counter()
+
+import io
+import sys
+import csv
+import json
+import shlex
+import argparse
+from datetime import date
+from decimal import Decimal
+
+from utils import ALLOWED_CURRENCIES, parse_date
+
+FORMATS = ("table", "csv", "json", "ndjson")
+
+
+def _date_arg(value: str) -> str:
+    parsed = parse_date(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"невірна дата '{value}' (YYYY-MM-DD або DD.MM.YYYY)")
+    return parsed
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+# ---------- форматування результату ----------
+def render(columns: list[str], rows: list[tuple], fmt: str, out) -> None:
+    if fmt == "csv":
+        writer = csv.writer(out, delimiter=";")
+        writer.writerow(columns)
+        writer.writerows(rows)
+    elif fmt == "json":
+        data = [{c: _json_value(v) for c, v in zip(columns, row)} for row in rows]
+        json.dump(data, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+    elif fmt == "ndjson":
+        for row in rows:
+            out.write(json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, ensure_ascii=False))
+            out.write("\n")
+    else:
+        cells = [[("" if v is None else str(v)) for v in row] for row in rows]
+        widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+        out.write(" | ".join(c.ljust(w) for c, w in zip(columns, widths)).rstrip() + "\n")
+        out.write("-+-".join("-" * w for w in widths) + "\n")
+        for r in cells:
+            out.write(" | ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip() + "\n")
+
+
+# ---------- аргументи ----------
+def build_parser() -> argparse.ArgumentParser:
+    # лише назви й типові значення: reports.py (база, рушій звітів) імпортують обробники
+    from report_registry import (REPORT_PARAMS, MONTHLY_PACK, EXPORT_DIR, EXPORT_FORMATS, SEARCH_PAGE_SIZE,
+                                 BASE_CURRENCY)
+
+    parser = argparse.ArgumentParser(prog="cli.py", description="Звіти та експорт витрат без меню")
+    parser.add_argument("--timing", action="store_true",
+                        help="вивести в stderr час старту (імпорти, init_db) і виконання команди")
+    parser.add_argument("--analytics", action="store_true",
+                        help="виконувати звіти над знімком витрат у пам'яті (потрібен numpy), див. analytics.py")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, params in REPORT_PARAMS.items():
+        p = sub.add_parser(name, help=f"звіт {name}")
+        if "date_from" in params:
+            p.add_argument("--from", dest="date_from", type=_date_arg, required=True)
+            p.add_argument("--to", dest="date_to", type=_date_arg, required=True)
+        if "text" in params:
+            p.add_argument("--text", required=True, help="назва витрати або її частина")
+            p.add_argument("--limit", type=int, default=SEARCH_PAGE_SIZE)
+            p.add_argument("--offset", type=int, default=0)
+        if "category_id" in params:
+            p.add_argument("--category-id", dest="category_id", type=int, required=True)
+        if "base" in params:
+            p.add_argument("--base", choices=sorted(ALLOWED_CURRENCIES), default=BASE_CURRENCY,
+                           help="валюта, в яку перераховуються суми")
+        p.add_argument("--format", choices=FORMATS, default="table")
+        p.add_argument("--output", help="записати у файл замість stdout")
+
+    p = sub.add_parser("pack", help="кілька звітів за період одночасно (типово — місячний пакет)")
+    p.add_argument("--from", dest="date_from", type=_date_arg, required=True)
+    p.add_argument("--to", dest="date_to", type=_date_arg, required=True)
+    p.add_argument("--reports", help="назви звітів через кому (типово: " + ",".join(MONTHLY_PACK) + ")")
+    p.add_argument("--base", choices=sorted(ALLOWED_CURRENCIES), default=BASE_CURRENCY)
+    p.add_argument("--workers", type=int, help="скільки звітів виконувати одночасно (типово REPORT_PACK_WORKERS)")
+    p.add_argument("--format", choices=FORMATS, default="table")
+    p.add_argument("--output", help="записати у файл замість stdout")
+
+    p = sub.add_parser("export-csv", help="експорт витрат за період у CSV (як пункт меню)")
+    p.add_argument("--from", dest="date_from", type=_date_arg, required=True)
+    p.add_argument("--to", dest="date_to", type=_date_arg, required=True)
+    p.add_argument("--output", help="шлях до файлу (типово export/expenses_<від>_to_<до>.csv)")
+
+    p = sub.add_parser("export", help="експорт витрат за період у CSV, Parquet або Arrow IPC")
+    p.add_argument("--from", dest="date_from", type=_date_arg, required=True)
+    p.add_argument("--to", dest="date_to", type=_date_arg, required=True)
+    p.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    p.add_argument("--output", help="шлях до файлу (типово export/expenses_<від>_to_<до>.<формат>)")
+
+    p = sub.add_parser("export-changes",
+                       help="інкрементальний експорт за період у CSV: лише зміни з минулого запуску")
+    p.add_argument("--from", dest="date_from", type=_date_arg, required=True)
+    p.add_argument("--to", dest="date_to", type=_date_arg, required=True)
+    p.add_argument("--dir", default=EXPORT_DIR, help="каталог потоків експорту (типово export)")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--full", action="store_true", help="повний знімок замість дельти")
+    mode.add_argument("--compact", action="store_true", help="злити дельти в повний знімок (без запитів до бази)")
+    mode.add_argument("--drop", action="store_true",
+                      help="забути потік: журнал змін для нього більше не зберігається (файли лишаються)")
+
+    for name, help_text in (("bulk-update", "змінити поля всіх витрат за фільтром"),
+                            ("bulk-delete", "видалити всі витрати за фільтром")):
+        p = sub.add_parser(name, help=help_text + " (без --yes — лише сухий прогін)")
+        p.add_argument("--from", dest="date_from", type=_date_arg)
+        p.add_argument("--to", dest="date_to", type=_date_arg)
+        p.add_argument("--category-id", dest="category_id", type=int)
+        p.add_argument("--currency", choices=sorted(ALLOWED_CURRENCIES))
+        p.add_argument("--title", dest="title_like", help="частина назви (як у filter-by-title)")
+        if name == "bulk-update":
+            p.add_argument("--set-category-id", dest="set_category_id", type=int)
+            p.add_argument("--set-currency", dest="set_currency", choices=sorted(ALLOWED_CURRENCIES))
+            p.add_argument("--set-title", dest="set_title")
+            p.add_argument("--set-date", dest="set_expense_date", type=_date_arg)
+            p.add_argument("--set-description", dest="set_description", help="'' — очистити")
+        p.add_argument("--chunk-size", type=int, help="виконувати порціями по N (кожна — окрема транзакція)")
+        p.add_argument("--yes", action="store_true", help="виконати зміни (без нього лише показати, скільки зачепить)")
+
+    p = sub.add_parser("load-rates", help="завантажити курси валют з CSV (date;currency;rate)")
+    p.add_argument("path")
+
+    p = sub.add_parser("batch", help="виконати завдання з файлу (по одному на рядок) в одному процесі")
+    p.add_argument("jobs", help="файл із завданнями або '-' для stdin")
+    return parser
+
+
+# ---------- виконання ----------
+def run_command(args: argparse.Namespace, conn, out) -> int:
+    from reports import REPORTS, EXPORT_DIR, write_period_export
+
+    date_from = getattr(args, "date_from", None)
+    date_to = getattr(args, "date_to", None)
+    if date_from and date_to and date_from > date_to:
+        print("Дата --from більша за --to, міняю місцями.", file=sys.stderr)
+        args.date_from, args.date_to = date_to, date_from
+
+    if args.command == "load-rates":
+        from rates import load_rates_csv
+
+        result = load_rates_csv(args.path)
+        for line_no, reason in result["rejected"]:
+            print(f"рядок {line_no}: {reason}", file=sys.stderr)
+        print(f"loaded\t{result['loaded']}", file=out)
+        return 1 if result["rejected"] else 0
+
+    if args.command in ("bulk-update", "bulk-delete"):
+        return run_bulk(args, conn, out)
+
+    if args.command == "pack":
+        return run_pack(args, out)
+
+    if args.command == "export-changes":
+        return run_export_changes(args, conn, out)
+
+    if args.command in ("export", "export-csv"):
+        fmt = getattr(args, "format", "csv")
+        filename = args.output or f"{EXPORT_DIR}/expenses_{args.date_from}_to_{args.date_to}.{fmt}"
+        count = write_period_export(args.date_from, args.date_to, filename, fmt, conn)
+        if not count:
+            print("За цей період витрат немає — експортувати нічого.", file=sys.stderr)
+            return 0
+        print(f"{filename}\t{count}", file=out)
+        return 0
+
+    fn, params, columns = REPORTS[args.command]
+    rows = fn(*(getattr(args, p) for p in params), conn=conn)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            render(columns, rows, args.format, f)
+    else:
+        render(columns, rows, args.format, out)
+    return 0
+
+
+def run_bulk(args: argparse.Namespace, conn, out) -> int:
+    from bulk import preview_matching, bulk_update, bulk_delete
+
+    filters = {k: getattr(args, k) for k in ("date_from", "date_to", "category_id", "currency", "title_like")
+               if getattr(args, k) is not None}
+    changes = {}
+    if args.command == "bulk-update":
+        changes = {k[4:]: v for k, v in vars(args).items() if k.startswith("set_") and v is not None}
+        if "description" in changes and changes["description"] == "":
+            changes["description"] = None
+        if not changes:
+            print("bulk-update: вкажіть хоча б одне --set-...", file=sys.stderr)
+            return 2
+
+    try:
+        preview = preview_matching(filters, conn=conn)
+    except ValueError as e:
+        print(f"{args.command}: {e}", file=sys.stderr)
+        return 2
+    if not args.yes:
+        render(["currency", "total_amount", "expenses_count"], preview["totals"], "table", out)
+        print(f"dry-run: зачепить {preview['count']} витрат; для виконання додайте --yes", file=sys.stderr)
+        return 0
+
+    if args.command == "bulk-update":
+        count = bulk_update(filters, changes, args.chunk_size, conn)
+    else:
+        count = bulk_delete(filters, args.chunk_size, conn)
+    print(f"{'updated' if changes else 'deleted'}\t{count}", file=out)
+    return 0
+
+
+def run_export_changes(args: argparse.Namespace, conn, out) -> int:
+    from incremental_export import export_changes, compact_changes, drop_stream
+
+    if args.drop:
+        if not drop_stream(args.date_from, args.date_to, args.dir, conn):
+            print("export-changes: такого потоку немає", file=sys.stderr)
+            return 2
+        print("Потік забуто.", file=sys.stderr)
+        return 0
+
+    if args.compact:
+        try:
+            result = compact_changes(args.date_from, args.date_to, args.dir)
+        except ValueError as e:
+            print(f"export-changes: {e}", file=sys.stderr)
+            return 2
+        if result["rows"] is None:
+            print("Дельт немає — знімок актуальний.", file=sys.stderr)
+        else:
+            print(f"{result['file']}\t{result['rows']}", file=out)
+        return 0
+
+    result = export_changes(args.date_from, args.date_to, args.dir, args.full, conn)
+    if result["file"] is None:
+        print("Змін з минулого експорту немає.", file=sys.stderr)
+        return 0
+    print(f"{result['file']}\t{result['rows']}", file=out)
+    return 0
+
+
+def render_pack(results: list[dict], fmt: str, out) -> None:
+    """Звіти пакета по черзі; json — один об'єкт {звіт: {ms, error, rows}}, ndjson — рядки з полем report."""
+    if fmt == "json":
+        data = {
+            r["name"]: {
+                "ms": round(r["ms"], 1),
+                "error": r["error"],
+                "rows": [{c: _json_value(v) for c, v in zip(r["columns"], row)} for row in r["rows"]],
+            }
+            for r in results
+        }
+        json.dump(data, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+        return
+    for i, r in enumerate(results):
+        if fmt == "ndjson":
+            for row in r["rows"]:
+                item = {"report": r["name"], **{c: _json_value(v) for c, v in zip(r["columns"], row)}}
+                out.write(json.dumps(item, ensure_ascii=False))
+                out.write("\n")
+            continue
+        if i:
+            out.write("\n")
+        out.write(f"# {r['name']}\n")
+        render(r["columns"], r["rows"], fmt, out)
+
+
+def run_pack(args: argparse.Namespace, out) -> int:
+    from reports import REPORTS, MONTHLY_PACK, run_report_pack
+
+    names = [n.strip() for n in args.reports.split(",") if n.strip()] if args.reports else list(MONTHLY_PACK)
+    for name in names:
+        if name not in REPORTS or not set(REPORTS[name][1]) <= {"date_from", "date_to", "base"}:
+            print(f"pack: звіт '{name}' не можна виконати в пакеті за період", file=sys.stderr)
+            return 2
+
+    started = time.perf_counter()
+    results = run_report_pack(names, vars(args), args.workers)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            render_pack(results, args.format, f)
+    else:
+        render_pack(results, args.format, out)
+
+    for r in results:
+        status = f"помилка: {r['error']}" if r["error"] else f"{len(r['rows'])} рядків"
+        print(f"pack: {r['name']} {r['ms']:.1f} мс ({status})", file=sys.stderr)
+    print(f"pack: загалом {wall_ms:.1f} мс, сума окремих {sum(r['ms'] for r in results):.1f} мс", file=sys.stderr)
+    return 1 if any(r["error"] for r in results) else 0
+
+
+def run_batch(lines, parser: argparse.ArgumentParser, conn, out) -> int:
+    failed = 0
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            args = parser.parse_args(shlex.split(line))
+            if args.command == "batch":
+                raise ValueError("вкладений batch не підтримується")
+            if run_command(args, conn, out):
+                failed += 1
+            conn.commit()
+        except BrokenPipeError:
+            raise
+        except SystemExit:
+            failed += 1
+            print(f"batch: рядок {line_no}: невірні аргументи: {line}", file=sys.stderr)
+        except Exception as e:
+            conn.rollback()
+            failed += 1
+            print(f"batch: рядок {line_no}: {e}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from db import get_conn, init_db
+
+    init_db()
+    if args.analytics:
+        from reports import set_analytics_mode
+
+        set_analytics_mode(True)
+    conn = get_conn()
+    ready = time.perf_counter()
+    try:
+        if args.command == "batch":
+            if args.jobs == "-":
+                return run_batch(sys.stdin, parser, conn, sys.stdout)
+            with open(args.jobs, encoding="utf-8") as f:
+                return run_batch(io.StringIO(f.read()), parser, conn, sys.stdout)
+        return run_command(args, conn, sys.stdout)
+    finally:
+        conn.close()
+        if args.timing:
+            done = time.perf_counter()
+            print(f"timing: старт {(ready - _started) * 1000:.1f} мс, "
+                  f"команда {(done - ready) * 1000:.1f} мс", file=sys.stderr)
+            from statements import stats
+
+            for name, s in stats().items():
+                if s["calls"]:
+                    print(f"timing: {name} — {s['calls']} викл., сер. {s['avg_ms']:.3f} мс, "
+                          f"підготовка {s['prepares']} раз(и) {s['prepare_ms']:.1f} мс", file=sys.stderr)
+            from reports import analytics_enabled, analytics_snapshot
+
+            if analytics_enabled():
+                info = analytics_snapshot().info()
+                print(f"timing: знімок аналітики — {info['rows']} витрат, {info['bytes'] / 1024 / 1024:.1f} МБ, "
+                      f"завантаження {info['load_ms']:.1f} мс (повних {info['full_loads']}, "
+                      f"дочитувань {info['incremental_loads']})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # вивід обрізали (наприклад, | head) — це не помилка
+        sys.stderr.close()
+        sys.exit(0)
@@ -1,11 +1,59 @@
 import os
-import psycopg2
-from dotenv import load_dotenv
+import time
+import atexit
+import threading
+from contextlib import contextmanager
 
-load_dotenv()
+import query_log
 
+# psycopg2 і python-dotenv імпортуються лише там, де потрібні: старт програми не платить за них,
+# поки не знадобиться з'єднання (а dotenv — поки немає .env).
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_env():
+    if os.path.exists(os.path.join(_BASE_DIR, ".env")) or os.path.exists(".env"):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+
+_load_env()
+
+# postgres (типово) або sqlite — вбудована БД у файлі, без сервера (див. sqlite_backend.py)
+DB_BACKEND = os.getenv("DB_BACKEND", "postgres").strip().lower()
+if DB_BACKEND not in ("postgres", "sqlite"):
+    raise RuntimeError(f"Невідомий DB_BACKEND: {DB_BACKEND} (можна postgres або sqlite)")
+
+# статуси транзакції з'єднання: значення psycopg2.extensions.TRANSACTION_STATUS_* (їх же повертає sqlite_backend)
+_STATUS_IDLE = 0
+_STATUS_UNKNOWN = 4
+
+
+def _driver_error():
+    """Базовий клас помилок драйвера поточного бекенду."""
+    if DB_BACKEND == "sqlite":
+        import sqlite3
+        return sqlite3.Error
+    import psycopg2
+    return psycopg2.Error
+
+
+def _closed_error() -> Exception:
+    """Помилка драйвера про закрите з'єднання — та сама, що дав би сам драйвер."""
+    if DB_BACKEND == "sqlite":
+        import sqlite3
+        return sqlite3.ProgrammingError("Cannot operate on a closed database.")
+    import psycopg2
+    return psycopg2.InterfaceError("connection already closed")
+
+
+def _connect():
+    if DB_BACKEND == "sqlite":
+        import sqlite_backend
+        return sqlite_backend.connect()
+
+    import psycopg2
 
-def get_conn():
     host = os.getenv("DB_HOST", "localhost")
     port = int(os.getenv("DB_PORT", "5432"))
     dbname = os.getenv("DB_NAME", "expense_exam")
@@ -20,32 +68,315 @@ def get_conn():
         port=port,
         dbname=dbname,
         user=user,
-        password=password
+        password=password,
+        cursor_factory=query_log.cursor_factory() if query_log.SQL_LOG else None,
+    )
+
+
+# ---------- пул з'єднань ----------
+class ConnectionPool:
+    """
+    Пул з'єднань на весь процес.
+    Якщо всі з'єднання зайняті — чекаємо, доки якесь повернуть (не довше за timeout).
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float, healthcheck_idle: float):
+        self.minconn = max(0, minconn)
+        self.maxconn = max(1, maxconn, self.minconn)
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+
+        self._cond = threading.Condition()
+        self._idle: list[tuple[object, float]] = []  # (з'єднання, час повернення в пул)
+        self._opened = 0
+        self._closed = False
+        self.stats = {"checkouts": 0, "waits": 0, "reconnects": 0, "opened": 0}
+
+        for _ in range(self.minconn):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def _open(self):
+        conn = _connect()
+        self._opened += 1
+        self.stats["opened"] += 1
+        return conn
+
+    def _is_alive(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() == _STATUS_UNKNOWN:
+            return False
+        # SELECT 1 лише для з'єднань, що довго простоювали — інакше це зайвий round trip
+        if time.monotonic() - idle_since < self.healthcheck_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except _driver_error():
+            return False
+
+    def getconn(self):
+        started = time.perf_counter()
+        conn = self._checkout()
+        # час видачі (очікування вільного з'єднання, перевірка, перепідключення) — для журналу SQL
+        query_log.note_checkout(conn, (time.perf_counter() - started) * 1000)
+        return conn
+
+    def _checkout(self):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Пул з'єднань уже закрито")
+
+            waited = False
+            deadline = time.monotonic() + self.timeout
+            while not self._idle and self._opened >= self.maxconn:
+                waited = True
+                left = deadline - time.monotonic()
+                if left <= 0 or not self._cond.wait(left):
+                    if not self._idle and self._opened >= self.maxconn:
+                        raise RuntimeError(
+                            f"Немає вільних з'єднань у пулі (DB_POOL_MAX={self.maxconn})"
+                        )
+            if waited:
+                self.stats["waits"] += 1
+            self.stats["checkouts"] += 1
+
+            if self._idle:
+                conn, idle_since = self._idle.pop()
+            else:
+                conn, idle_since = None, 0.0
+                self._opened += 1  # резервуємо місце, поки відкриваємо з'єднання
+
+        if conn is None:
+            try:
+                conn = _connect()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.stats["opened"] += 1
+            return conn
+
+        if not self._is_alive(conn, idle_since):
+            try:
+                conn.close()
+            except _driver_error():
+                pass
+            try:
+                conn = _connect()
+            except Exception:
+                with self._cond:
+                    self._opened -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.stats["reconnects"] += 1
+        return conn
+
+    def putconn(self, conn):
+        keep = not conn.closed
+        if keep:
+            try:
+                if conn.get_transaction_status() != _STATUS_IDLE:
+                    conn.rollback()
+                conn.autocommit = False
+            except _driver_error():
+                keep = False
+
+        with self._cond:
+            if keep and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._opened -= 1
+                if not conn.closed:
+                    conn.close()
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                if not conn.closed:
+                    conn.close()
+            self._opened -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+class PooledConnection:
+    """
+    Обгортка над з'єднанням з пулу.
+    close() повертає з'єднання в пул, тож старий код `conn = get_conn() ... conn.close()` працює як раніше.
+    Також можна: `with get_conn() as conn:` — commit/rollback і повернення в пул автоматично.
+    """
+
+    def __init__(self, pool: ConnectionPool, raw):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_raw", raw)
+
+    def _open_raw(self):
+        # після close() з'єднання вже в пулі (можливо, в іншого потоку) — як із закритим з'єднанням драйвера
+        raw = object.__getattribute__(self, "_raw")
+        if raw is None:
+            raise _closed_error()
+        return raw
+
+    def __getattr__(self, name):
+        return getattr(self._open_raw(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._open_raw(), name, value)
+
+    @property
+    def closed(self) -> bool:
+        return self._raw is None or bool(self._raw.closed)
+
+    def close(self):
+        raw = self._raw
+        if raw is not None:
+            object.__setattr__(self, "_raw", None)
+            self._pool.putconn(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        raw = self._raw
+        if raw is not None and not raw.closed and not raw.autocommit:
+            if exc_type is None:
+                raw.commit()
+            else:
+                raw.rollback()
+        self.close()
+        return False
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+                    maxconn=int(os.getenv("DB_POOL_MAX", "5")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+                    healthcheck_idle=float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30")),
+                )
+    return _pool
+
+
+def get_conn() -> PooledConnection:
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+@contextmanager
+def use_conn(conn=None):
+    """Використати передане з'єднання або тимчасово взяти з пулу (і повернути після блоку)."""
+    if conn is not None:
+        yield conn
+        return
+    with get_conn() as pooled:
+        yield pooled
+
+
+def pool_stats() -> dict:
+    """Лічильники пулу: checkouts, waits, reconnects, opened."""
+    if _pool is None:
+        return {"checkouts": 0, "waits": 0, "reconnects": 0, "opened": 0}
+    return dict(_pool.stats)
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+atexit.register(close_pool)
+
+
+_extensions: dict[str, bool] = {}
+
+
+def has_extension(name: str) -> bool:
+    """Чи встановлено розширення PostgreSQL у поточній БД (кешується на процес). У SQLite розширень немає."""
+    if DB_BACKEND != "postgres":
+        return False
+    if name not in _extensions:
+        conn = get_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1 FROM pg_extension WHERE extname = %s;", (name,))
+                _extensions[name] = cur.fetchone() is not None
+        finally:
+            conn.close()
+    return _extensions[name]
+
+
+# ---------- позначка "схему перевірено" ----------
+# Після успішної перевірки міграцій у файл записується "<сервер/база> <версія>".
+# Поки версія в коді не змінилась, init_db() навіть не відкриває з'єднання.
+# Якщо базу перестворили — видаліть файл (або SCHEMA_STAMP_FILE=""), і перевірка пройде знову.
+SCHEMA_STAMP_FILE = os.getenv("SCHEMA_STAMP_FILE", os.path.join(_BASE_DIR, ".schema_stamp"))
+
+
+def _schema_key() -> str:
+    if DB_BACKEND == "sqlite":
+        import sqlite_backend
+        # файлу бази ще немає (або його видалили) — позначка не повинна пропустити створення схеми
+        if not os.path.exists(sqlite_backend.DB_SQLITE_PATH):
+            return ""
+        return "sqlite:" + os.path.abspath(sqlite_backend.DB_SQLITE_PATH)
+    return "{}:{}/{}".format(
+        os.getenv("DB_HOST", "localhost"), os.getenv("DB_PORT", "5432"), os.getenv("DB_NAME", "expense_exam")
     )
 
 
-def init_db():
+def _read_stamps() -> dict[str, str]:
+    try:
+        with open(SCHEMA_STAMP_FILE, encoding="utf-8") as f:
+            return dict(line.rsplit(" ", 1) for line in f.read().splitlines() if " " in line)
+    except OSError:
+        return {}
+
+
+def _write_stamp(version: int):
+    stamps = _read_stamps()
+    stamps[_schema_key()] = str(version)
+    tmp = SCHEMA_STAMP_FILE + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{key} {ver}\n" for key, ver in stamps.items())
+        os.replace(tmp, SCHEMA_STAMP_FILE)
+    except OSError:
+        pass  # без позначки просто перевіримо схему наступного разу
+
+
+def init_db(force: bool = False):
+    """
+    Доводить схему до останньої версії (див. migrations.py). Якщо все застосовано — жодного DDL.
+    Якщо позначка вже підтверджує поточну версію — повертається одразу, без з'єднання з БД.
+    """
+    from migrations import LATEST_VERSION, migrate
+
+    if not force and SCHEMA_STAMP_FILE and _read_stamps().get(_schema_key()) == str(LATEST_VERSION):
+        return
+
     conn = get_conn()
-    conn.autocommit = True
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS categories (
-                    id SERIAL PRIMARY KEY,
-                    name TEXT NOT NULL UNIQUE
-                );
-            """)
-
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS expenses (
-                    id SERIAL PRIMARY KEY,
-                    title TEXT NOT NULL,
-                    amount NUMERIC(12, 2) NOT NULL CHECK (amount > 0),
-                    expense_date DATE NOT NULL,
-                    category_id INT NOT NULL REFERENCES categories(id) ON DELETE RESTRICT,
-                    description TEXT,
-                    currency VARCHAR(10) DEFAULT 'UAH'
-                );
-            """)
+        migrate(conn)
     finally:
         conn.close()
+    if SCHEMA_STAMP_FILE:
+        _write_stamp(LATEST_VERSION)
@@ -1,4 +1,10 @@
+import os
+from decimal import Decimal
+import statements
 from db import get_conn
+from importer import import_expenses_from_csv
+from bulk import bulk_edit_expenses
+from rates import BASE_CURRENCY, convert
 from categories import list_categories, get_category_name, find_category_id_by_text
 from utils import (
     read_amount, read_date, read_currency,
@@ -25,10 +31,41 @@ def read_category_id_or_keyword() -> tuple[int, str] | None:
     return cat_id, name
 
 
+# SQL спільний для меню нижче та async_api.py
+INSERT_EXPENSE_SQL = """
+    INSERT INTO expenses (title, amount, expense_date, category_id, description, currency)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id;
+"""
+SELECT_EXPENSE_SQL = """
+    SELECT e.id, e.title, e.expense_date, c.name, e.amount, e.currency, e.description
+    FROM expenses e
+    JOIN categories c ON c.id = e.category_id
+    WHERE e.id = %s;
+"""
+UPDATE_EXPENSE_SQL = """
+    UPDATE expenses
+    SET title=%s, expense_date=%s, category_id=%s, amount=%s, currency=%s, description=%s
+    WHERE id=%s;
+"""
+DELETE_EXPENSE_SQL = "DELETE FROM expenses WHERE id = %s;"
+SELECT_EXPENSE_FIELDS_SQL = """
+    SELECT id, title, expense_date, category_id, amount, currency, description
+    FROM expenses
+    WHERE id = %s;
+"""
+
+# запити за id виконуються дуже часто — готуємо їх один раз на з'єднання (statements.py)
+EXPENSE_BY_ID = statements.register("expense_by_id", SELECT_EXPENSE_SQL)
+EXPENSE_FIELDS_BY_ID = statements.register("expense_fields_by_id", SELECT_EXPENSE_FIELDS_SQL)
+EXPENSE_UPDATE = statements.register("expense_update", UPDATE_EXPENSE_SQL)
+EXPENSE_DELETE = statements.register("expense_delete", DELETE_EXPENSE_SQL)
+
+
 def add_expense():
     print("\n--- Додавання витрати ---")
 
-    amount = read_amount("Сума: ")
+    amount = Decimal(str(read_amount("Сума: ")))
     expense_date = read_date("Дата (YYYY-MM-DD або DD.MM.YYYY): ")
     currency = read_currency()
 
@@ -51,41 +88,161 @@ def add_expense():
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO expenses (title, amount, expense_date, category_id, description, currency)
-                VALUES (%s, %s, %s, %s, %s, %s);
-            """, (title, amount, expense_date, cat_id, description, currency))
+            cur.execute(INSERT_EXPENSE_SQL, (title, amount, expense_date, cat_id, description, currency))
         print(" Витрату додано")
     except Exception as e:
         print(" Не вдалося додати витрату")
         print(e)
+        return
     finally:
         conn.close()
 
+    if currency != BASE_CURRENCY:
+        converted = convert(amount, currency, expense_date)
+        if converted is not None:
+            print(f" ≈ {converted} {BASE_CURRENCY} за курсом на {expense_date}")
+
+
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "20"))
+
+
+def expenses_page_query(filters: dict, limit: int,
+                        after: tuple | None = None, before: tuple | None = None) -> tuple[str, list, bool]:
+    """(SQL, параметри, чи перевернути результат) для fetch_expenses_page і async-версії."""
+    where = []
+    params: list = []
+    if filters.get("category_id") is not None:
+        where.append("e.category_id = %s")
+        params.append(filters["category_id"])
+    if filters.get("currency"):
+        where.append("e.currency = %s")
+        params.append(filters["currency"])
+    if filters.get("date_from"):
+        where.append("e.expense_date >= %s")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        where.append("e.expense_date <= %s")
+        params.append(filters["date_to"])
+
+    order = "DESC"
+    if after is not None:
+        where.append("(e.expense_date, e.id) < (%s, %s)")
+        params.extend(after)
+    elif before is not None:
+        where.append("(e.expense_date, e.id) > (%s, %s)")
+        params.extend(before)
+        order = "ASC"
+
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    params.append(limit)
+
+    sql = f"""
+        SELECT e.id, e.expense_date, e.title, e.amount, e.currency, c.name, COALESCE(e.description, '')
+        FROM expenses e
+        JOIN categories c ON c.id = e.category_id
+        {where_sql}
+        ORDER BY e.expense_date {order}, e.id {order}
+        LIMIT %s;
+    """
+    return sql, params, order == "ASC"
+
+
+def fetch_expenses_page(filters: dict, limit: int,
+                        after: tuple | None = None, before: tuple | None = None) -> list[tuple]:
+    """
+    Одна сторінка витрат (новіші спочатку) з keyset-пагінацією по (expense_date, id).
+    after  — ключ останнього рядка поточної сторінки: повертає наступну (старіші записи);
+    before — ключ першого рядка поточної сторінки: повертає попередню (новіші записи).
+    filters: category_id, currency, date_from, date_to (усі необов'язкові).
+    Запит іде по індексу (expense_date, id), тож вартість не залежить від розміру таблиці.
+    """
+    sql, params, reverse = expenses_page_query(filters, limit, after, before)
 
-def list_expenses():
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT e.id, e.expense_date, e.title, e.amount, e.currency, c.name, COALESCE(e.description, '')
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                ORDER BY e.expense_date DESC, e.id DESC;
-            """)
+            cur.execute(sql, params)
             rows = cur.fetchall()
+    finally:
+        conn.close()
+
+    if reverse:
+        rows.reverse()
+    return rows
+
+
+def _read_list_filters() -> dict | None:
+    filters = {}
+    if input("Застосувати фільтри? (так/ні, Enter = ні): ").strip().lower() != "так":
+        return filters
+
+    raw = input("Категорія (ID/слово, Enter = усі): ").strip()
+    if raw:
+        cat_id = int(raw) if raw.isdigit() else find_category_id_by_text(raw)
+        if cat_id is None or get_category_name(cat_id) is None:
+            print(" Категорію не знайдено.")
+            return None
+        filters["category_id"] = cat_id
+
+    filters["currency"] = read_optional_currency("Валюта (Enter = усі, UAH/USD/EUR): ")
+    filters["date_from"] = read_optional_date("Дата ВІД (Enter = без обмеження): ")
+    filters["date_to"] = read_optional_date("Дата ДО (Enter = без обмеження): ")
+    return filters
 
-        if not rows:
-            print("Поки немає жодної витрати.")
-            return
 
-        print("\nВитрати:")
+def list_expenses():
+    filters = _read_list_filters()
+    if filters is None:
+        return
+
+    # +1 рядок, щоб знати, чи є ще сторінка в напрямку руху
+    rows = fetch_expenses_page(filters, LIST_PAGE_SIZE + 1)
+    if not rows:
+        print("Витрат за цими фільтрами немає." if any(filters.values()) else "Поки немає жодної витрати.")
+        return
+    has_next = len(rows) > LIST_PAGE_SIZE
+    has_prev = False
+    rows = rows[:LIST_PAGE_SIZE]
+    page = 1
+
+    while True:
+        print(f"\nВитрати (сторінка {page}):")
         for eid, dt, title, amount, currency, cat_name, desc in rows:
             tail = f" | {desc}" if desc else ""
             print(f"{eid}. {dt} | {cat_name} | {title} | {amount} {currency}{tail}")
         print()
-    finally:
-        conn.close()
+
+        options = []
+        if has_next:
+            options.append("н = наступна")
+        if has_prev:
+            options.append("п = попередня")
+        if not options:
+            return
+        choice = input(f"{', '.join(options)}, Enter = назад: ").strip().lower()
+
+        if choice in ("н", "n") and has_next:
+            last = rows[-1]
+            rows = fetch_expenses_page(filters, LIST_PAGE_SIZE + 1, after=(last[1], last[0]))
+            has_next = len(rows) > LIST_PAGE_SIZE
+            has_prev = True
+            rows = rows[:LIST_PAGE_SIZE]
+            page += 1
+        elif choice in ("п", "p") and has_prev:
+            first = rows[0]
+            rows = fetch_expenses_page(filters, LIST_PAGE_SIZE + 1, before=(first[1], first[0]))
+            has_prev = len(rows) > LIST_PAGE_SIZE
+            has_next = True
+            rows = rows[-LIST_PAGE_SIZE:]
+            page -= 1
+        elif choice == "":
+            return
+        else:
+            print(" Невірний вибір")
+
+        if not rows:
+            print("Більше витрат немає.")
+            return
 
 
 def view_expense_details():
@@ -101,12 +258,7 @@ def view_expense_details():
     conn = get_conn()
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT e.id, e.title, e.expense_date, c.name, e.amount, e.currency, e.description
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.id = %s;
-            """, (expense_id,))
+            statements.execute(cur, EXPENSE_BY_ID, (expense_id,))
             row = cur.fetchone()
 
         if not row:
@@ -135,79 +287,81 @@ def update_expense():
         return
     expense_id = int(raw)
 
+    # з'єднання береться лише на окремі запити: поки користувач вводить значення, воно в пулі,
+    # а пошук категорій бере своє — інакше при DB_POOL_MAX=1 пул вичерпався б
     conn = get_conn()
-    conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT id, title, expense_date, category_id, amount, currency, description
-                FROM expenses
-                WHERE id = %s;
-            """, (expense_id,))
+            statements.execute(cur, EXPENSE_FIELDS_BY_ID, (expense_id,))
             row = cur.fetchone()
+    finally:
+        conn.close()
 
-            if not row:
-                print(" Витрату з таким ID не знайдено.")
+    if not row:
+        print(" Витрату з таким ID не знайдено.")
+        return
+
+    eid, old_title, old_date, old_cat_id, old_amount, old_currency, old_desc = row
+
+    print("\nПоточні значення:")
+    print(f"ID: {eid}")
+    print(f"Назва: {old_title}")
+    print(f"Дата: {old_date}")
+    print(f"Категорія ID: {old_cat_id} ({get_category_name(old_cat_id)})")
+    print(f"Сума: {old_amount} {old_currency}")
+    print(f"Опис: {old_desc if old_desc else '(немає)'}")
+
+    print("\nВведіть нові значення або Enter, щоб залишити як було.")
+
+    new_title = input("Нова назва: ").strip() or None
+    new_date = read_optional_date("Нова дата (Enter = не змінювати): ")
+
+    raw_cat = input("Нова категорія (ID/слово, Enter = не змінювати): ").strip()
+    new_cat_id = None
+    if raw_cat != "":
+        if raw_cat.isdigit():
+            cid = int(raw_cat)
+            if get_category_name(cid) is None:
+                print(" Категорію з таким ID не знайдено.")
+                return
+            new_cat_id = cid
+        else:
+            cid = find_category_id_by_text(raw_cat)
+            if cid is None or get_category_name(cid) is None:
+                print(" Категорію не знайдено.")
                 return
+            new_cat_id = cid
+
+    new_amount = read_optional_amount("Нова сума (Enter = не змінювати): ")
+    new_currency = read_optional_currency()
 
-            eid, old_title, old_date, old_cat_id, old_amount, old_currency, old_desc = row
-
-            print("\nПоточні значення:")
-            print(f"ID: {eid}")
-            print(f"Назва: {old_title}")
-            print(f"Дата: {old_date}")
-            print(f"Категорія ID: {old_cat_id} ({get_category_name(old_cat_id)})")
-            print(f"Сума: {old_amount} {old_currency}")
-            print(f"Опис: {old_desc if old_desc else '(немає)'}")
-
-            print("\nВведіть нові значення або Enter, щоб залишити як було.")
-
-            new_title = input("Нова назва: ").strip() or None
-            new_date = read_optional_date("Нова дата (Enter = не змінювати): ")
-
-            raw_cat = input("Нова категорія (ID/слово, Enter = не змінювати): ").strip()
-            new_cat_id = None
-            if raw_cat != "":
-                if raw_cat.isdigit():
-                    cid = int(raw_cat)
-                    if get_category_name(cid) is None:
-                        print(" Категорію з таким ID не знайдено.")
-                        return
-                    new_cat_id = cid
-                else:
-                    cid = find_category_id_by_text(raw_cat)
-                    if cid is None or get_category_name(cid) is None:
-                        print(" Категорію не знайдено.")
-                        return
-                    new_cat_id = cid
-
-            new_amount = read_optional_amount("Нова сума (Enter = не змінювати): ")
-            new_currency = read_optional_currency()
-
-            new_desc = input("Новий опис (Enter = не змінювати, '-' = очистити): ").strip()
-            if new_desc == "":
-                new_desc = None
-            elif new_desc == "-":
-                new_desc = ""
-
-            final_title = old_title if new_title is None else new_title
-            final_date = old_date if new_date is None else new_date
-            final_cat_id = old_cat_id if new_cat_id is None else new_cat_id
-            final_amount = old_amount if new_amount is None else new_amount
-            final_currency = old_currency if new_currency is None else new_currency
-
-            if new_desc is None:
-                final_desc = old_desc
-            else:
-                final_desc = None if new_desc == "" else new_desc
-
-            cur.execute("""
-                UPDATE expenses
-                SET title=%s, expense_date=%s, category_id=%s, amount=%s, currency=%s, description=%s
-                WHERE id=%s;
-            """, (final_title, final_date, final_cat_id, final_amount, final_currency, final_desc, expense_id))
-
-            print(" Витрату оновлено.")
+    new_desc = input("Новий опис (Enter = не змінювати, '-' = очистити): ").strip()
+    if new_desc == "":
+        new_desc = None
+    elif new_desc == "-":
+        new_desc = ""
+
+    final_title = old_title if new_title is None else new_title
+    final_date = old_date if new_date is None else new_date
+    final_cat_id = old_cat_id if new_cat_id is None else new_cat_id
+    final_amount = old_amount if new_amount is None else Decimal(str(new_amount))
+    final_currency = old_currency if new_currency is None else new_currency
+
+    if new_desc is None:
+        final_desc = old_desc
+    else:
+        final_desc = None if new_desc == "" else new_desc
+
+    conn = get_conn()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            statements.execute(cur, EXPENSE_UPDATE, (final_title, final_date, final_cat_id, final_amount,
+                                                     final_currency, final_desc, expense_id))
+            if cur.rowcount == 0:
+                print(" Витрату вже видалено.")
+                return
+        print(" Витрату оновлено.")
     except Exception as e:
         print(" Не вдалося оновити витрату.")
         print(e)
@@ -229,26 +383,21 @@ def delete_expense():
     conn.autocommit = True
     try:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT e.id, e.expense_date, e.title, e.amount, e.currency, c.name, COALESCE(e.description,'')
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.id = %s;
-            """, (expense_id,))
+            statements.execute(cur, EXPENSE_BY_ID, (expense_id,))
             row = cur.fetchone()
 
             if not row:
                 print(" Витрату з таким ID не знайдено.")
                 return
 
-            eid, dt, title, amount, currency, cat_name, desc = row
+            eid, title, dt, cat_name, amount, currency, desc = row
             tail = f" | {desc}" if desc else ""
             print(f"Знайдено: ID={eid} | {dt} | {cat_name} | {title} | {amount} {currency}{tail}")
 
             while True:
                 confirm = input("Підтвердіть видалення (так/ні): ").strip().lower()
                 if confirm == "так":
-                    cur.execute("DELETE FROM expenses WHERE id = %s;", (expense_id,))
+                    statements.execute(cur, EXPENSE_DELETE, (expense_id,))
                     print(" Витрату видалено.")
                     break
                 if confirm == "ні":
@@ -270,6 +419,8 @@ def expenses_menu():
         print("3. Переглянути витрату (деталі)")
         print("4. Редагувати витрату")
         print("5. Видалити витрату")
+        print("6. Імпорт витрат з CSV")
+        print("7. Масове редагування / видалення за фільтром")
         print("0. Назад")
 
         choice = input("Ваш вибір: ").strip()
@@ -283,6 +434,10 @@ def expenses_menu():
             update_expense()
         elif choice == "5":
             delete_expense()
+        elif choice == "6":
+            import_expenses_from_csv()
+        elif choice == "7":
+            bulk_edit_expenses()
         elif choice == "0":
             return
         else:
@@ -0,0 +1,222 @@
+# importer.py
+import io
+import csv
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from db import DB_BACKEND, get_conn
+from categories import invalidate_category_cache
+from utils import ALLOWED_CURRENCIES, MAX_AMOUNT, parse_amount, parse_date
+
+CSV_HEADER = ["date", "category", "title", "amount", "currency", "description"]
+COPY_BATCH_ROWS = 10_000
+CENT = Decimal("0.01")
+
+
+def _parse_row(row: list[str]) -> tuple[tuple, str | None]:
+    """Рядок CSV -> (дані для staging, None) або ((), причина відхилення)."""
+    if len(row) < 4:
+        return (), "замало колонок"
+
+    row = row + [""] * (len(CSV_HEADER) - len(row))
+    raw_date, category, title, raw_amount, currency, description = (v.strip() for v in row[:6])
+
+    expense_date = parse_date(raw_date)
+    if expense_date is None:
+        return (), f"невірна дата '{raw_date}'"
+
+    if not category:
+        return (), "порожня категорія"
+
+    amount = parse_amount(raw_amount)
+    if amount is None:
+        return (), f"невірна сума '{raw_amount}'"
+    # округлюємо до копійок тут, як NUMERIC(12, 2) у Postgres: '0,004' стала б 0.00 і порушила б
+    # CHECK (amount > 0) уже під час злиття — відкотився б увесь імпорт, а не один рядок
+    amount = Decimal(str(amount)).quantize(CENT, rounding=ROUND_HALF_UP)
+    if amount <= 0 or amount >= MAX_AMOUNT:
+        return (), f"невірна сума '{raw_amount}'"
+
+    currency = currency.upper() or "UAH"
+    if currency not in ALLOWED_CURRENCIES:
+        return (), f"невірна валюта '{currency}'"
+
+    return (expense_date, category, title or category, amount, currency, description or None), None
+
+
+def _merge_staging_postgres(cur) -> tuple[int, int]:
+    """import_staging -> нові категорії + expenses одним запитом. Повертає (вставлено витрат, нових категорій)."""
+    cur.execute("""
+        WITH names AS (
+            SELECT DISTINCT category AS name FROM import_staging
+        ),
+        new_categories AS (
+            INSERT INTO categories (name)
+            SELECT name FROM names
+            ON CONFLICT (name) DO NOTHING
+            RETURNING id, name
+        ),
+        resolved AS (
+            SELECT id, name FROM new_categories
+            UNION ALL
+            SELECT c.id, c.name FROM categories c JOIN names n ON n.name = c.name
+        ),
+        inserted AS (
+            INSERT INTO expenses (title, amount, expense_date, category_id, description, currency)
+            SELECT s.title, s.amount, s.expense_date, r.id, s.description, s.currency
+            FROM import_staging s
+            JOIN resolved r ON r.name = s.category
+            ORDER BY s.line_no
+            RETURNING 1
+        )
+        SELECT
+            (SELECT COUNT(*) FROM inserted),
+            (SELECT COUNT(*) FROM new_categories);
+    """)
+    return cur.fetchone()
+
+
+def _merge_staging_sqlite(cur) -> tuple[int, int]:
+    # У SQLite INSERT не можна вкладати в WITH — ті самі кроки окремими запитами в тій самій транзакції
+    # (WHERE true — щоб ON CONFLICT не сприйнявся як умова JOIN)
+    cur.execute("""
+        INSERT INTO categories (name)
+        SELECT DISTINCT category FROM import_staging WHERE true
+        ON CONFLICT (name) DO NOTHING;
+    """)
+    new_categories = cur.rowcount
+    cur.execute("""
+        INSERT INTO expenses (title, amount, expense_date, category_id, description, currency)
+        SELECT s.title, s.amount, s.expense_date, c.id, s.description, s.currency
+        FROM import_staging s
+        JOIN categories c ON c.name = s.category
+        ORDER BY s.line_no;
+    """)
+    inserted = cur.rowcount
+    cur.execute("DROP TABLE import_staging;")  # ON COMMIT DROP у SQLite немає
+    return inserted, new_categories
+
+
+def import_expenses_csv(path: str) -> dict:
+    """
+    Потоково читає CSV (формат як у експорті: date;category;title;amount;currency;description),
+    вантажить валідні рядки через COPY у тимчасову таблицю і зливає їх у expenses однією транзакцією.
+    Категорії, яких ще немає, створюються тим самим запитом.
+    """
+    started = time.perf_counter()
+    rejected: list[tuple[int, str]] = []
+    staged = 0
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                CREATE TEMP TABLE import_staging (
+                    line_no INT NOT NULL,
+                    expense_date DATE NOT NULL,
+                    category TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    amount NUMERIC(12, 2) NOT NULL,
+                    currency VARCHAR(10) NOT NULL,
+                    description TEXT
+                ){" ON COMMIT DROP" if DB_BACKEND == "postgres" else ""};
+            """)
+
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            buffered = 0
+
+            def flush():
+                nonlocal buf, writer, buffered
+                if buffered and DB_BACKEND == "sqlite":
+                    # COPY у SQLite немає; порожній опис у CSV — NULL, як у COPY; сума — Decimal, щоб записалась копійками
+                    buf.seek(0)
+                    cur.executemany(
+                        "INSERT INTO import_staging (line_no, expense_date, category, title, amount, currency, "
+                        "description) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                        [(*r[:4], Decimal(r[4]), r[5], r[6] or None) for r in csv.reader(buf)]
+                    )
+                elif buffered:
+                    buf.seek(0)
+                    cur.copy_expert(
+                        "COPY import_staging (line_no, expense_date, category, title, amount, currency, description) "
+                        "FROM STDIN WITH (FORMAT csv)",
+                        buf
+                    )
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                buffered = 0
+
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.reader(f, delimiter=";")
+                for row in reader:
+                    line_no = reader.line_num
+                    if not any(v.strip() for v in row):
+                        continue
+                    if line_no == 1 and [v.strip().lower() for v in row[:6]] == CSV_HEADER:
+                        continue
+
+                    values, reason = _parse_row(row)
+                    if reason:
+                        rejected.append((line_no, reason))
+                        continue
+
+                    writer.writerow((line_no, *values))
+                    buffered += 1
+                    staged += 1
+                    if buffered >= COPY_BATCH_ROWS:
+                        flush()
+            flush()
+
+            merge = _merge_staging_sqlite if DB_BACKEND == "sqlite" else _merge_staging_postgres
+            inserted, new_categories = merge(cur)
+        conn.commit()
+        if new_categories:
+            invalidate_category_cache()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "inserted": inserted,
+        "staged": staged,
+        "new_categories": new_categories,
+        "rejected": rejected,
+        "seconds": elapsed,
+        "rows_per_sec": inserted / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def import_expenses_from_csv():
+    print("\n--- Імпорт витрат з CSV ---")
+    print("Формат: date;category;title;amount;currency;description (як у експорті)")
+    path = input("Шлях до CSV-файлу: ").strip().strip('"')
+    if not path:
+        print(" Шлях не може бути порожнім.")
+        return
+
+    try:
+        result = import_expenses_csv(path)
+    except FileNotFoundError:
+        print(" Файл не знайдено.")
+        return
+    except Exception as e:
+        print(" Не вдалося імпортувати витрати (нічого не збережено).")
+        print(e)
+        return
+
+    print(f" Імпортовано витрат: {result['inserted']}")
+    if result["inserted"] != result["staged"]:
+        print(f" Не вдалося зіставити з категоріями: {result['staged'] - result['inserted']}")
+    print(f" Нових категорій: {result['new_categories']}")
+    print(f" Час: {result['seconds']:.2f} с ({result['rows_per_sec']:.0f} рядків/с)")
+
+    rejected = result["rejected"]
+    if rejected:
+        print(f" Відхилено рядків: {len(rejected)}")
+        for line_no, reason in rejected[:20]:
+            print(f"   рядок {line_no}: {reason}")
+        if len(rejected) > 20:
+            print(f"   ... і ще {len(rejected) - 20}")
@@ -0,0 +1,316 @@
+# incremental_export.py
+"""
+Інкрементальний експорт витрат за період у CSV: перший запуск пише повний знімок,
+наступні — лише витрати, додані, змінені чи видалені з попереднього запуску.
+
+Зміни записують тригери в expense_changes (міграція 8), а позицію, до якої потік уже вивантажено, —
+export_watermarks (ключ — повний шлях каталогу). Потік — каталог файлів одного періоду,
+типово export/expenses_<від>_to_<до>/:
+    snapshot_000001.csv   id;date;category;title;amount;currency;description — стан на момент знімка
+    delta_000002.csv      op;id;date;...;description — зміни після нього, по черзі номерів
+op: I — нова витрата, U — змінена, D — видалена або перенесена за межі періоду (решта колонок порожні).
+Поточний стан = останній snapshot_N + усі delta_M з M > N; I і U замінюють рядок з тим самим id цілком.
+Повторне застосування дельти нічого не псує: після збою запуск просто повторить ті самі зміни.
+
+compact_changes() зливає знімок і дельти в новий snapshot_<номер останньої дельти> — без запитів до бази.
+
+Журнал чиститься до найменшої позиції серед потоків, тож покинутий потік тримав би його вічно:
+потік, не вивантажений EXPORT_STREAM_MAX_AGE_DAYS днів, вважається покинутим і забувається
+(наступний запуск для нього почне з повного знімка), а непотрібний — забуває drop_stream().
+Поки потоків немає, тригери журнал не ведуть.
+"""
+import os
+import re
+import csv
+import heapq
+import tempfile
+from db import DB_BACKEND, use_conn
+from importer import CSV_HEADER
+from reports import EXPORT_DIR, EXPORT_ITERSIZE
+
+SNAPSHOT_HEADER = ["id", *CSV_HEADER]
+DELTA_HEADER = ["op", *SNAPSHOT_HEADER]
+_FILE_RE = re.compile(r"^(snapshot|delta)_(\d{6})\.csv$")
+STREAM_MAX_AGE_DAYS = int(os.getenv("EXPORT_STREAM_MAX_AGE_DAYS", "90"))   # 0 — потоки не застарівають
+
+# колонка журналу, за якою рахується позиція, і поточна позиція — все, що нижче, вже закомічено.
+# Postgres: txid транзакції; xmin знімка — найменша ще не завершена транзакція.
+# SQLite: транзакції пишуть по черзі, тож незакомічених змін нижче виданого seq не буває
+# (лічильник AUTOINCREMENT, а не MAX(seq): журнал після очищення може бути порожнім).
+_POSITION = {
+    "postgres": ("txid", "SELECT txid_snapshot_xmin(txid_current_snapshot());"),
+    "sqlite": ("seq", "SELECT COALESCE(MAX(seq), 0) + 1 FROM sqlite_sequence WHERE name = 'expense_changes';"),
+}
+
+# потоки, не вивантажені STREAM_MAX_AGE_DAYS днів (крім поточного)
+_EXPIRE_SQL = {
+    "postgres": "DELETE FROM export_watermarks WHERE stream <> %s AND updated_at < now() - make_interval(days => %s);",
+    "sqlite": "DELETE FROM export_watermarks WHERE stream <> %s AND updated_at < datetime('now', '-' || %s || ' days');",
+}
+
+SNAPSHOT_SQL = """
+    SELECT e.id, e.expense_date, c.name, e.title, e.amount, e.currency, COALESCE(e.description, '')
+    FROM expenses e
+    JOIN categories c ON c.id = e.category_id
+    WHERE e.expense_date >= %s AND e.expense_date <= %s
+    ORDER BY e.expense_date, e.id;
+"""
+
+# витрати, що змінились у межах періоду (за старою чи новою датою), і їхній стан зараз;
+# немає рядка (видалена або перенесена за межі періоду) — D
+DELTA_SQL = """
+    SELECT ch.expense_id, ch.inserted, e.expense_date, c.name, e.title, e.amount, e.currency,
+           COALESCE(e.description, '')
+    FROM (
+        SELECT expense_id, MAX(CASE WHEN op = 'I' THEN 1 ELSE 0 END) AS inserted
+        FROM expense_changes
+        WHERE {column} >= %s AND {column} < %s AND expense_date >= %s AND expense_date <= %s
+        GROUP BY expense_id
+    ) ch
+    LEFT JOIN expenses e ON e.id = ch.expense_id AND e.expense_date >= %s AND e.expense_date <= %s
+    LEFT JOIN categories c ON c.id = e.category_id
+    ORDER BY ch.expense_id;
+"""
+
+
+def stream_name(date_from: str, date_to: str) -> str:
+    return f"expenses_{date_from}_to_{date_to}"
+
+
+def _list_files(stream_dir: str) -> list[tuple[str, int, str]]:
+    """[(snapshot | delta, номер, шлях)] файлів потоку."""
+    files = []
+    if os.path.isdir(stream_dir):
+        for entry in os.listdir(stream_dir):
+            m = _FILE_RE.match(entry)
+            if m:
+                files.append((m.group(1), int(m.group(2)), os.path.join(stream_dir, entry)))
+    return files
+
+
+def _stream_files(stream_dir: str) -> tuple[int | None, list[tuple[int, str]], list[str]]:
+    """(номер останнього знімка, [(номер, шлях)] дельт після нього, застарілі файли)."""
+    files = _list_files(stream_dir)
+    snapshot_no = max((no for kind, no, _ in files if kind == "snapshot"), default=None)
+    if snapshot_no is None:
+        return None, [], []
+    deltas = sorted((no, path) for kind, no, path in files if kind == "delta" and no > snapshot_no)
+    stale = [path for kind, no, path in files
+             if no < snapshot_no or (kind == "delta" and no == snapshot_no)]
+    return snapshot_no, deltas, stale
+
+
+def _next_number(stream_dir: str) -> int:
+    return max((no for _, no, _ in _list_files(stream_dir)), default=0) + 1
+
+
+def _file_path(stream_dir: str, kind: str, number: int) -> str:
+    return os.path.join(stream_dir, f"{kind}_{number:06d}.csv")
+
+
+def _remove(paths: list[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_csv(filename: str, header: list[str], rows, keep_empty: bool) -> int:
+    """Як reports.write_period_csv: тимчасовий файл, fsync, атомарне перейменування. Повертає кількість рядків."""
+    directory = os.path.dirname(filename)
+    fd, tmp_path = tempfile.mkstemp(prefix=".export_", suffix=".csv.tmp", dir=directory)
+    count = 0
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        if count or keep_empty:
+            os.chmod(tmp_path, 0o644)  # mkstemp створює файл з правами 0600
+            os.replace(tmp_path, filename)
+        return count
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _delta_rows(cur, counts: dict):
+    empty = [""] * len(CSV_HEADER)
+    for expense_id, inserted, *values in cur:
+        if values[0] is None:
+            counts["deleted"] += 1
+            yield ["D", expense_id, *empty]
+        else:
+            yield ["I" if inserted else "U", expense_id, *values]
+
+
+def _register(c, stream: str):
+    """
+    Postgres: новий потік реєструється окремою транзакцією. Поки потоків не було, тригери журнал не вели;
+    SHARE-блокування чекає, поки завершаться записи, що почались без журналу, — решта вже бачать потік.
+    """
+    try:
+        with c.cursor() as cur:
+            cur.execute("""
+                INSERT INTO export_watermarks (stream, position) VALUES (%s, -1)
+                ON CONFLICT (stream) DO NOTHING;
+            """, (stream,))
+            if cur.rowcount:
+                cur.execute("LOCK TABLE expenses, categories IN SHARE MODE;")
+        c.commit()
+    except Exception:
+        c.rollback()
+        raise
+
+
+def _forget_expired(cur, stream: str):
+    if STREAM_MAX_AGE_DAYS > 0:
+        cur.execute(_EXPIRE_SQL[DB_BACKEND], (stream, STREAM_MAX_AGE_DAYS))
+
+
+def _prune(cur, column: str, position):
+    # журнал, уже вивантажений усіма потоками, більше не потрібен; потоків немає — не потрібен увесь
+    cur.execute(f"""
+        DELETE FROM expense_changes
+        WHERE {column} < COALESCE((SELECT MIN(position) FROM export_watermarks), %s);
+    """, (position,))
+
+
+def export_changes(date_from: str, date_to: str, directory: str = EXPORT_DIR, full: bool = False,
+                   conn=None) -> dict:
+    """
+    Вивантажує зміни за період з минулого запуску в нову дельту потоку.
+    Повний знімок пишеться, якщо потік новий, його знімка немає на диску, таблицю очищено (TRUNCATE)
+    або full=True. Повертає {"mode": "snapshot" | "delta", "file" (None — змін немає), "rows", "deleted"}.
+    """
+    stream_dir = os.path.join(directory, stream_name(date_from, date_to))
+    os.makedirs(stream_dir, exist_ok=True)
+    stream = os.path.abspath(stream_dir)
+    column, position_sql = _POSITION[DB_BACKEND]
+
+    with use_conn(conn) as c:
+        if DB_BACKEND == "postgres":
+            _register(c, stream)
+        try:
+            with c.cursor() as cur:
+                # рядок потоку заблоковано до кінця транзакції: два експорти одного потоку йдуть по черзі
+                # (у SQLite це перший запис транзакції — вона одразу бере блокування запису)
+                cur.execute("""
+                    INSERT INTO export_watermarks (stream, position) VALUES (%s, -1)
+                    ON CONFLICT (stream) DO UPDATE SET updated_at = export_watermarks.updated_at;
+                """, (stream,))
+                cur.execute("SELECT position FROM export_watermarks WHERE stream = %s;", (stream,))
+                watermark = cur.fetchone()[0]
+                # позиція — до читання даних: усе, що закомітять пізніше, потрапить у наступну дельту
+                cur.execute(position_sql)
+                position = cur.fetchone()[0]
+
+                snapshot_no, _, stale = _stream_files(stream_dir)
+                truncated = False
+                if watermark >= 0 and not full:
+                    cur.execute(f"""
+                        SELECT 1 FROM expense_changes
+                        WHERE {column} >= %s AND {column} < %s AND op = 'T'
+                        LIMIT 1;
+                    """, (watermark, position))
+                    truncated = cur.fetchone() is not None
+
+                counts = {"rows": 0, "deleted": 0}
+                number = _next_number(stream_dir)
+                with c.cursor(name="export_changes") as data:
+                    data.itersize = EXPORT_ITERSIZE
+                    if full or watermark < 0 or snapshot_no is None or truncated:
+                        mode, filename = "snapshot", _file_path(stream_dir, "snapshot", number)
+                        data.execute(SNAPSHOT_SQL, (date_from, date_to))
+                        counts["rows"] = _write_csv(filename, SNAPSHOT_HEADER, data, keep_empty=True)
+                        # новий знімок заміняє все, що було раніше; наступні дельти матимуть більші номери
+                        _remove([path for _, no, path in _list_files(stream_dir) if no < number])
+                    else:
+                        mode, filename = "delta", _file_path(stream_dir, "delta", number)
+                        params = (watermark, position, date_from, date_to, date_from, date_to)
+                        data.execute(DELTA_SQL.format(column=column), params)
+                        counts["rows"] = _write_csv(filename, DELTA_HEADER, _delta_rows(data, counts),
+                                                    keep_empty=False)
+                        _remove(stale)
+                        if not counts["rows"]:
+                            filename = None
+
+                cur.execute("""
+                    UPDATE export_watermarks SET position = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE stream = %s;
+                """, (position, stream))
+                _forget_expired(cur, stream)
+                _prune(cur, column, position)
+            c.commit()
+        except Exception:
+            c.rollback()
+            raise
+
+    return {"mode": mode, "file": filename, **counts}
+
+
+def drop_stream(date_from: str, date_to: str, directory: str = EXPORT_DIR, conn=None) -> bool:
+    """
+    Забуває потік: журнал змін для нього більше не зберігається, файли на диску лишаються.
+    Наступний export_changes для цього періоду почне з повного знімка. False — такого потоку не було.
+    """
+    stream = os.path.abspath(os.path.join(directory, stream_name(date_from, date_to)))
+    column, position_sql = _POSITION[DB_BACKEND]
+    with use_conn(conn) as c:
+        try:
+            with c.cursor() as cur:
+                cur.execute("DELETE FROM export_watermarks WHERE stream = %s;", (stream,))
+                dropped = cur.rowcount > 0
+                _forget_expired(cur, stream)
+                cur.execute(position_sql)
+                _prune(cur, column, cur.fetchone()[0])
+            c.commit()
+        except Exception:
+            c.rollback()
+            raise
+    return dropped
+
+
+def _read_rows(path: str):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader, None)
+        yield from reader
+
+
+def _snapshot_key(row: list[str]) -> tuple[str, int]:
+    return row[1], int(row[0])   # як ORDER BY e.expense_date, e.id
+
+
+def compact_changes(date_from: str, date_to: str, directory: str = EXPORT_DIR) -> dict:
+    """
+    Зливає останній знімок потоку і дельти після нього в новий знімок, старі файли видаляє.
+    У пам'яті — лише зміни з дельт: знімок читається і пишеться потоково.
+    Повертає {"file", "rows" (None — дельт не було), "deltas"}.
+    """
+    stream_dir = os.path.join(directory, stream_name(date_from, date_to))
+    snapshot_no, deltas, stale = _stream_files(stream_dir)
+    if snapshot_no is None:
+        raise ValueError("Цей період ще не експортовано інкрементально — знімка немає")
+    snapshot = _file_path(stream_dir, "snapshot", snapshot_no)
+    if not deltas:
+        _remove(stale)
+        return {"file": snapshot, "rows": None, "deltas": 0}
+
+    changes: dict[int, list[str] | None] = {}   # id -> рядок знімка, None — видалена
+    for _, path in deltas:
+        for op, *row in _read_rows(path):
+            changes[int(row[0])] = None if op == "D" else row
+    upserts = sorted((row for row in changes.values() if row is not None), key=_snapshot_key)
+    kept = (row for row in _read_rows(snapshot) if int(row[0]) not in changes)
+
+    last_no = deltas[-1][0]
+    filename = _file_path(stream_dir, "snapshot", last_no)
+    rows = _write_csv(filename, SNAPSHOT_HEADER, heapq.merge(kept, upserts, key=_snapshot_key), keep_empty=True)
+    _remove([snapshot, *stale, *(path for _, path in deltas)])
+    return {"file": filename, "rows": rows, "deltas": len(deltas)}
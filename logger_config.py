@@ -1,9 +1,12 @@
-
+import json
 import logging
 import os
 
+# журнали — поруч з кодом (як .env у db.py), а не в поточному каталозі запуску
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+
 
-def setup_logging(log_dir: str = "logs", log_file: str = "app.log") -> None:
+def setup_logging(log_dir: str = LOG_DIR, log_file: str = "app.log") -> None:
     os.makedirs(log_dir, exist_ok=True)
     log_path = os.path.join(log_dir, log_file)
 
@@ -15,3 +18,29 @@ def setup_logging(log_dir: str = "logs", log_file: str = "app.log") -> None:
             logging.StreamHandler()
         ]
     )
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок: час, рівень, логер + поля з extra={"data": {...}}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        data.update(getattr(record, "data", None) or {"message": record.getMessage()})
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def setup_query_logging(log_dir: str = LOG_DIR, log_file: str = "sql.log") -> None:
+    """Журнал SQL (query_log.py) — окремий файл у форматі JSON Lines, не дублюється в консоль."""
+    logger = logging.getLogger("sql")
+    if logger.handlers:
+        return
+    os.makedirs(log_dir, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(log_dir, log_file), encoding="utf-8")
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
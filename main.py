@@ -1,3 +1,7 @@
+import time
+
+_started = time.perf_counter()
+
 from logger_config import setup_logging
 import logging
 
@@ -6,13 +10,11 @@ logger = logging.getLogger(__name__)
 logger.info("App started")
 
 from db import init_db
-from categories import categories_menu
-from expenses import expenses_menu
-from reports import reports_menu
 
 
 def main():
     init_db()
+    logger.info("Startup took %.1f ms", (time.perf_counter() - _started) * 1000)
 
     while True:
         print("\n=== Облік витрат ===")
@@ -22,11 +24,15 @@ def main():
         print("0. Вихід")
 
         choice = input("Ваш вибір: ").strip()
+        # модулі меню імпортуються при першому виборі, а не під час старту
         if choice == "1":
+            from categories import categories_menu
             categories_menu()
         elif choice == "2":
+            from expenses import expenses_menu
             expenses_menu()
         elif choice == "3":
+            from reports import reports_menu
             reports_menu()
         elif choice == "0":
             print("До побачення!")
@@ -37,5 +43,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
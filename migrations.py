@@ -0,0 +1,996 @@
+# migrations.py
+"""
+Версійовані міграції схеми.
+Кожна міграція виконується рівно один раз (у власній транзакції) і записується у schema_version.
+Нову міграцію додаємо в кінець MIGRATIONS з наступним номером — старі не змінюємо.
+"""
+import logging
+from db import DB_BACKEND
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_LOCK_KEY = 4_870_211  # pg_advisory_xact_lock: одночасно мігрує лише один процес
+# pg_advisory_xact_lock(клас, кошик) у тригерах rollup (міграція 9)
+ROLLUP_LOCK_CLASS = 4_870_212
+ROLLUP_LOCK_BUCKETS = 1024
+
+
+def _m1_base_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id SERIAL PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS expenses (
+            id SERIAL PRIMARY KEY,
+            title TEXT NOT NULL,
+            amount NUMERIC(12, 2) NOT NULL CHECK (amount > 0),
+            expense_date DATE NOT NULL,
+            category_id INT NOT NULL REFERENCES categories(id) ON DELETE RESTRICT,
+            description TEXT,
+            currency VARCHAR(10) DEFAULT 'UAH'
+        );
+    """)
+
+
+def _m2_report_indexes(cur):
+    # WHERE expense_date BETWEEN ... ORDER BY expense_date, id (звіти за період, експорт)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_date_id
+        ON expenses (expense_date, id);
+    """)
+    # DISTINCT ON (category, currency) ... ORDER BY amount — max/min по категоріях
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_category_currency_amount
+        ON expenses (category_id, currency, amount);
+    """)
+    # SUM(amount) GROUP BY category, currency за період — index-only scan
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_date_covering
+        ON expenses (expense_date) INCLUDE (category_id, currency, amount);
+    """)
+    cur.execute("ANALYZE expenses;")
+
+
+def _m3_trigram_search(cur):
+    # pg_trgm — не в кожній інсталяції / не в кожного користувача є права на CREATE EXTENSION.
+    # Без нього пошук працює як раніше (LIKE без індексу).
+    cur.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm';")
+    if not cur.fetchone():
+        logger.warning("pg_trgm is not available, text search will use plain LIKE")
+        return
+
+    cur.execute("SAVEPOINT trgm;")
+    try:
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT trgm;")
+        logger.warning("Cannot create pg_trgm (%s), text search will use plain LIKE", e)
+        return
+
+    # Вирази збігаються з WHERE LOWER(...) LIKE LOWER(%s) у звітах, тож індекси підхоплюються
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_title_trgm
+        ON expenses USING gin (LOWER(title) gin_trgm_ops);
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_categories_name_trgm
+        ON categories USING gin (LOWER(name) gin_trgm_ops);
+    """)
+
+
+# ключі rollup (день, категорія, валюта), зачеплені видаленням чи зміною витрат
+_ROLLUP_CHANGED_KEYS = (
+    ("expense_rollup_delete", """
+            SELECT DISTINCT expense_date AS day, category_id, COALESCE(currency, 'UAH') AS currency
+            FROM old_rows
+        """),
+    ("expense_rollup_update", """
+            SELECT expense_date AS day, category_id, COALESCE(currency, 'UAH') AS currency FROM old_rows
+            UNION
+            SELECT expense_date, category_id, COALESCE(currency, 'UAH') FROM new_rows
+        """),
+)
+
+
+def _m4_daily_rollup(cur):
+    # Денні агрегати (день, категорія, валюта) для підсумкових звітів.
+    # Підтримуються тригерами на рівні statement (transition tables), тож масовий імпорт
+    # оновлює rollup одним запитом, а не по рядку.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS expense_daily_rollup (
+            day DATE NOT NULL,
+            category_id INT NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            total NUMERIC(16, 2) NOT NULL,
+            cnt INT NOT NULL,
+            min_amount NUMERIC(12, 2) NOT NULL,
+            max_amount NUMERIC(12, 2) NOT NULL,
+            PRIMARY KEY (day, category_id, currency)
+        );
+    """)
+
+    # INSERT: суми/кількість додаються, min/max — через LEAST/GREATEST
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION expense_rollup_insert() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO expense_daily_rollup AS r
+                (day, category_id, currency, total, cnt, min_amount, max_amount)
+            SELECT expense_date, category_id, COALESCE(currency, 'UAH'),
+                   SUM(amount), COUNT(*), MIN(amount), MAX(amount)
+            FROM new_rows
+            GROUP BY 1, 2, 3
+            ON CONFLICT (day, category_id, currency) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                cnt = r.cnt + EXCLUDED.cnt,
+                min_amount = LEAST(r.min_amount, EXCLUDED.min_amount),
+                max_amount = GREATEST(r.max_amount, EXCLUDED.max_amount);
+            RETURN NULL;
+        END $$;
+    """)
+
+    # DELETE/UPDATE: min/max не можна "відняти", тому зачеплені ключі перераховуються з expenses
+    # (ключ — це один день однієї категорії в одній валюті, тобто кілька рядків по індексу)
+    recompute = """
+            DELETE FROM expense_daily_rollup r
+            USING ({keys}) k
+            WHERE r.day = k.day AND r.category_id = k.category_id AND r.currency = k.currency;
+
+            INSERT INTO expense_daily_rollup
+                (day, category_id, currency, total, cnt, min_amount, max_amount)
+            SELECT e.expense_date, e.category_id, COALESCE(e.currency, 'UAH'),
+                   SUM(e.amount), COUNT(*), MIN(e.amount), MAX(e.amount)
+            FROM expenses e
+            JOIN ({keys}) k
+              ON e.expense_date = k.day
+             AND e.category_id = k.category_id
+             AND COALESCE(e.currency, 'UAH') = k.currency
+            GROUP BY 1, 2, 3;
+    """
+    for name, keys_sql in _ROLLUP_CHANGED_KEYS:
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                {recompute.format(keys=keys_sql)}
+                RETURN NULL;
+            END $$;
+        """)
+
+    cur.execute("DROP TRIGGER IF EXISTS expenses_rollup_insert ON expenses;")
+    cur.execute("""
+        CREATE TRIGGER expenses_rollup_insert
+        AFTER INSERT ON expenses
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_insert();
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS expenses_rollup_delete ON expenses;")
+    cur.execute("""
+        CREATE TRIGGER expenses_rollup_delete
+        AFTER DELETE ON expenses
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_delete();
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS expenses_rollup_update ON expenses;")
+    cur.execute("""
+        CREATE TRIGGER expenses_rollup_update
+        AFTER UPDATE ON expenses
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION expense_rollup_update();
+    """)
+
+    cur.execute("TRUNCATE expense_daily_rollup;")
+    cur.execute("""
+        INSERT INTO expense_daily_rollup
+            (day, category_id, currency, total, cnt, min_amount, max_amount)
+        SELECT expense_date, category_id, COALESCE(currency, 'UAH'),
+               SUM(amount), COUNT(*), MIN(amount), MAX(amount)
+        FROM expenses
+        GROUP BY 1, 2, 3;
+    """)
+
+
+def _m5_cache_versions(cur):
+    # Лічильники версій для кешів у процесах застосунку: будь-яка зміна таблиці збільшує версію,
+    # і кеш дешево перевіряє її замість повного перечитування.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        );
+    """)
+    cur.execute("INSERT INTO cache_versions (name) VALUES ('categories') ON CONFLICT (name) DO NOTHING;")
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION bump_cache_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE cache_versions SET version = version + 1 WHERE name = TG_ARGV[0];
+            RETURN NULL;
+        END $$;
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS categories_cache_version ON categories;")
+    cur.execute("""
+        CREATE TRIGGER categories_cache_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON categories
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_version('categories');
+    """)
+
+
+def _m6_exchange_rates(cur):
+    # rate — скільки UAH коштує 1 одиниця валюти на дату rate_date (як курс НБУ).
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            rate_date DATE NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            rate NUMERIC(18, 6) NOT NULL CHECK (rate > 0),
+            PRIMARY KEY (currency, rate_date)
+        );
+    """)
+    # Курс на кожен день (на дату без курсу — найближчий попередній), розгорнутий заздалегідь:
+    # звіти приєднують його звичайною рівністю (currency, day) — hash join, без підзапиту на кожен рядок
+    # і без пошуку по діапазонах. Розгортається до max(остання дата курсу, сьогодні) + рік.
+    # UAH — один рядок на '-infinity' (курс 1 на будь-яку дату), див. exchange_rate_day().
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS exchange_rate_days (
+            currency VARCHAR(10) NOT NULL,
+            day DATE NOT NULL,
+            rate NUMERIC(18, 6) NOT NULL,
+            PRIMARY KEY (currency, day)
+        );
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION exchange_rate_day(currency TEXT, day DATE) RETURNS DATE
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT CASE WHEN currency = 'UAH' THEN '-infinity'::date ELSE day END
+        $$;
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION rebuild_exchange_rate_days() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM exchange_rate_days;
+            INSERT INTO exchange_rate_days (currency, day, rate)
+            SELECT rg.currency, d::date, rg.rate
+            FROM (
+                SELECT currency, rate,
+                       rate_date AS valid_from,
+                       LEAD(rate_date) OVER (PARTITION BY currency ORDER BY rate_date) AS valid_to
+                FROM exchange_rates
+                WHERE currency <> 'UAH'
+            ) rg
+            CROSS JOIN LATERAL generate_series(
+                rg.valid_from,
+                COALESCE(rg.valid_to - 1,
+                         GREATEST(rg.valid_from, CURRENT_DATE) + 366),
+                INTERVAL '1 day'
+            ) AS d
+            UNION ALL
+            SELECT 'UAH', '-infinity', 1;
+            RETURN NULL;
+        END $$;
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS exchange_rates_days ON exchange_rates;")
+    cur.execute("""
+        CREATE TRIGGER exchange_rates_days
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON exchange_rates
+        FOR EACH STATEMENT EXECUTE FUNCTION rebuild_exchange_rate_days();
+    """)
+    cur.execute("INSERT INTO cache_versions (name) VALUES ('exchange_rates') ON CONFLICT (name) DO NOTHING;")
+    cur.execute("DROP TRIGGER IF EXISTS exchange_rates_cache_version ON exchange_rates;")
+    cur.execute("""
+        CREATE TRIGGER exchange_rates_cache_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON exchange_rates
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_version('exchange_rates');
+    """)
+    # початкове заповнення (рядок UAH)
+    cur.execute("""
+        INSERT INTO exchange_rate_days (currency, day, rate)
+        VALUES ('UAH', '-infinity', 1)
+        ON CONFLICT DO NOTHING;
+    """)
+
+
+def _m7_expenses_version(cur):
+    # Знімок аналітики (analytics.py) дочитує нові витрати за id, а зміну чи видалення вже завантажених
+    # помічає за цим лічильником. INSERT його не збільшує: інакше кожна вставка оновлювала б один і той
+    # самий рядок, і вставки з різних з'єднань чекали б одна на одну.
+    cur.execute("INSERT INTO cache_versions (name) VALUES ('expenses') ON CONFLICT (name) DO NOTHING;")
+    cur.execute("DROP TRIGGER IF EXISTS expenses_cache_version ON expenses;")
+    cur.execute("""
+        CREATE TRIGGER expenses_cache_version
+        AFTER UPDATE OR DELETE OR TRUNCATE ON expenses
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_cache_version('expenses');
+    """)
+
+
+# тіла тригерів журналу змін (міграція 8): (назва, подія, transition tables, тіло)
+# UPDATE пише і старі рядки, і нові: зміна id чи дати — це ще й зникнення старого рядка
+_CHANGE_LOG_TRIGGERS = (
+    ("expense_changes_insert", "INSERT", "REFERENCING NEW TABLE AS new_rows",
+     "INSERT INTO expense_changes (expense_id, expense_date, op) SELECT id, expense_date, 'I' FROM new_rows;"),
+    ("expense_changes_update", "UPDATE", "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+     "INSERT INTO expense_changes (expense_id, expense_date, op) SELECT id, expense_date, 'U'"
+     " FROM (SELECT id, expense_date FROM new_rows UNION SELECT id, expense_date FROM old_rows) changed;"),
+    ("expense_changes_delete", "DELETE", "REFERENCING OLD TABLE AS old_rows",
+     "INSERT INTO expense_changes (expense_id, expense_date, op) SELECT id, expense_date, 'D' FROM old_rows;"),
+    ("expense_changes_truncate", "TRUNCATE", "",
+     "INSERT INTO expense_changes (op) VALUES ('T');"),
+)
+_CATEGORY_CHANGES = """
+            INSERT INTO expense_changes (expense_id, expense_date, op)
+            SELECT e.id, e.expense_date, 'U'
+            FROM expenses e
+            JOIN new_rows n ON n.id = e.category_id
+            JOIN old_rows o ON o.id = n.id
+            WHERE o.name IS DISTINCT FROM n.name;
+"""
+
+
+def _m8_expense_changes(cur):
+    # Журнал змін витрат для інкрементального експорту (incremental_export.py): id і дата кожної вставленої,
+    # зміненої чи видаленої витрати (при зміні дати — і стара, і нова), щоб експорт за період брав лише
+    # те, що в нього входило або входить. txid — транзакція, що внесла зміну: експорт забирає зміни лише тих
+    # транзакцій, що вже завершились (txid нижче xmin знімка), тож зміна, закомічена пізніше за сусідні,
+    # не проскочить повз збережену позицію. TRUNCATE пише один рядок 'T' — потрібен повний перезапис.
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS expense_changes (
+            seq BIGSERIAL PRIMARY KEY,
+            expense_id INT,
+            expense_date DATE,
+            op CHAR(1) NOT NULL CHECK (op IN ('I', 'U', 'D', 'T')),
+            txid BIGINT NOT NULL DEFAULT txid_current(),
+            changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expense_changes_txid ON expense_changes (txid);")
+    # позиція, до якої кожен потік експорту вже вивантажив зміни; журнал нижче мінімальної — видаляється
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            stream TEXT PRIMARY KEY,
+            position BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+
+    for name, event, referencing, body in _CHANGE_LOG_TRIGGERS:
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                {body}
+                RETURN NULL;
+            END $$;
+        """)
+        cur.execute(f"DROP TRIGGER IF EXISTS {name} ON expenses;")
+        cur.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event} ON expenses
+            {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION {name}();
+        """)
+
+    # в експорті — назва категорії, тож її перейменування змінює всі витрати цієї категорії
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION category_changes_update() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            {_CATEGORY_CHANGES}
+            RETURN NULL;
+        END $$;
+    """)
+    cur.execute("DROP TRIGGER IF EXISTS category_changes_update ON categories;")
+    cur.execute("""
+        CREATE TRIGGER category_changes_update
+        AFTER UPDATE ON categories
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION category_changes_update();
+    """)
+
+
+def _m9_rollup_upsert(cur):
+    # Перерахунок ключів з міграції 4 (DELETE, потім INSERT) падав на одночасних змінах одного ключа:
+    # обидві транзакції видаляли рядок, і вставка другої порушувала первинний ключ. Тепер перерахований
+    # рядок записується через ON CONFLICT, а ключі, в яких витрат не лишилось, видаляються окремо.
+    # Щоб перерахунок бачив зміни сусідньої транзакції, а не затирав їх старим знімком, тригери спершу
+    # беруть advisory-блокування ключів (до кінця транзакції, по порядку — без взаємних блокувань):
+    # наступний запит у READ COMMITTED бере новий знімок уже після коміту сусіда. Ключі хешуються
+    # в ROLLUP_LOCK_BUCKETS кошиків — масова зміна не вичерпає таблицю блокувань.
+    lock = f"""
+            PERFORM pg_advisory_xact_lock({ROLLUP_LOCK_CLASS}, bucket)
+            FROM (
+                SELECT DISTINCT hashtext(k.day::text || ':' || k.category_id || ':' || k.currency)
+                                % {ROLLUP_LOCK_BUCKETS} AS bucket
+                FROM ({{keys}}) k
+                ORDER BY 1
+            ) b;
+    """
+    recompute = """
+            INSERT INTO expense_daily_rollup AS r
+                (day, category_id, currency, total, cnt, min_amount, max_amount)
+            SELECT e.expense_date, e.category_id, COALESCE(e.currency, 'UAH'),
+                   SUM(e.amount), COUNT(*), MIN(e.amount), MAX(e.amount)
+            FROM expenses e
+            JOIN ({keys}) k
+              ON e.expense_date = k.day
+             AND e.category_id = k.category_id
+             AND COALESCE(e.currency, 'UAH') = k.currency
+            GROUP BY 1, 2, 3
+            ON CONFLICT (day, category_id, currency) DO UPDATE
+            SET total = EXCLUDED.total,
+                cnt = EXCLUDED.cnt,
+                min_amount = EXCLUDED.min_amount,
+                max_amount = EXCLUDED.max_amount;
+
+            DELETE FROM expense_daily_rollup r
+            USING ({keys}) k
+            WHERE r.day = k.day AND r.category_id = k.category_id AND r.currency = k.currency
+              AND NOT EXISTS (
+                  SELECT 1 FROM expenses e
+                  WHERE e.expense_date = k.day
+                    AND e.category_id = k.category_id
+                    AND COALESCE(e.currency, 'UAH') = k.currency
+              );
+    """
+    add = """
+            INSERT INTO expense_daily_rollup AS r
+                (day, category_id, currency, total, cnt, min_amount, max_amount)
+            SELECT expense_date, category_id, COALESCE(currency, 'UAH'),
+                   SUM(amount), COUNT(*), MIN(amount), MAX(amount)
+            FROM new_rows
+            GROUP BY 1, 2, 3
+            ON CONFLICT (day, category_id, currency) DO UPDATE
+            SET total = r.total + EXCLUDED.total,
+                cnt = r.cnt + EXCLUDED.cnt,
+                min_amount = LEAST(r.min_amount, EXCLUDED.min_amount),
+                max_amount = GREATEST(r.max_amount, EXCLUDED.max_amount);
+    """
+    inserted_keys = """
+            SELECT DISTINCT expense_date AS day, category_id, COALESCE(currency, 'UAH') AS currency
+            FROM new_rows
+        """
+    for name, keys_sql, body in (
+        ("expense_rollup_insert", inserted_keys, add),
+        *((name, keys_sql, recompute.format(keys=keys_sql)) for name, keys_sql in _ROLLUP_CHANGED_KEYS),
+    ):
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                {lock.format(keys=keys_sql)}
+                {body}
+                RETURN NULL;
+            END $$;
+        """)
+
+
+def _m10_change_log_gate(cur):
+    # Журнал змін потрібен лише потокам інкрементального експорту: поки жодного потоку немає
+    # (export_watermarks порожня), тригери нічого не пишуть — інакше журнал ріс би без кінця.
+    # Новий потік реєструється окремою транзакцією, що чекає на вже розпочаті записи (incremental_export._register).
+    for name, _, _, body in _CHANGE_LOG_TRIGGERS:
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION {name}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM export_watermarks) THEN
+                    {body}
+                END IF;
+                RETURN NULL;
+            END $$;
+        """)
+    cur.execute(f"""
+        CREATE OR REPLACE FUNCTION category_changes_update() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM export_watermarks) THEN
+                {_CATEGORY_CHANGES}
+            END IF;
+            RETURN NULL;
+        END $$;
+    """)
+
+
+def _m11_amounts_in_cents(cur):
+    # _s11_amounts_in_cents переводить суми SQLite з REAL у копійки; у Postgres вони й так NUMERIC(12, 2)
+    pass
+
+
+def _m12_open_ended_rates(cur):
+    # Розгортання з міграції 6 закінчувалось на max(остання дата курсу, сьогодні) + рік на момент
+    # завантаження — далі витрати ставали «без курсу», хоча попередній курс є. Тепер exchange_rate_days
+    # тримає лише закриті діапазони (до дня перед наступним курсом), а останній курс кожної валюти діє
+    # без кінця через exchange_rate_tail: одна строка на валюту, звіт приєднує її за умовою day >= valid_from.
+    cur.execute("""
+        CREATE OR REPLACE VIEW exchange_rate_tail (currency, valid_from, rate) AS
+        SELECT DISTINCT ON (currency) currency, rate_date, rate
+        FROM exchange_rates
+        WHERE currency <> 'UAH'
+        ORDER BY currency, rate_date DESC;
+    """)
+    cur.execute("""
+        CREATE OR REPLACE FUNCTION rebuild_exchange_rate_days() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM exchange_rate_days;
+            INSERT INTO exchange_rate_days (currency, day, rate)
+            SELECT rg.currency, d::date, rg.rate
+            FROM (
+                SELECT currency, rate,
+                       rate_date AS valid_from,
+                       LEAD(rate_date) OVER (PARTITION BY currency ORDER BY rate_date) AS valid_to
+                FROM exchange_rates
+                WHERE currency <> 'UAH'
+            ) rg
+            CROSS JOIN LATERAL generate_series(rg.valid_from, rg.valid_to - 1, INTERVAL '1 day') AS d
+            WHERE rg.valid_to IS NOT NULL
+            UNION ALL
+            SELECT 'UAH', '-infinity', 1;
+            RETURN NULL;
+        END $$;
+    """)
+    # перебудувати вже розгорнуті курси: тригер рівня інструкції спрацьовує й без змінених рядків
+    cur.execute("UPDATE exchange_rates SET rate = rate WHERE false;")
+
+
+MIGRATIONS = [
+    (1, "base schema: categories, expenses", _m1_base_schema),
+    (2, "indexes for report access paths", _m2_report_indexes),
+    (3, "pg_trgm indexes for title/category search", _m3_trigram_search),
+    (4, "daily rollup table maintained by triggers", _m4_daily_rollup),
+    (5, "cache version counters", _m5_cache_versions),
+    (6, "exchange rates expanded per day", _m6_exchange_rates),
+    (7, "expenses change counter for the analytics snapshot", _m7_expenses_version),
+    (8, "expenses change log for incremental export", _m8_expense_changes),
+    (9, "rollup recompute as upsert (concurrent updates of one key)", _m9_rollup_upsert),
+    (10, "change log only while export streams exist", _m10_change_log_gate),
+    (11, "amounts as integer cents (nothing to change in Postgres)", _m11_amounts_in_cents),
+    (12, "last exchange rate open-ended (exchange_rate_tail)", _m12_open_ended_rates),
+]
+
+
+# ---------- SQLite (DB_BACKEND=sqlite) ----------
+# Та сама схема з тими самими номерами версій. Відмінності:
+#   - суми — цілі копійки з типом CENTS (міграція 11; Decimal з них робить sqlite_backend), курси — REAL;
+#   - тригери — на рівні рядка (transition tables у SQLite немає);
+#   - exchange_rate_days — подання, що розгортає курси по днях під час запиту (CTE в тригерах SQLite заборонені).
+def _s1_base_schema(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
+        );
+    """)
+    # AUTOINCREMENT: як SERIAL, id видалених витрат не використовуються повторно
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            amount REAL NOT NULL CHECK (amount > 0),
+            expense_date DATE NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE RESTRICT,
+            description TEXT,
+            currency VARCHAR(10) DEFAULT 'UAH'
+        );
+    """)
+
+
+def _s2_report_indexes(cur):
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date_id ON expenses (expense_date, id);")
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_category_currency_amount
+        ON expenses (category_id, currency, amount);
+    """)
+    # INCLUDE у SQLite немає — покривні колонки просто йдуть у ключ
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_date_covering
+        ON expenses (expense_date, category_id, currency, amount);
+    """)
+    cur.execute("ANALYZE;")
+
+
+def _s3_text_search(cur):
+    # pg_trgm немає: пошук за назвою — LIKE без індексу
+    pass
+
+
+def _s4_daily_rollup(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS expense_daily_rollup (
+            day DATE NOT NULL,
+            category_id INTEGER NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            total REAL NOT NULL,
+            cnt INTEGER NOT NULL,
+            min_amount REAL NOT NULL,
+            max_amount REAL NOT NULL,
+            PRIMARY KEY (day, category_id, currency)
+        ) WITHOUT ROWID;
+    """)
+
+    key = "day = {r}.expense_date AND category_id = {r}.category_id AND currency = COALESCE({r}.currency, 'UAH')"
+    rows_of_key = ("expense_date = {r}.expense_date AND category_id = {r}.category_id"
+                   " AND COALESCE(currency, 'UAH') = COALESCE({r}.currency, 'UAH')")
+    add = """
+        INSERT INTO expense_daily_rollup (day, category_id, currency, total, cnt, min_amount, max_amount)
+        VALUES (NEW.expense_date, NEW.category_id, COALESCE(NEW.currency, 'UAH'), NEW.amount, 1, NEW.amount, NEW.amount)
+        ON CONFLICT (day, category_id, currency) DO UPDATE
+        SET total = ROUND(total + excluded.total, 2),
+            cnt = cnt + 1,
+            min_amount = MIN(min_amount, excluded.min_amount),
+            max_amount = MAX(max_amount, excluded.max_amount);
+    """
+    # суму й кількість віднімаємо; min/max перераховуємо з expenses, лише якщо видалено саме крайню суму
+    remove = f"""
+        UPDATE expense_daily_rollup
+        SET total = ROUND(total - OLD.amount, 2), cnt = cnt - 1
+        WHERE {key.format(r="OLD")};
+        DELETE FROM expense_daily_rollup WHERE {key.format(r="OLD")} AND cnt <= 0;
+        UPDATE expense_daily_rollup
+        SET min_amount = (SELECT MIN(amount) FROM expenses WHERE {rows_of_key.format(r="OLD")}),
+            max_amount = (SELECT MAX(amount) FROM expenses WHERE {rows_of_key.format(r="OLD")})
+        WHERE {key.format(r="OLD")} AND (OLD.amount <= min_amount OR OLD.amount >= max_amount);
+    """
+    for name, event, body in (
+        ("expenses_rollup_insert", "INSERT", add),
+        ("expenses_rollup_delete", "DELETE", remove),
+        ("expenses_rollup_update", "UPDATE OF expense_date, category_id, currency, amount", remove + add),
+    ):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+        cur.execute(f"CREATE TRIGGER {name} AFTER {event} ON expenses BEGIN {body} END;")
+
+    cur.execute("DELETE FROM expense_daily_rollup;")
+    cur.execute("""
+        INSERT INTO expense_daily_rollup
+            (day, category_id, currency, total, cnt, min_amount, max_amount)
+        SELECT expense_date, category_id, COALESCE(currency, 'UAH'),
+               ROUND(SUM(amount), 2), COUNT(*), MIN(amount), MAX(amount)
+        FROM expenses
+        GROUP BY 1, 2, 3;
+    """)
+
+
+def _s5_cache_versions(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    cur.execute("INSERT INTO cache_versions (name) VALUES ('categories') ON CONFLICT (name) DO NOTHING;")
+    _sqlite_cache_version_triggers(cur, "categories")
+
+
+def _sqlite_cache_version_triggers(cur, table: str, events: tuple[str, ...] = ("INSERT", "UPDATE", "DELETE")):
+    for event in events:
+        name = f"{table}_cache_version_{event.lower()}"
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+        cur.execute(f"""
+            CREATE TRIGGER {name} AFTER {event} ON {table}
+            BEGIN
+                UPDATE cache_versions SET version = version + 1 WHERE name = '{table}';
+            END;
+        """)
+
+
+def _s6_exchange_rates(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS exchange_rates (
+            rate_date DATE NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            rate REAL NOT NULL CHECK (rate > 0),
+            PRIMARY KEY (currency, rate_date)
+        );
+    """)
+    # ті самі рядки, що таблиця exchange_rate_days у Postgres (діапазони — як у rebuild_exchange_rate_days),
+    # але рахуються під час запиту; exchange_rate_day() реєструє sqlite_backend
+    cur.execute("DROP VIEW IF EXISTS exchange_rate_days;")
+    cur.execute("""
+        CREATE VIEW exchange_rate_days (currency, day, rate) AS
+        WITH RECURSIVE ranges AS (
+            SELECT currency, rate, rate_date AS valid_from,
+                   COALESCE(
+                       date(LEAD(rate_date) OVER (PARTITION BY currency ORDER BY rate_date), '-1 day'),
+                       date(MAX(rate_date, date('now')), '+366 days')
+                   ) AS valid_to
+            FROM exchange_rates
+            WHERE currency <> 'UAH'
+        ),
+        days (currency, day, rate, valid_to) AS (
+            SELECT currency, valid_from, rate, valid_to FROM ranges
+            UNION ALL
+            SELECT currency, date(day, '+1 day'), rate, valid_to FROM days WHERE day < valid_to
+        )
+        SELECT currency, day, rate FROM days
+        UNION ALL
+        SELECT 'UAH', '-infinity', 1;
+    """)
+    cur.execute("INSERT INTO cache_versions (name) VALUES ('exchange_rates') ON CONFLICT (name) DO NOTHING;")
+    _sqlite_cache_version_triggers(cur, "exchange_rates")
+
+
+def _s7_expenses_version(cur):
+    # як _m7_expenses_version; тригери в SQLite рядкові — лічильник росте на кожен змінений рядок
+    cur.execute("INSERT INTO cache_versions (name) VALUES ('expenses') ON CONFLICT (name) DO NOTHING;")
+    _sqlite_cache_version_triggers(cur, "expenses", ("UPDATE", "DELETE"))
+
+
+def _s8_expense_changes(cur):
+    # як _m8_expense_changes; транзакції в SQLite пишуть по черзі, тож позиція — просто seq
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS expense_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            expense_id INTEGER,
+            expense_date DATE,
+            op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D', 'T')),
+            changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            stream TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    _sqlite_change_log_triggers(cur, "")
+
+
+def _sqlite_change_log_triggers(cur, condition: str):
+    """Тригери журналу змін; condition — додаткова умова WHEN (AND ...) для кожного."""
+    for name, event, when, body in (
+        ("expense_changes_insert", "INSERT", "", """
+            INSERT INTO expense_changes (expense_id, expense_date, op) VALUES (NEW.id, NEW.expense_date, 'I');
+        """),
+        ("expense_changes_update", "UPDATE", "", """
+            INSERT INTO expense_changes (expense_id, expense_date, op) VALUES (NEW.id, NEW.expense_date, 'U');
+            INSERT INTO expense_changes (expense_id, expense_date, op)
+            SELECT OLD.id, OLD.expense_date, 'U'
+            WHERE OLD.id <> NEW.id OR OLD.expense_date <> NEW.expense_date;
+        """),
+        ("expense_changes_delete", "DELETE", "", """
+            INSERT INTO expense_changes (expense_id, expense_date, op) VALUES (OLD.id, OLD.expense_date, 'D');
+        """),
+        ("category_changes_update", "UPDATE OF name", "OLD.name IS NOT NEW.name", """
+            INSERT INTO expense_changes (expense_id, expense_date, op)
+            SELECT id, expense_date, 'U' FROM expenses WHERE category_id = NEW.id;
+        """),
+    ):
+        table = "categories" if name.startswith("category") else "expenses"
+        conditions = " AND ".join(c for c in (when, condition) if c)
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+        cur.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table}"
+                    f"{' WHEN ' + conditions if conditions else ''} BEGIN {body} END;")
+
+
+def _s9_rollup_upsert(cur):
+    # _m9_rollup_upsert виправляє перерахунок у тригерах Postgres; рядкові тригери SQLite (_s4_daily_rollup)
+    # ключ не видаляють і не вставляють заново, а записи йдуть по черзі — змінювати нічого
+    pass
+
+
+def _s10_change_log_gate(cur):
+    # як _m10_change_log_gate; записи в SQLite йдуть по черзі, тож реєстрація потоку окремо не чекає
+    _sqlite_change_log_triggers(cur, "EXISTS (SELECT 1 FROM export_watermarks)")
+
+
+def _sqlite_rollup_triggers(cur):
+    """Тригери rollup, як у _s4_daily_rollup, але над сумами в копійках — без ROUND."""
+    key = "day = {r}.expense_date AND category_id = {r}.category_id AND currency = COALESCE({r}.currency, 'UAH')"
+    rows_of_key = ("expense_date = {r}.expense_date AND category_id = {r}.category_id"
+                   " AND COALESCE(currency, 'UAH') = COALESCE({r}.currency, 'UAH')")
+    add = """
+        INSERT INTO expense_daily_rollup (day, category_id, currency, total, cnt, min_amount, max_amount)
+        VALUES (NEW.expense_date, NEW.category_id, COALESCE(NEW.currency, 'UAH'), NEW.amount, 1, NEW.amount, NEW.amount)
+        ON CONFLICT (day, category_id, currency) DO UPDATE
+        SET total = total + excluded.total,
+            cnt = cnt + 1,
+            min_amount = MIN(min_amount, excluded.min_amount),
+            max_amount = MAX(max_amount, excluded.max_amount);
+    """
+    remove = f"""
+        UPDATE expense_daily_rollup
+        SET total = total - OLD.amount, cnt = cnt - 1
+        WHERE {key.format(r="OLD")};
+        DELETE FROM expense_daily_rollup WHERE {key.format(r="OLD")} AND cnt <= 0;
+        UPDATE expense_daily_rollup
+        SET min_amount = (SELECT MIN(amount) FROM expenses WHERE {rows_of_key.format(r="OLD")}),
+            max_amount = (SELECT MAX(amount) FROM expenses WHERE {rows_of_key.format(r="OLD")})
+        WHERE {key.format(r="OLD")} AND (OLD.amount <= min_amount OR OLD.amount >= max_amount);
+    """
+    for name, event, body in (
+        ("expenses_rollup_insert", "INSERT", add),
+        ("expenses_rollup_delete", "DELETE", remove),
+        ("expenses_rollup_update", "UPDATE OF expense_date, category_id, currency, amount", remove + add),
+    ):
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+        cur.execute(f"CREATE TRIGGER {name} AFTER {event} ON expenses BEGIN {body} END;")
+
+
+def _s11_amounts_in_cents(cur):
+    # REAL не тримає копійки точно, а суми з нього доводилося округлювати. Тепер суми — цілі копійки
+    # з оголошеним типом CENTS (Decimal з них робить sqlite_backend). Тип колонки в SQLite не змінити:
+    # expenses перебудовується з тими самими id і лічильником AUTOINCREMENT, rollup заповнюється заново,
+    # індекси й тригери зникають разом зі старими таблицями і створюються знову.
+    cur.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'expenses';")
+    last_id = cur.fetchone()[0]
+    # тригер на categories посилається на expenses — без нього перейменування не перевірятиме схему
+    cur.execute("DROP TRIGGER IF EXISTS category_changes_update;")
+    cur.execute("""
+        CREATE TABLE expenses_cents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            amount CENTS INTEGER NOT NULL CHECK (amount > 0),
+            expense_date DATE NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE RESTRICT,
+            description TEXT,
+            currency VARCHAR(10) DEFAULT 'UAH'
+        );
+    """)
+    cur.execute("""
+        INSERT INTO expenses_cents (id, title, amount, expense_date, category_id, description, currency)
+        SELECT id, title, CAST(ROUND(amount * 100) AS INTEGER), expense_date, category_id, description, currency
+        FROM expenses;
+    """)
+    cur.execute("DROP TABLE expenses;")
+    cur.execute("ALTER TABLE expenses_cents RENAME TO expenses;")
+    cur.execute("DELETE FROM sqlite_sequence WHERE name IN ('expenses', 'expenses_cents');")
+    cur.execute("INSERT INTO sqlite_sequence (name, seq) SELECT 'expenses', MAX(%s, COALESCE(MAX(id), 0)) FROM expenses;",
+                (last_id,))
+
+    cur.execute("DROP TABLE expense_daily_rollup;")
+    cur.execute("""
+        CREATE TABLE expense_daily_rollup (
+            day DATE NOT NULL,
+            category_id INTEGER NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            total CENTS INTEGER NOT NULL,
+            cnt INTEGER NOT NULL,
+            min_amount CENTS INTEGER NOT NULL,
+            max_amount CENTS INTEGER NOT NULL,
+            PRIMARY KEY (day, category_id, currency)
+        ) WITHOUT ROWID;
+    """)
+    cur.execute("""
+        INSERT INTO expense_daily_rollup
+            (day, category_id, currency, total, cnt, min_amount, max_amount)
+        SELECT expense_date, category_id, COALESCE(currency, 'UAH'), SUM(amount), COUNT(*), MIN(amount), MAX(amount)
+        FROM expenses
+        GROUP BY 1, 2, 3;
+    """)
+
+    _s2_report_indexes(cur)
+    _sqlite_rollup_triggers(cur)
+    _sqlite_cache_version_triggers(cur, "expenses", ("UPDATE", "DELETE"))
+    _sqlite_change_log_triggers(cur, "EXISTS (SELECT 1 FROM export_watermarks)")
+
+
+def _s12_open_ended_rates(cur):
+    # як _m12_open_ended_rates: подання exchange_rate_days — лише закриті діапазони,
+    # останній курс валюти — в exchange_rate_tail (MAX з "голими" колонками бере rate того ж рядка)
+    cur.execute("DROP VIEW IF EXISTS exchange_rate_days;")
+    cur.execute("""
+        CREATE VIEW exchange_rate_days (currency, day, rate) AS
+        WITH RECURSIVE ranges AS (
+            SELECT * FROM (
+                SELECT currency, rate, rate_date AS valid_from,
+                       date(LEAD(rate_date) OVER (PARTITION BY currency ORDER BY rate_date), '-1 day') AS valid_to
+                FROM exchange_rates
+                WHERE currency <> 'UAH'
+            )
+            WHERE valid_to IS NOT NULL
+        ),
+        days (currency, day, rate, valid_to) AS (
+            SELECT currency, valid_from, rate, valid_to FROM ranges
+            UNION ALL
+            SELECT currency, date(day, '+1 day'), rate, valid_to FROM days WHERE day < valid_to
+        )
+        SELECT currency, day, rate FROM days
+        UNION ALL
+        SELECT 'UAH', '-infinity', 1;
+    """)
+    cur.execute("DROP VIEW IF EXISTS exchange_rate_tail;")
+    cur.execute("""
+        CREATE VIEW exchange_rate_tail (currency, valid_from, rate) AS
+        SELECT currency, MAX(rate_date), rate
+        FROM exchange_rates
+        WHERE currency <> 'UAH'
+        GROUP BY currency;
+    """)
+
+
+SQLITE_MIGRATIONS = [
+    (1, "base schema: categories, expenses", _s1_base_schema),
+    (2, "indexes for report access paths", _s2_report_indexes),
+    (3, "text search (no pg_trgm in SQLite)", _s3_text_search),
+    (4, "daily rollup table maintained by triggers", _s4_daily_rollup),
+    (5, "cache version counters", _s5_cache_versions),
+    (6, "exchange rates expanded per day (view)", _s6_exchange_rates),
+    (7, "expenses change counter for the analytics snapshot", _s7_expenses_version),
+    (8, "expenses change log for incremental export", _s8_expense_changes),
+    (9, "rollup recompute as upsert (nothing to change in SQLite)", _s9_rollup_upsert),
+    (10, "change log only while export streams exist", _s10_change_log_gate),
+    (11, "amounts as integer cents", _s11_amounts_in_cents),
+    (12, "last exchange rate open-ended (exchange_rate_tail)", _s12_open_ended_rates),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+assert SQLITE_MIGRATIONS[-1][0] == LATEST_VERSION, "міграції SQLite мають іти слідом за Postgres"
+
+_SCHEMA_VERSION_DDL = {
+    "postgres": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """,
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """,
+}
+
+
+def _lock(cur):
+    """Одночасно мігрує лише один процес: блокування до кінця транзакції."""
+    if DB_BACKEND == "sqlite":
+        # перший запит транзакції — запис (хоч і порожній): SQLite бере блокування запису, інші чекають
+        cur.execute("UPDATE schema_version SET version = version WHERE 0;")
+    else:
+        cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATIONS_LOCK_KEY,))
+
+
+def current_version(cur) -> int:
+    if DB_BACKEND == "sqlite":
+        cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'schema_version';")
+    else:
+        cur.execute("SELECT to_regclass('schema_version') IS NOT NULL;")
+    if not cur.fetchone()[0]:
+        return 0
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;")
+    return cur.fetchone()[0]
+
+
+def migrate(conn) -> list[int]:
+    """Застосовує всі ще не застосовані міграції. Повертає номери застосованих."""
+    with conn.cursor() as cur:
+        version = current_version(cur)
+    conn.commit()
+    if version >= LATEST_VERSION:
+        return []
+
+    applied = []
+    with conn.cursor() as cur:
+        if DB_BACKEND == "postgres":
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATIONS_LOCK_KEY,))
+        cur.execute(_SCHEMA_VERSION_DDL[DB_BACKEND])
+        conn.commit()
+
+    for number, description, step in (SQLITE_MIGRATIONS if DB_BACKEND == "sqlite" else MIGRATIONS):
+        with conn.cursor() as cur:
+            _lock(cur)
+            cur.execute("SELECT 1 FROM schema_version WHERE version = %s;", (number,))
+            if cur.fetchone():
+                conn.commit()
+                continue
+            try:
+                step(cur)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s);",
+                    (number, description)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                logger.exception("Migration %s failed", number)
+                raise
+        logger.info("Applied migration %s: %s", number, description)
+        applied.append(number)
+    return applied
@@ -0,0 +1,567 @@
+# partitioning.py
+"""
+Секціонування expenses за expense_date (RANGE, по місяцях або роках).
+
+Вмикається окремо (не міграцією), бо для великої таблиці це довга операція:
+    python partitioning.py migrate [--interval month|year] [--batch 20000]
+    python partitioning.py ensure            # створити секції наперед (запускати з cron)
+    python partitioning.py list
+    python partitioning.py detach expenses_p2023_01
+    python partitioning.py attach expenses_p2023_01
+    python partitioning.py archive expenses_p2023_01
+
+migrate переносить дані онлайн: нова секціонована таблиця заповнюється пакетами по id, а зміни,
+що відбуваються під час копіювання, дзеркалить тригер. Коротке ексклюзивне блокування потрібне
+лише на фінальну перевірку і перейменування. Стара таблиця лишається як expenses_unpartitioned.
+
+Секції: expenses_p2024_01 (місяць) або expenses_p2024 (рік) і expenses_default для дат без секції.
+Звіти за період отримують partition pruning автоматично — WHERE по expense_date вже є в усіх запитах.
+"""
+import os
+import re
+import csv
+import sys
+import argparse
+import tempfile
+from datetime import date
+
+from db import DB_BACKEND, get_conn, init_db
+from importer import CSV_HEADER
+
+PARTITION_INTERVAL = os.getenv("PARTITION_INTERVAL", "month")
+PARTITION_AHEAD = int(os.getenv("PARTITION_AHEAD", "3"))   # скільки майбутніх періодів тримати готовими
+MIGRATE_BATCH_ROWS = int(os.getenv("PARTITION_MIGRATE_BATCH", "20000"))
+ARCHIVE_DIR = "archive"
+
+DEFAULT_PARTITION = "expenses_default"
+_NEW_TABLE = "expenses_part"
+_OLD_TABLE = "expenses_unpartitioned"
+_MIRROR_TRIGGER = "expenses_partition_mirror"
+_NAME_RE = re.compile(r"^expenses_p(\d{4})(?:_(\d{2}))?$")
+_BOUND_RE = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+# ---------- періоди ----------
+def _period_start(d: date, interval: str) -> date:
+    return date(d.year, d.month, 1) if interval == "month" else date(d.year, 1, 1)
+
+
+def _next_period(d: date, interval: str) -> date:
+    if interval == "year":
+        return date(d.year + 1, 1, 1)
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def partition_name(start: date, interval: str) -> str:
+    return f"expenses_p{start.year}_{start.month:02d}" if interval == "month" else f"expenses_p{start.year}"
+
+
+def partition_bounds(name: str) -> tuple[date, date, str]:
+    """expenses_p2024_01 -> (2024-01-01, 2024-02-01, "month")."""
+    m = _NAME_RE.match(name)
+    if not m:
+        raise ValueError(f"Невідома назва секції: {name}")
+    interval = "month" if m.group(2) else "year"
+    start = date(int(m.group(1)), int(m.group(2) or 1), 1)
+    return start, _next_period(start, interval), interval
+
+
+# ---------- каталог ----------
+def is_partitioned(cur) -> bool:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = 'expenses'::regclass;")
+    return cur.fetchone()[0] == "p"
+
+
+def _partitions(cur, table: str = "expenses") -> list[tuple[str, date | None, date | None]]:
+    cur.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname;
+    """, (table,))
+    result = []
+    for name, bound in cur.fetchall():
+        m = _BOUND_RE.search(bound)
+        if m:
+            result.append((name, date.fromisoformat(m.group(1)), date.fromisoformat(m.group(2))))
+        else:
+            result.append((name, None, None))   # DEFAULT
+    return result
+
+
+def list_partitions() -> list[tuple]:
+    """(назва, від, до, рядків ~, розмір) для кожної секції expenses."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if not is_partitioned(cur):
+                return []
+            result = []
+            for name, start, end in _partitions(cur):
+                cur.execute("""
+                    SELECT GREATEST(reltuples, 0)::bigint, pg_size_pretty(pg_total_relation_size(oid))
+                    FROM pg_class WHERE oid = %s::regclass;
+                """, (name,))
+                rows, size = cur.fetchone()
+                result.append((name, start, end, rows, size))
+            return result
+    finally:
+        conn.close()
+
+
+def _create_partition(cur, table: str, start: date, end: date, interval: str) -> str:
+    """
+    Створює секцію [start, end). Якщо в DEFAULT вже є рядки з цього діапазону (дата "з майбутнього"),
+    вони переносяться в нову секцію — інакше PostgreSQL не дозволить її створити.
+    """
+    name = partition_name(start, interval)
+    cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (DEFAULT_PARTITION,))
+    has_default = cur.fetchone()[0]
+
+    moved = False
+    if has_default:
+        cur.execute(f"LOCK TABLE {DEFAULT_PARTITION} IN ACCESS EXCLUSIVE MODE;")
+        cur.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE expense_date >= %s AND expense_date < %s);",
+            (start, end)
+        )
+        moved = cur.fetchone()[0]
+
+    if not moved:
+        cur.execute(
+            f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s);", (start, end)
+        )
+        return name
+
+    # рядки переносяться напряму між секціями — тригери rollup (на батьківській таблиці) не спрацьовують,
+    # і це правильно: набір витрат не змінюється
+    cur.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);")
+    cur.execute(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE expense_date >= %s AND expense_date < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved;
+    """, (start, end))
+    cur.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s);", (start, end))
+    return name
+
+
+def _current_interval(cur) -> str:
+    for name, start, end in _partitions(cur):
+        if start is not None:
+            return partition_bounds(name)[2]
+    return PARTITION_INTERVAL
+
+
+def ensure_future_partitions(ahead: int = PARTITION_AHEAD) -> list[str]:
+    """Створює відсутні секції від поточного періоду до поточного + ahead. Повертає створені."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if not is_partitioned(cur):
+                return []
+            interval = _current_interval(cur)
+            existing = {name for name, _, _ in _partitions(cur)}
+        conn.commit()
+
+        created = []
+        start = _period_start(date.today(), interval)
+        for _ in range(ahead + 1):
+            end = _next_period(start, interval)
+            if partition_name(start, interval) not in existing:
+                with conn.cursor() as cur:
+                    created.append(_create_partition(cur, "expenses", start, end, interval))
+                conn.commit()
+            start = end
+        return created
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ---------- онлайн-міграція ----------
+def _indexes_to_copy(cur) -> list[tuple[str, str]]:
+    """(назва, CREATE INDEX ...) для індексів expenses, крім тих, що забезпечують обмеження (PK)."""
+    cur.execute("""
+        SELECT i.relname, pg_get_indexdef(i.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = 'expenses'::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = x.indexrelid)
+        ORDER BY i.relname;
+    """)
+    return cur.fetchall()
+
+
+def _triggers_to_copy(cur) -> list[tuple[str, str]]:
+    cur.execute("""
+        SELECT tgname, pg_get_triggerdef(oid)
+        FROM pg_trigger
+        WHERE tgrelid = 'expenses'::regclass AND NOT tgisinternal AND tgname <> %s
+        ORDER BY tgname;
+    """, (_MIRROR_TRIGGER,))
+    return cur.fetchall()
+
+
+def _prepare(conn, interval: str, ahead: int, progress):
+    """Нова секціонована таблиця з секціями, індексами і тригером-дзеркалом на старій."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL;", (_NEW_TABLE,))
+        if cur.fetchone()[0]:
+            progress(f"{_NEW_TABLE} вже існує — продовжую перенесення")
+            conn.commit()
+            return
+
+        cur.execute(f"""
+            CREATE TABLE {_NEW_TABLE} (LIKE expenses INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            PARTITION BY RANGE (expense_date);
+        """)
+        # PK секціонованої таблиці мусить містити ключ секціонування
+        cur.execute(f"ALTER TABLE {_NEW_TABLE} ADD PRIMARY KEY (id, expense_date);")
+        cur.execute(f"""
+            ALTER TABLE {_NEW_TABLE} ADD FOREIGN KEY (category_id)
+            REFERENCES categories(id) ON DELETE RESTRICT;
+        """)
+
+        cur.execute("SELECT MIN(expense_date) FROM expenses;")
+        first = cur.fetchone()[0] or date.today()
+        start = _period_start(first, interval)
+        last = _period_start(date.today(), interval)
+        for _ in range(ahead):
+            last = _next_period(last, interval)
+        while start <= last:
+            end = _next_period(start, interval)
+            _create_partition(cur, _NEW_TABLE, start, end, interval)
+            start = end
+        cur.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {_NEW_TABLE} DEFAULT;")
+
+        # індекси — під тимчасовими назвами (справжні поки зайняті старою таблицею)
+        for name, ddl in _indexes_to_copy(cur):
+            ddl = ddl.replace(f"INDEX {name} ON ", f"INDEX {name}_p ON ", 1)
+            ddl = re.sub(r" ON (ONLY )?(\S+\.)?expenses ", f" ON {_NEW_TABLE} ", ddl, count=1)
+            cur.execute(ddl)
+
+        # усе, що записують у expenses під час перенесення, одразу потрапляє і в нову таблицю
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION expenses_partition_mirror() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {_NEW_TABLE} WHERE id = OLD.id;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    INSERT INTO {_NEW_TABLE} SELECT NEW.* ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END $$;
+        """)
+        cur.execute(f"""
+            CREATE TRIGGER {_MIRROR_TRIGGER}
+            AFTER INSERT OR UPDATE OR DELETE ON expenses
+            FOR EACH ROW EXECUTE FUNCTION expenses_partition_mirror();
+        """)
+    conn.commit()
+    progress(f"Створено {_NEW_TABLE} (інтервал: {interval})")
+
+
+def _copy_batches(conn, batch_rows: int, progress) -> int:
+    """
+    Копіює рядки пакетами по id (кожен пакет — окрема коротка транзакція).
+    FOR SHARE не дає змінити рядок, поки пакет його копіює; зміни після цього дзеркалить тригер.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM expenses;")
+        max_id = cur.fetchone()[0]
+    conn.commit()
+
+    last_id, copied = 0, 0
+    while last_id < max_id:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                WITH batch AS (
+                    SELECT * FROM expenses
+                    WHERE id > %s AND id <= %s
+                    ORDER BY id
+                    LIMIT %s
+                    FOR SHARE
+                ),
+                copied AS (
+                    INSERT INTO {_NEW_TABLE} SELECT * FROM batch ON CONFLICT DO NOTHING
+                )
+                SELECT MAX(id), COUNT(*) FROM batch;
+            """, (last_id, max_id, batch_rows))
+            batch_max, count = cur.fetchone()
+        conn.commit()
+        if not count:
+            break
+        last_id, copied = batch_max, copied + count
+        progress(f"  скопійовано {copied} (id до {last_id} з {max_id})")
+    return copied
+
+
+def _swap(conn, progress):
+    """Під коротким ексклюзивним блокуванням: перевірка, перейменування, тригери і послідовність."""
+    with conn.cursor() as cur:
+        cur.execute("LOCK TABLE expenses IN ACCESS EXCLUSIVE MODE;")
+        cur.execute(f"SELECT (SELECT COUNT(*) FROM expenses), (SELECT COUNT(*) FROM {_NEW_TABLE});")
+        old_count, new_count = cur.fetchone()
+        if old_count != new_count:
+            raise RuntimeError(f"Кількість рядків не збігається: expenses={old_count}, {_NEW_TABLE}={new_count}")
+
+        indexes = [name for name, _ in _indexes_to_copy(cur)]
+        triggers = _triggers_to_copy(cur)
+        cur.execute("SELECT pg_get_serial_sequence('expenses', 'id');")
+        sequence = cur.fetchone()[0]
+
+        cur.execute(f"DROP TRIGGER {_MIRROR_TRIGGER} ON expenses;")
+        cur.execute("DROP FUNCTION expenses_partition_mirror();")
+        # тригери (rollup тощо) переходять на нову таблицю; на старій вони більше не потрібні
+        for name, _ in triggers:
+            cur.execute(f"DROP TRIGGER {name} ON expenses;")
+
+        cur.execute(f"ALTER TABLE expenses RENAME TO {_OLD_TABLE};")
+        for name in indexes:
+            cur.execute(f"ALTER INDEX {name} RENAME TO {name}_old;")
+        cur.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND conname LIKE %s;",
+            (_OLD_TABLE, "expenses\\_%")
+        )
+        for (name,) in cur.fetchall():
+            cur.execute(f"ALTER TABLE {_OLD_TABLE} RENAME CONSTRAINT {name} TO {_OLD_TABLE}{name[len('expenses'):]};")
+
+        cur.execute(f"ALTER TABLE {_NEW_TABLE} RENAME TO expenses;")
+        for name in indexes:
+            cur.execute(f"ALTER INDEX {name}_p RENAME TO {name};")
+        cur.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = 'expenses'::regclass AND conname LIKE %s;",
+            (_NEW_TABLE + "\\_%",)
+        )
+        for (name,) in cur.fetchall():
+            cur.execute(f"ALTER TABLE expenses RENAME CONSTRAINT {name} TO expenses{name[len(_NEW_TABLE):]};")
+
+        if sequence:
+            # інакше послідовність id видалиться разом зі старою таблицею
+            cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY expenses.id;")
+        for _, ddl in triggers:
+            cur.execute(ddl)
+    conn.commit()
+    progress(f"Таблиці переключено: expenses секціонована, стара — {_OLD_TABLE} ({old_count} рядків)")
+
+
+def migrate_to_partitioned(interval: str = PARTITION_INTERVAL, batch_rows: int = MIGRATE_BATCH_ROWS,
+                           ahead: int = PARTITION_AHEAD, progress=print) -> bool:
+    """Переводить expenses на секціоновану таблицю. False — якщо вона вже секціонована."""
+    if interval not in ("month", "year"):
+        raise ValueError("interval має бути month або year")
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if is_partitioned(cur):
+                conn.commit()
+                return False
+        conn.commit()
+
+        _prepare(conn, interval, ahead, progress)
+        _copy_batches(conn, batch_rows, progress)
+        _swap(conn, progress)
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE expenses;")
+        return True
+    except Exception:
+        if not conn.autocommit:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ---------- старі секції ----------
+def _rollup_remove(cur, start: date, end: date):
+    # DETACH не запускає тригери — агрегати за цей діапазон прибираємо самі
+    cur.execute("DELETE FROM expense_daily_rollup WHERE day >= %s AND day < %s;", (start, end))
+
+
+def _rollup_add(cur, name: str):
+    cur.execute(f"""
+        INSERT INTO expense_daily_rollup AS r
+            (day, category_id, currency, total, cnt, min_amount, max_amount)
+        SELECT expense_date, category_id, COALESCE(currency, 'UAH'),
+               SUM(amount), COUNT(*), MIN(amount), MAX(amount)
+        FROM {name}
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, category_id, currency) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            cnt = r.cnt + EXCLUDED.cnt,
+            min_amount = LEAST(r.min_amount, EXCLUDED.min_amount),
+            max_amount = GREATEST(r.max_amount, EXCLUDED.max_amount);
+    """)
+
+
+def _bump_expenses_version(cur):
+    # DETACH / ATTACH не запускають тригер expenses_cache_version — знімок аналітики перечитаємо самі
+    cur.execute("UPDATE cache_versions SET version = version + 1 WHERE name = 'expenses';")
+
+
+def _log_changes(cur, name: str, op: str):
+    # і тригери журналу змін теж не спрацьовують — інкрементальний експорт має побачити, що рядки секції зникли чи повернулись
+    # (журнал ведеться лише поки є потоки експорту — як у тригерах, міграція 10)
+    cur.execute(f"""
+        INSERT INTO expense_changes (expense_id, expense_date, op) SELECT id, expense_date, %s FROM {name}
+        WHERE EXISTS (SELECT 1 FROM export_watermarks);
+    """, (op,))
+
+
+def detach_partition(name: str) -> None:
+    """Від'єднує секцію: дані лишаються в окремій таблиці, але зі звітів зникають."""
+    start, end, _ = partition_bounds(name)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"ALTER TABLE expenses DETACH PARTITION {name};")
+            _rollup_remove(cur, start, end)
+            _bump_expenses_version(cur)
+            _log_changes(cur, name, "D")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def attach_partition(name: str) -> None:
+    """Повертає раніше від'єднану секцію (межі — з назви) і її агрегати."""
+    start, end, _ = partition_bounds(name)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"ALTER TABLE expenses ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s);", (start, end)
+            )
+            _rollup_add(cur, name)
+            _bump_expenses_version(cur)
+            _log_changes(cur, name, "I")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def archive_partition(name: str, directory: str = ARCHIVE_DIR) -> tuple[str, int]:
+    """
+    Вивантажує секцію в CSV (формат імпорту — її можна повернути через імпорт витрат)
+    і видаляє таблицю. Якщо секція ще приєднана — спершу від'єднує. Повертає (файл, рядків).
+    """
+    start, end, _ = partition_bounds(name)
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT %s::regclass IN (SELECT inhrelid FROM pg_inherits);", (name,))
+            if cur.fetchone()[0]:
+                cur.execute(f"ALTER TABLE expenses DETACH PARTITION {name};")
+                _rollup_remove(cur, start, end)
+                _bump_expenses_version(cur)
+                _log_changes(cur, name, "D")
+
+            os.makedirs(directory, exist_ok=True)
+            filename = os.path.join(directory, f"{name}.csv")
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".csv", dir=directory)
+            try:
+                count = 0
+                with os.fdopen(fd, "w", newline="", encoding="utf-8-sig") as f:
+                    writer = csv.writer(f, delimiter=";")
+                    writer.writerow(CSV_HEADER)
+                    cur.execute(f"""
+                        SELECT p.expense_date, c.name, p.title, p.amount, p.currency, COALESCE(p.description, '')
+                        FROM {name} p
+                        JOIN categories c ON c.id = p.category_id
+                        ORDER BY p.expense_date, p.id;
+                    """)
+                    for row in cur:
+                        writer.writerow(row)
+                        count += 1
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, filename)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            cur.execute(f"DROP TABLE {name};")
+        conn.commit()
+        return filename, count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ---------- командний рядок ----------
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Секціонування таблиці expenses за датою")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="онлайн-перенесення expenses у секціоновану таблицю")
+    p.add_argument("--interval", choices=("month", "year"), default=PARTITION_INTERVAL)
+    p.add_argument("--batch", type=int, default=MIGRATE_BATCH_ROWS, help="рядків у пакеті копіювання")
+    p.add_argument("--ahead", type=int, default=PARTITION_AHEAD, help="майбутніх періодів створити наперед")
+
+    p = sub.add_parser("ensure", help="створити секції на поточний і наступні періоди")
+    p.add_argument("--ahead", type=int, default=PARTITION_AHEAD)
+
+    sub.add_parser("list", help="секції, межі, кількість рядків і розмір")
+
+    for name, help_text in (
+        ("detach", "від'єднати секцію (дані лишаються окремою таблицею)"),
+        ("attach", "повернути від'єднану секцію"),
+        ("archive", f"вивантажити секцію в {ARCHIVE_DIR}/<назва>.csv і видалити її"),
+    ):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("partition", help="назва секції, наприклад expenses_p2023_01")
+
+    args = parser.parse_args(argv)
+    if DB_BACKEND != "postgres":
+        print("Секціонування доступне лише для PostgreSQL (DB_BACKEND=postgres).", file=sys.stderr)
+        return 2
+    init_db()
+
+    def progress(message):
+        print(message, file=sys.stderr)
+
+    if args.command == "migrate":
+        if not migrate_to_partitioned(args.interval, args.batch, args.ahead, progress):
+            print("expenses вже секціонована.")
+        else:
+            print(f"Готово. Після перевірки стару таблицю можна видалити: DROP TABLE {_OLD_TABLE};")
+    elif args.command == "ensure":
+        created = ensure_future_partitions(args.ahead)
+        print("Створено: " + ", ".join(created) if created else "Усі секції вже є.")
+    elif args.command == "list":
+        rows = list_partitions()
+        if not rows:
+            print("expenses не секціонована (python partitioning.py migrate).")
+        for name, start, end, count, size in rows:
+            bounds = f"{start} .. {end}" if start else "DEFAULT"
+            print(f"{name} | {bounds} | ~{count} | {size}")
+    elif args.command == "detach":
+        detach_partition(args.partition)
+        print(f"Секцію {args.partition} від'єднано.")
+    elif args.command == "attach":
+        attach_partition(args.partition)
+        print(f"Секцію {args.partition} приєднано.")
+    elif args.command == "archive":
+        filename, count = archive_partition(args.partition)
+        print(f"Секцію {args.partition} вивантажено в {filename} ({count} рядків) і видалено.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+# plan_check.py
+"""
+Перевірка планів запитів звітів на великому синтетичному наборі даних.
+Кожен звіт з reports.REPORTS виконується через з'єднання, що запам'ятовує його запити, і для кожного
+запиту виконується EXPLAIN (ANALYZE, BUFFERS). Перевіряється:
+  - немає Seq Scan по expenses там, де очікується індекс;
+  - кількість прочитаних буферів (shared hit + read) не більша за бюджет;
+  - час виконання не більший за поріг.
+Бюджети — у BUDGETS за назвою звіту; звіт без бюджету — помилка тесту (tests/test_query_plans.py).
+
+Перевірки — тести pytest; запускати на ОКРЕМІЙ базі (з --reset усі витрати й категорії в ній видаляються):
+    DB_NAME=expense_plans python plan_check.py --reset --rows 1000000    # згенерувати дані
+    DB_BACKEND=postgres DB_NAME=expense_plans python -m pytest tests/test_query_plans.py
+    DB_NAME=expense_plans python plan_check.py                           # те саме, що й pytest вище
+    DB_NAME=expense_plans python plan_check.py --calibrate               # поточні значення й бюджети з запасом
+
+Бюджети нижче підібрані для еталонного набору: 1 000 000 витрат, 40 категорій, --seed 42
+(генератор той самий, що в benchmark.py). На іншому наборі тести пропускаються.
+"""
+import os
+import sys
+import argparse
+from dataclasses import dataclass
+from datetime import timedelta
+
+from db import DB_BACKEND, get_conn, init_db
+from expenses import expenses_page_query
+
+REFERENCE_ROWS = 1_000_000
+PLAN_TIME_FACTOR = float(os.getenv("PLAN_TIME_FACTOR", "1"))   # множник порогів часу для повільніших машин
+
+
+@dataclass
+class PlanBudget:
+    max_buffers: int               # shared hit + read по всіх запитах звіту
+    max_ms: float                  # сума Execution Time з EXPLAIN ANALYZE
+    period: str = "year"           # для звітів за період: month | year | all
+    index_required: bool = True    # Seq Scan по expenses (чи її секціях) — помилка
+    needs_trigram: bool = False    # без pg_trgm пошук за назвою законно читає всю таблицю
+    rollup_only: bool = False      # запит не повинен звертатися до expenses взагалі
+
+
+BUDGETS = {
+    "expenses-by-period": PlanBudget(13_000, 300, period="month"),
+    "filter-by-title": PlanBudget(14_000, 2_000, needs_trigram=True),
+    "expenses-by-category": PlanBudget(15_000, 800),
+    # DISTINCT ON проходить увесь індекс (category_id, currency, amount) з читанням рядків таблиці
+    "max-per-category": PlanBudget(1_500_000, 8_000),
+    "min-per-category": PlanBudget(1_500_000, 8_000),
+    "max-in-period": PlanBudget(13_000, 300, period="month"),
+    "min-in-period": PlanBudget(15_000, 3_500),
+    # підсумки мають читати лише денні агрегати — будь-яке звернення до expenses є регресією
+    "sum-by-category": PlanBudget(2_500, 150, rollup_only=True),
+    "top-category": PlanBudget(2_500, 150, rollup_only=True),
+    "avg-per-day": PlanBudget(2_500, 120, rollup_only=True),
+    "dashboard": PlanBudget(2_500, 300, period="all", rollup_only=True),
+    "sum-in-base": PlanBudget(2_600, 200, rollup_only=True),
+    "unconverted": PlanBudget(2_600, 200, rollup_only=True),
+    # денний ряд з віконними функціями: теж лише агрегати, без перебору витрат на кожен день
+    "rolling-spend": PlanBudget(2_600, 1_500, rollup_only=True),
+    "running-totals": PlanBudget(2_600, 1_500, rollup_only=True),
+}
+
+# запити поза REPORTS: сторінки списку витрат (keyset)
+PAGE_CHECKS = {
+    "list_expenses.first_page": (lambda periods: expenses_page_query({}, 20)[:2], PlanBudget(100, 10)),
+    "list_expenses.deep_page": (lambda periods: expenses_page_query({}, 20, after=(periods["middle"], 0))[:2],
+                                PlanBudget(100, 10)),
+}
+
+# значення параметрів звітів, крім періоду (його задає бюджет)
+REPORT_ARGS = {"base": "USD", "text": "підпис", "limit": 50, "offset": 0}
+
+
+class _RecordingCursor:
+    def __init__(self, cur, statements: list):
+        self._cur = cur
+        self._statements = statements
+
+    def execute(self, query, vars=None):
+        self._statements.append((query, vars))
+        return self._cur.execute(query, vars)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._cur.__exit__(*exc)
+
+
+class _RecordingConnection:
+    """З'єднання, що запам'ятовує (SQL, параметри) кожного execute — щоб пояснити саме запити звіту."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements: list[tuple] = []
+
+    def cursor(self, *args, **kwargs):
+        return _RecordingCursor(self._conn.cursor(*args, **kwargs), self.statements)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def dataset(conn) -> dict:
+    """Періоди й параметри звітів з наявних даних: {"periods", "category_id", "count"}."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT MIN(expense_date), MAX(expense_date), MIN(category_id), COUNT(*) FROM expenses;")
+        first, last, category_id, count = cur.fetchone()
+    conn.rollback()
+    periods = {}
+    if first is not None:
+        periods = {
+            "month": (str(last - timedelta(days=29)), str(last)),
+            "year": (str(last - timedelta(days=364)), str(last)),
+            "all": (str(first), str(last)),
+            "middle": first + (last - first) / 2,
+        }
+    return {"periods": periods, "category_id": category_id, "count": count}
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def explain(conn, sql: str, params) -> dict:
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql.rstrip().rstrip(";"), params)
+        plan = cur.fetchone()[0][0]
+    conn.rollback()
+
+    scans, seq_scans = [], []
+    for node in _walk(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if relation is None:
+            continue
+        scans.append(f"{node['Node Type']} {relation}" + (f" ({node['Index Name']})" if "Index Name" in node else ""))
+        if node["Node Type"] == "Seq Scan" and (relation == "expenses" or relation.startswith("expenses_p")):
+            seq_scans.append(relation)
+    top = plan["Plan"]   # лічильники буферів вузла включають усі дочірні
+    return {
+        "ms": plan["Execution Time"],
+        "buffers": top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0),
+        "scans": scans,
+        "seq_scans": seq_scans,
+        "touches_expenses": any(" expenses" in scan for scan in scans),
+        "plans": [plan],
+    }
+
+
+def _combine(measurements: list[dict]) -> dict:
+    return {
+        "ms": sum(m["ms"] for m in measurements),
+        "buffers": sum(m["buffers"] for m in measurements),
+        "scans": [s for m in measurements for s in m["scans"]],
+        "seq_scans": [s for m in measurements for s in m["seq_scans"]],
+        "touches_expenses": any(m["touches_expenses"] for m in measurements),
+        "plans": [p for m in measurements for p in m["plans"]],
+    }
+
+
+def report_statements(conn, name: str, data: dict) -> list[tuple]:
+    """Виконує звіт з REPORTS (заодно прогріває кеш) і повертає його запити [(SQL, параметри)]."""
+    from reports import REPORTS
+
+    fn, params, _ = REPORTS[name]
+    values = {**REPORT_ARGS, "category_id": data["category_id"]}
+    values["date_from"], values["date_to"] = data["periods"][BUDGETS[name].period]
+    recorder = _RecordingConnection(conn)
+    fn(*(values[p] for p in params), conn=recorder)
+    conn.rollback()
+    return recorder.statements
+
+
+def measure_report(conn, name: str, data: dict) -> dict:
+    statements = report_statements(conn, name, data)
+    if not statements:
+        raise RuntimeError(f"Звіт '{name}' не виконав жодного запиту (режим аналітики?)")
+    return _combine([explain(conn, sql, params) for sql, params in statements])
+
+
+def measure_page(conn, name: str, data: dict) -> dict:
+    sql, params = PAGE_CHECKS[name][0](data["periods"])
+    explain(conn, sql, params)              # прогрів кешу: міряємо стабільний стан
+    return explain(conn, sql, params)
+
+
+def problems(budget: PlanBudget, measured: dict, trigram: bool, time_factor: float = PLAN_TIME_FACTOR) -> list[str]:
+    found = []
+    if measured["seq_scans"] and budget.index_required and (trigram or not budget.needs_trigram):
+        found.append(f"Seq Scan по {', '.join(sorted(set(measured['seq_scans'])))}")
+    if budget.rollup_only and measured["touches_expenses"]:
+        found.append("читає expenses замість expense_daily_rollup")
+    if measured["buffers"] > budget.max_buffers:
+        found.append(f"буферів {measured['buffers']} > {budget.max_buffers}")
+    if measured["ms"] > budget.max_ms * time_factor:
+        found.append(f"час {measured['ms']:.1f} мс > {budget.max_ms * time_factor:.0f} мс")
+    return found
+
+
+def calibrate() -> int:
+    from reports import REPORTS
+
+    conn = get_conn()
+    try:
+        data = dataset(conn)
+        if data["count"] != REFERENCE_ROWS:
+            print(f"Увага: у БД {data['count']} витрат, бюджети підібрані для {REFERENCE_ROWS}.", file=sys.stderr)
+        for name in [*REPORTS, *PAGE_CHECKS]:
+            if name in PAGE_CHECKS:
+                measured = measure_page(conn, name, data)
+            elif name in BUDGETS:
+                measured = measure_report(conn, name, data)
+            else:
+                print(f"{name}: немає бюджету в BUDGETS", file=sys.stderr)
+                continue
+            print(f'{name}: буферів {measured["buffers"]}, {measured["ms"]:.1f} мс '
+                  f'(бюджет з запасом: {max(100, round(measured["buffers"] * 1.5))}, '
+                  f'{max(10, round(measured["ms"] * 2.5))} мс); {"; ".join(measured["scans"])}')
+    finally:
+        conn.close()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Перевірка планів запитів звітів (EXPLAIN ANALYZE, BUFFERS)")
+    parser.add_argument("--reset", action="store_true", help="видалити всі витрати й категорії і згенерувати нові")
+    parser.add_argument("--rows", type=int, default=REFERENCE_ROWS, help="скільки витрат генерувати з --reset")
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--calibrate", action="store_true",
+                        help="лише показати поточні значення і бюджети з запасом, без перевірки")
+    args = parser.parse_args(argv)
+    if DB_BACKEND != "postgres":
+        print("Перевірка планів доступна лише для PostgreSQL (DB_BACKEND=postgres).", file=sys.stderr)
+        return 2
+
+    init_db()
+    if args.reset:
+        from benchmark import reset_database, seed_database
+
+        reset_database()
+        print(f"Генерація {args.rows} витрат (seed={args.seed})...", file=sys.stderr)
+        seed_database(args.categories, args.rows, args.seed)
+    if args.calibrate:
+        return calibrate()
+
+    import pytest
+
+    os.environ["DB_BACKEND"] = "postgres"   # tests/conftest.py інакше підставить тимчасову SQLite
+    return pytest.main(["-q", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "test_query_plans.py")])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
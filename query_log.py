@@ -0,0 +1,204 @@
+# query_log.py
+"""
+Журнал SQL-запитів: курсор-обгортка пише структуровані (JSON) записи в logs/sql.log.
+Підключається в db._connect як cursor_factory, тож охоплює всі модулі, що працюють через пул;
+async-пул (async_db, psycopg 3) підключає свою обгортку — async_cursor_factory.
+
+Запис: назва запиту (модуль.функція, що його виконала, або ім'я підготовленого запиту), тривалість,
+кількість рядків, час очікування з'єднання з пулу, текст SQL (без значень параметрів).
+Щоб журнал можна було лишати ввімкненим, пишеться лише частка запитів (SQL_LOG_SAMPLE),
+а також усі повільні (від SQL_SLOW_MS) — до них додається план EXPLAIN — і всі з помилкою.
+"""
+import os
+import re
+import sys
+import time
+import random
+import logging
+import weakref
+
+SQL_LOG = os.getenv("SQL_LOG", "1") != "0"
+SQL_LOG_SAMPLE = float(os.getenv("SQL_LOG_SAMPLE", "0.01"))
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+SQL_SLOW_EXPLAIN = os.getenv("SQL_SLOW_EXPLAIN", "1") != "0"
+SQL_TEXT_LIMIT = 1000
+
+logger = logging.getLogger("sql")
+
+# скільки чекали з'єднання з пулу при поточній видачі (записує db.ConnectionPool.getconn)
+_checkout_wait: "weakref.WeakKeyDictionary[object, float]" = weakref.WeakKeyDictionary()
+
+# модулі-посередники: назвою запиту стає перша функція поза ними
+_PLUMBING = {__name__, "db", "report_engine", "statements", "sqlite_backend", "contextlib", "async_db"}
+# і службові функції async_api: назвою стає async-звіт чи операція, що їх викликала
+_PLUMBING_FUNCTIONS = {("async_api", "_fetchall"), ("async_api", "_execute"), ("async_api", "run_report")}
+_EXECUTE_RE = re.compile(r"^\s*EXECUTE\s+(\w+)", re.IGNORECASE)
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "EXECUTE")
+
+_cursor_class = None
+_async_cursor_class = None
+
+
+def note_checkout(conn, wait_ms: float):
+    _checkout_wait[conn] = wait_ms
+
+
+def cursor_factory():
+    """Клас курсора psycopg2 з журналюванням (створюється при першому з'єднанні)."""
+    global _cursor_class
+    if _cursor_class is None:
+        import psycopg2.extensions
+
+        class InstrumentedCursor(psycopg2.extensions.cursor):
+            def execute(self, query, vars=None):
+                started = time.perf_counter()
+                error = None
+                try:
+                    return super().execute(query, vars)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    observe(self, query, started, error)
+
+            def executemany(self, query, vars_list):
+                started = time.perf_counter()
+                error = None
+                try:
+                    return super().executemany(query, vars_list)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    observe(self, query, started, error)
+
+            def copy_expert(self, sql, file, size=8192):
+                started = time.perf_counter()
+                error = None
+                try:
+                    return super().copy_expert(sql, file, size)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    observe(self, sql, started, error)
+
+        _cursor_class = InstrumentedCursor
+    return _cursor_class
+
+
+def async_cursor_factory():
+    """Клас async-курсора psycopg 3 з журналюванням — для async_db (створюється при першому пулі)."""
+    global _async_cursor_class
+    if _async_cursor_class is None:
+        import psycopg
+
+        class InstrumentedAsyncCursor(psycopg.AsyncCursor):
+            async def execute(self, query, params=None, **kwargs):
+                started = time.perf_counter()
+                error = None
+                try:
+                    return await super().execute(query, params, **kwargs)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    observe(self, query, started, error)
+
+            async def executemany(self, query, params_seq, **kwargs):
+                started = time.perf_counter()
+                error = None
+                try:
+                    return await super().executemany(query, params_seq, **kwargs)
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    observe(self, query, started, error)
+
+        _async_cursor_class = InstrumentedAsyncCursor
+    return _async_cursor_class
+
+
+def _statement_name(query: str) -> str:
+    m = _EXECUTE_RE.match(query)
+    if m:
+        return m.group(1)
+    frame = sys._getframe(1)
+    while frame is not None and (frame.f_globals.get("__name__") in _PLUMBING
+                                 or (frame.f_globals.get("__name__"), frame.f_code.co_name) in _PLUMBING_FUNCTIONS):
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+def _explain(cur, query: str) -> list[str] | None:
+    """
+    План останнього запиту курсора (EXPLAIN без ANALYZE — запит вдруге не виконується).
+    Виконується в тій самій транзакції під SAVEPOINT: невдалий EXPLAIN не ламає транзакцію застосунку.
+    """
+    extensions = sys.modules.get("psycopg2.extensions")
+    if extensions is None or not isinstance(cur, extensions.cursor):
+        return None  # SQLite і async-курсори psycopg 3: план — лише для синхронного Postgres
+    if cur.name is not None or not cur.query:
+        return None  # server-side курсор: execute лише оголошує його
+    if not query.lstrip().upper().startswith(_EXPLAINABLE):
+        return None  # зокрема COPY: copy_expert не оновлює cur.query — там текст попереднього запиту
+
+    conn = cur.connection
+    status = conn.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_INTRANS:
+        savepoint = True
+    elif status == extensions.TRANSACTION_STATUS_IDLE and conn.autocommit:
+        savepoint = False
+    else:
+        return None  # транзакція вже з помилкою (або EXPLAIN відкрив би нову) — не втручаємось
+
+    sql = cur.query.decode("utf-8", "replace")
+    with conn.cursor(cursor_factory=extensions.cursor) as plain:
+        if savepoint:
+            plain.execute("SAVEPOINT query_log_explain;")
+        try:
+            plain.execute("EXPLAIN " + sql)
+            return [row[0] for row in plain.fetchall()]
+        except Exception as e:
+            if savepoint:
+                plain.execute("ROLLBACK TO SAVEPOINT query_log_explain;")
+            return [f"EXPLAIN не вдався: {e}"]
+        finally:
+            if savepoint:
+                plain.execute("RELEASE SAVEPOINT query_log_explain;")
+
+
+def observe(cur, query, started: float, error):
+    if not SQL_LOG:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    slow = duration_ms >= SQL_SLOW_MS
+    if not (slow or error or random.random() < SQL_LOG_SAMPLE):
+        return
+
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        query = query.as_string(cur)   # sql.Composed (psycopg2 або psycopg 3)
+    record = {
+        "event": "query",
+        "name": _statement_name(query),
+        "duration_ms": round(duration_ms, 3),
+        "rows": cur.rowcount,
+        "conn_wait_ms": round(_checkout_wait.get(cur.connection, 0.0), 3),
+        "slow": slow,
+        "sql": " ".join(query.split())[:SQL_TEXT_LIMIT],
+    }
+    if error is not None:
+        record["error"] = str(error).strip()
+    elif slow and SQL_SLOW_EXPLAIN:
+        record["plan"] = _explain(cur, query)
+
+    if not logger.handlers:
+        from logger_config import setup_query_logging
+        setup_query_logging()
+    level = logging.WARNING if slow or error else logging.INFO
+    logger.log(level, "query %s %.1f ms", record["name"], duration_ms, extra={"data": record})
@@ -0,0 +1,241 @@
+# rates.py
+"""
+Курси валют: завантаження з CSV у exchange_rates і перерахунок сум у базову валюту.
+Курс — скільки UAH коштує 1 одиниця валюти; на дату без курсу діє найближчий попередній.
+Курс на кожен день (exchange_rate_days) перебудовує тригер — див. migrations.py, міграція 6.
+SQL-звіти приєднують його прямо в запиті (report_engine, поле amount_base);
+тут — завантаження і перерахунок окремих сум у Python.
+"""
+import io
+import os
+import csv
+import time
+import threading
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+import statements
+from db import DB_BACKEND, get_conn
+from categories import CACHE_VERSION
+from utils import ALLOWED_CURRENCIES, parse_date
+from report_registry import BASE_CURRENCY
+
+RATES_CSV_HEADER = ["date", "currency", "rate"]
+CENT = Decimal("0.01")
+
+
+def _parse_rate_row(row: list[str]) -> tuple[tuple, str | None]:
+    """Рядок CSV -> ((дата, валюта, курс), None) або ((), причина відхилення)."""
+    if len(row) < 3:
+        return (), "замало колонок"
+    raw_date, currency, raw_rate = (v.strip() for v in row[:3])
+
+    rate_date = parse_date(raw_date)
+    if rate_date is None:
+        return (), f"невірна дата '{raw_date}'"
+
+    currency = currency.upper()
+    if currency not in ALLOWED_CURRENCIES:
+        return (), f"невірна валюта '{currency}'"
+    if currency == "UAH":
+        return (), "курс UAH завжди 1"
+
+    try:
+        rate = Decimal(raw_rate.replace(",", ".").replace(" ", ""))
+    except InvalidOperation:
+        return (), f"невірний курс '{raw_rate}'"
+    if not rate.is_finite() or rate <= 0:
+        return (), f"невірний курс '{raw_rate}'"
+
+    return (rate_date, currency, rate), None
+
+
+def _merge_rates_postgres(cur, buf) -> int:
+    """Рядки CSV (line_no, дата, валюта, курс) -> exchange_rates. Повертає кількість записаних курсів."""
+    cur.execute("""
+        CREATE TEMP TABLE rates_staging (
+            line_no INT NOT NULL,
+            rate_date DATE NOT NULL,
+            currency VARCHAR(10) NOT NULL,
+            rate NUMERIC(18, 6) NOT NULL
+        ) ON COMMIT DROP;
+    """)
+    cur.copy_expert("COPY rates_staging (line_no, rate_date, currency, rate) FROM STDIN WITH (FORMAT csv)", buf)
+    # один INSERT — тригер перебудує exchange_rate_days один раз
+    cur.execute("""
+        INSERT INTO exchange_rates (rate_date, currency, rate)
+        SELECT DISTINCT ON (currency, rate_date) rate_date, currency, rate
+        FROM rates_staging
+        ORDER BY currency, rate_date, line_no DESC
+        ON CONFLICT (currency, rate_date) DO UPDATE SET rate = EXCLUDED.rate;
+    """)
+    return cur.rowcount
+
+
+def _merge_rates_sqlite(cur, buf) -> int:
+    # COPY і DISTINCT ON у SQLite немає: повтори (валюта, дата) відкидаємо тут — діє останній рядок
+    latest = {}
+    for _line_no, rate_date, currency, rate in csv.reader(buf):
+        latest[(currency, rate_date)] = rate
+    cur.executemany("""
+        INSERT INTO exchange_rates (rate_date, currency, rate) VALUES (%s, %s, %s)
+        ON CONFLICT (currency, rate_date) DO UPDATE SET rate = excluded.rate;
+    """, [(rate_date, currency, rate) for (currency, rate_date), rate in latest.items()])
+    return len(latest)
+
+
+def load_rates_csv(path: str) -> dict:
+    """
+    Завантажує курси з CSV (date;currency;rate, заголовок необов'язковий).
+    Наявні курси на ту саму дату оновлюються; якщо у файлі дата повторюється — діє останній рядок.
+    Повертає {"loaded", "rejected": [(рядок, причина)]}.
+    """
+    rejected: list[tuple[int, str]] = []
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    staged = 0
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, delimiter=";")
+        for row in reader:
+            line_no = reader.line_num
+            if not any(v.strip() for v in row):
+                continue
+            if line_no == 1 and [v.strip().lower() for v in row[:3]] == RATES_CSV_HEADER:
+                continue
+            values, reason = _parse_rate_row(row)
+            if reason:
+                rejected.append((line_no, reason))
+                continue
+            writer.writerow((line_no, *values))
+            staged += 1
+
+    loaded = 0
+    if staged:
+        buf.seek(0)
+        merge = _merge_rates_sqlite if DB_BACKEND == "sqlite" else _merge_rates_postgres
+        conn = get_conn()
+        try:
+            with conn.cursor() as cur:
+                loaded = merge(cur, buf)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        invalidate_rates_cache()
+
+    return {"loaded": loaded, "rejected": rejected}
+
+
+# ---------- кеш курсів ----------
+# Курси на минулі дати не змінюються, тож окремі запити (валюта, дата) кешуються LRU.
+# Завантаження в цьому процесі скидає кеш одразу; зміни з інших процесів помічаємо
+# за лічильником cache_versions (не частіше ніж раз на RATES_CACHE_TTL секунд).
+RATES_CACHE_TTL = float(os.getenv("RATES_CACHE_TTL", "60"))
+
+# _rates_lock — лише на звірку й заміну стану, як _cache_lock у categories.py: запит версії — без нього,
+# бо get_conn() може чекати на вільне з'єднання, і всі потоки, що читають курси, чекали б разом з ним
+_rates_lock = threading.Lock()
+_rates_state = {"version": None, "checked_at": 0.0, "generation": 0}   # generation: +1 на кожне скидання
+
+
+def invalidate_rates_cache():
+    with _rates_lock:
+        _rate_on.cache_clear()
+        _rates_state["version"] = None
+        _rates_state["generation"] += 1
+
+
+def _revalidate_rates_cache():
+    with _rates_lock:
+        now = time.monotonic()
+        if _rates_state["version"] is not None and now - _rates_state["checked_at"] < RATES_CACHE_TTL:
+            return
+        generation = _rates_state["generation"]
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            statements.execute(cur, CACHE_VERSION, ("exchange_rates",))
+            row = cur.fetchone()
+            version = row[0] if row else 0
+    finally:
+        conn.close()
+
+    with _rates_lock:
+        # інший потік звірив версію пізніше за нас, або кеш тим часом скинули — наша версія вже не свіжа
+        if _rates_state["checked_at"] > now or _rates_state["generation"] != generation:
+            return
+        if version != _rates_state["version"]:
+            _rate_on.cache_clear()
+            _rates_state["version"] = version
+        _rates_state["checked_at"] = now
+
+
+@lru_cache(maxsize=4096)
+def _rate_on(currency: str, day: date) -> Decimal | None:
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT rate FROM exchange_rates
+                WHERE currency = %s AND rate_date <= %s
+                ORDER BY rate_date DESC
+                LIMIT 1;
+            """, (currency, day))
+            row = cur.fetchone()
+            return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def get_rate(currency: str, day) -> Decimal | None:
+    """Курс валюти до UAH на дату (або найближчий попередній). None — курсу ще немає."""
+    if currency == "UAH":
+        return Decimal(1)
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    _revalidate_rates_cache()
+    return _rate_on(currency, day)
+
+
+def convert(amount, currency: str, day, base: str = BASE_CURRENCY) -> Decimal | None:
+    """Сума у валюті currency на дату day -> у валюті base (до копійок). None — бракує курсу."""
+    amount = Decimal(str(amount))
+    if currency == base:
+        return amount.quantize(CENT)
+    rate_from = get_rate(currency, day)
+    rate_to = get_rate(base, day)
+    if rate_from is None or rate_to is None:
+        return None
+    return (amount * rate_from / rate_to).quantize(CENT)
+
+
+def load_rates_from_csv():
+    print("\n--- Завантаження курсів валют з CSV ---")
+    print("Формат: date;currency;rate (скільки UAH за 1 одиницю валюти)")
+    path = input("Шлях до CSV-файлу: ").strip().strip('"')
+    if not path:
+        print(" Шлях не може бути порожнім.")
+        return
+
+    try:
+        result = load_rates_csv(path)
+    except FileNotFoundError:
+        print(" Файл не знайдено.")
+        return
+    except Exception as e:
+        print(" Не вдалося завантажити курси (нічого не збережено).")
+        print(e)
+        return
+
+    print(f" Завантажено курсів: {result['loaded']}")
+    rejected = result["rejected"]
+    if rejected:
+        print(f" Відхилено рядків: {len(rejected)}")
+        for line_no, reason in rejected[:20]:
+            print(f"   рядок {line_no}: {reason}")
+        if len(rejected) > 20:
+            print(f"   ... і ще {len(rejected) - 20}")
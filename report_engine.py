@@ -0,0 +1,502 @@
+# report_engine.py
+"""
+Декларативні звіти.
+ReportSpec описує, що потрібно (поля, фільтри, групування, агрегати, сортування),
+compile_report() перетворює його в ОДИН параметризований SQL-запит.
+Ковзні суми й наростаючі підсумки (windows) — теж один запит: віконні функції над денним рядом.
+Назви полів і функцій беруться лише з білих списків нижче — користувацькі значення йдуть тільки в параметри.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from db import DB_BACKEND, use_conn
+
+# Джерела даних: сирі витрати або денні агрегати (expense_daily_rollup).
+# categories приєднується лише тоді, коли у звіті є поле з неї;
+# курси (exchange_rate_days) — лише для полів з перерахунком у базову валюту (rate_fields).
+# x — курс валюти витрати на її дату, b — курс базової валюти на ту саму дату;
+# xt/bt — останній курс валюти (exchange_rate_tail), що діє з valid_from без кінця:
+# exchange_rate_days розгорнуто лише до дня перед ним, тож з x/b він не перетинається.
+_SOURCES = {
+    "expenses": {
+        "from": "expenses e",
+        "join_categories": "JOIN categories c ON c.id = e.category_id",
+        "fields": {
+            "id": "e.id",
+            "date": "e.expense_date",
+            "category_id": "e.category_id",
+            "category": "c.name",
+            "title": "e.title",
+            "amount": "e.amount",
+            "currency": "e.currency",
+            "description": "COALESCE(e.description, '')",
+            "amount_base": "e.amount * COALESCE(x.rate, xt.rate) / COALESCE(b.rate, bt.rate)",
+        },
+        "rate_fields": {"amount_base"},
+        "join_rates": (
+            "LEFT JOIN exchange_rate_days x ON x.currency = COALESCE(e.currency, 'UAH')"
+            " AND x.day = exchange_rate_day(COALESCE(e.currency, 'UAH'), e.expense_date)\n"
+            "LEFT JOIN exchange_rate_tail xt ON xt.currency = COALESCE(e.currency, 'UAH')"
+            " AND e.expense_date >= xt.valid_from\n"
+            "LEFT JOIN exchange_rate_days b ON b.currency = %(base)s"
+            " AND b.day = exchange_rate_day(%(base)s, e.expense_date)\n"
+            "LEFT JOIN exchange_rate_tail bt ON bt.currency = %(base)s AND e.expense_date >= bt.valid_from"
+        ),
+        # {f} — вираз поля, {flt} — місце для FILTER (WHERE ...)
+        "aggregates": {
+            "sum": "SUM({f}){flt}",
+            "count": "COUNT(*){flt}",
+            "min": "MIN({f}){flt}",
+            "max": "MAX({f}){flt}",
+            "avg": "AVG({f}){flt}",
+        },
+    },
+    "rollup": {
+        "from": "expense_daily_rollup r",
+        "join_categories": "JOIN categories c ON c.id = r.category_id",
+        "fields": {
+            "date": "r.day",
+            "category_id": "r.category_id",
+            "category": "c.name",
+            "currency": "r.currency",
+            "amount": "r.total",
+            "amount_base": "r.total * COALESCE(x.rate, xt.rate) / COALESCE(b.rate, bt.rate)",
+        },
+        "rate_fields": {"amount_base"},
+        "join_rates": (
+            "LEFT JOIN exchange_rate_days x ON x.currency = r.currency"
+            " AND x.day = exchange_rate_day(r.currency, r.day)\n"
+            "LEFT JOIN exchange_rate_tail xt ON xt.currency = r.currency AND r.day >= xt.valid_from\n"
+            "LEFT JOIN exchange_rate_days b ON b.currency = %(base)s"
+            " AND b.day = exchange_rate_day(%(base)s, r.day)\n"
+            "LEFT JOIN exchange_rate_tail bt ON bt.currency = %(base)s AND r.day >= bt.valid_from"
+        ),
+        # у rollup є лише агрегати по amount (sum — також у базовій валюті через amount_base)
+        "aggregates": {
+            "sum": "SUM({f}){flt}",
+            "count": "SUM(r.cnt){flt}",
+            "min": "MIN(r.min_amount){flt}",
+            "max": "MAX(r.max_amount){flt}",
+            # * 1.0: у SQLite суми — цілі копійки, і ділення цілих було б цілочисельним
+            "avg": "(SUM(r.total){flt} * 1.0 / NULLIF(SUM(r.cnt){flt}, 0))",
+        },
+    },
+}
+
+# фільтр -> (поле, оператор)
+_FILTERS = {
+    "date_from": ("date", ">="),
+    "date_to": ("date", "<="),
+    "category_id": ("category_id", "="),
+    "currency": ("currency", "="),
+    "title_like": ("title", "LIKE"),
+    "unconverted": ("amount_base", "IS NULL"),   # True — рядки, для яких немає курсу
+}
+
+
+@dataclass
+class Aggregate:
+    alias: str
+    func: str                                   # sum | count | min | max | avg
+    column: str = "amount"
+    where: dict = field(default_factory=dict)   # умовний агрегат: FILTER (WHERE ...) у тому ж проході
+
+
+@dataclass
+class Window:
+    alias: str
+    of: str                    # alias денного агрегату (sum або count), який підсумовується
+    days: int | None = None    # ковзне вікно: N днів до поточного включно
+    reset: str | None = None   # замість days — наростаючий підсумок: "month" (з початку місяця) або "period"
+
+
+# поля з сумами: у SQLite вони — копійки з типом CENTS, і вирази над ними (агрегати, перерахунок)
+# отримують тип через назву колонки, як date (див. money_alias)
+_MONEY_FIELDS = {"amount", "amount_base"}
+
+
+def money_alias(name: str, dialect: str | None = None) -> str:
+    """Псевдонім колонки з сумою: у SQLite — з типом у назві, щоб sqlite_backend повернув Decimal."""
+    return f'"{name} [CENTS]"' if (dialect or DB_BACKEND) == "sqlite" else name
+
+
+# віконні функції над денним рядом: відмінності діалектів
+_SERIES = {
+    "postgres": {
+        "with": "WITH",
+        "days": "SELECT d::date AS date FROM generate_series(%s::date, %s::date, INTERVAL '1 day') d",
+        "month": "date_trunc('month', date)",
+        "date_alias": "date",
+    },
+    "sqlite": {
+        # generate_series у SQLite — лише розширення, тож дні дає рекурсивний CTE
+        "with": "WITH RECURSIVE",
+        "days": "SELECT date(%s) AS date UNION ALL SELECT date(date, '+1 day') FROM days WHERE date < %s",
+        "month": "strftime('%%Y-%%m', date)",
+        # колонка виразу не має оголошеного типу — тип DATE для sqlite_backend задається в назві
+        "date_alias": '"date [DATE]"',
+    },
+}
+
+
+@dataclass
+class ReportSpec:
+    columns: list[str] = field(default_factory=list)
+    aggregates: list[Aggregate] = field(default_factory=list)
+    filters: dict = field(default_factory=dict)
+    group_by: list[str] = field(default_factory=list)
+    # замість group_by: кілька рівнів групування за один прохід; у результат додається колонка grouping
+    grouping_sets: list[tuple[str, ...]] = field(default_factory=list)
+    distinct_on: list[str] = field(default_factory=list)
+    order_by: list[tuple[str, str]] = field(default_factory=list)   # (поле або alias агрегату, ASC/DESC)
+    limit: int | None = None
+    source: str = "expenses"
+    base_currency: str | None = None   # валюта для полів *_base (amount_base)
+    # денний ряд: group_by містить date, кожен день періоду є для кожної комбінації решти полів
+    # (дні без витрат — нулі); windows рахуються по ньому і йдуть у результат після агрегатів
+    windows: list[Window] = field(default_factory=list)
+
+
+class _Compiler:
+    def __init__(self, spec: ReportSpec, dialect: str | None = None, nested: bool = False):
+        if spec.source not in _SOURCES:
+            raise ValueError(f"Невідоме джерело звіту: {spec.source}")
+        self.spec = spec
+        self.src = _SOURCES[spec.source]
+        self.dialect = dialect or DB_BACKEND
+        self.nested = nested     # підзапит іншого звіту: назви колонок лишаються простими
+        self.uses_categories = False
+        self.uses_rates = False
+
+    def out(self, name: str) -> str:
+        """Назва колонки результату; суми в SQLite — з типом у назві (money_alias)."""
+        spec = self.spec
+        money = name in _MONEY_FIELDS
+        for agg in spec.aggregates:
+            if agg.alias == name:
+                money = agg.func != "count"
+        for w in spec.windows:
+            if w.alias == name:
+                money = any(agg.alias == w.of and agg.func != "count" for agg in spec.aggregates)
+        return money_alias(name, self.dialect) if money and not self.nested else name
+
+    def rename(self, name: str) -> str:
+        """Колонка підзапиту у зовнішньому SELECT — під назвою результату (out)."""
+        return name if self.out(name) == name else f"{name} AS {self.out(name)}"
+
+    def field(self, name: str) -> str:
+        fields = self.src["fields"]
+        if name not in fields:
+            raise ValueError(f"Поле '{name}' недоступне для джерела '{self.spec.source}'")
+        expr = fields[name]
+        if expr.startswith("c."):
+            self.uses_categories = True
+        if name in self.src.get("rate_fields", ()):
+            self.uses_rates = True
+        return expr
+
+    def where(self, filters: dict, params: list) -> list[str]:
+        conditions = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in _FILTERS:
+                raise ValueError(f"Невідомий фільтр: {name}")
+            field_name, op = _FILTERS[name]
+            expr = self.field(field_name)
+            if op == "IS NULL":
+                conditions.append(f"({expr}) IS {'' if value else 'NOT '}NULL")
+            elif op == "LIKE":
+                conditions.append(f"LOWER({expr}) LIKE LOWER(%s)")
+                params.append(f"%{value}%")
+            else:
+                conditions.append(f"{expr} {op} %s")
+                params.append(value)
+        return conditions
+
+    def aggregate(self, agg: Aggregate, params: list) -> str:
+        templates = self.src["aggregates"]
+        if agg.func not in templates:
+            raise ValueError(f"Невідома агрегатна функція: {agg.func}")
+        template = templates[agg.func]
+
+        flt = ""
+        if agg.where:
+            flt_params: list = []
+            flt = " FILTER (WHERE " + " AND ".join(self.where(agg.where, flt_params)) + ")"
+            params.extend(flt_params * template.count("{flt}"))
+        f = self.field(agg.column) if "{f}" in template else ""
+        return template.format(f=f, flt=flt)
+
+    def order(self, ref) -> list[str]:
+        """ORDER BY; ref(назва) -> вираз. У SQLite NULL — найменше значення, тож порядок NULL задаємо як у Postgres."""
+        items = []
+        for name, direction in self.spec.order_by:
+            direction = direction.upper()
+            if direction not in ("ASC", "DESC"):
+                raise ValueError(f"Невірний напрям сортування: {direction}")
+            nulls = ""
+            if self.dialect == "sqlite":
+                nulls = " NULLS LAST" if direction == "ASC" else " NULLS FIRST"
+            items.append(f"{ref(name)} {direction}{nulls}")
+        return items
+
+    def compile(self) -> tuple[str, list]:
+        spec = self.spec
+        if spec.windows:
+            return self._daily_series()
+        params: list = []
+        aliases = {agg.alias for agg in spec.aggregates}
+
+        columns = [(c, self.field(c)) for c in spec.columns]
+        aggregates = [(agg.alias, self.aggregate(agg, params)) for agg in spec.aggregates]
+        grouped = [c for c in spec.columns if any(c in s for s in spec.grouping_sets)]
+        distinct = [self.field(c) for c in spec.distinct_on]
+        group_by = [self.field(c) for c in spec.group_by]
+        sets = [[self.field(c) for c in s] for s in spec.grouping_sets]
+        where_params: list = []
+        conditions = self.where(spec.filters, where_params)
+
+        # FROM і JOIN — коли вже відомо, які поля використано
+        source = [f"FROM {self.src['from']}"]
+        if self.uses_categories:
+            source.append(self.src["join_categories"])
+        if self.uses_rates:
+            if not spec.base_currency:
+                raise ValueError("Для перерахунку у базову валюту потрібна base_currency")
+            join = self.src["join_rates"]
+            source.append(join.replace("%(base)s", "%s"))
+            params.extend([spec.base_currency] * join.count("%(base)s"))
+        params.extend(where_params)
+        if conditions:
+            source.append("WHERE " + " AND ".join(conditions))
+
+        if self.dialect == "sqlite" and spec.grouping_sets:
+            return self._sqlite_grouping_sets(columns, aggregates, grouped, source, params)
+        if self.dialect == "sqlite" and spec.distinct_on:
+            return self._sqlite_distinct_on(columns, aggregates, group_by, source, params)
+        order_items = self.order(lambda name: self.out(name) if name in aliases else self.field(name))
+
+        select = [f"{expr} AS {self.out(c)}" for c, expr in columns]
+        if spec.grouping_sets:
+            select.append(f"GROUPING({', '.join(self.field(c) for c in grouped)}) AS grouping")
+        select += [f"{expr} AS {self.out(alias)}" for alias, expr in aggregates]
+
+        distinct_sql = f"DISTINCT ON ({', '.join(distinct)}) " if distinct else ""
+        parts = [f"SELECT {distinct_sql}" + ",\n       ".join(select)] + source
+        if sets:
+            parts.append("GROUP BY GROUPING SETS (" + ", ".join(f"({', '.join(s)})" for s in sets) + ")")
+        elif group_by:
+            parts.append("GROUP BY " + ", ".join(group_by))
+        return self._finish(parts, order_items, params)
+
+    def _finish(self, parts: list[str], order_items: list[str], params: list) -> tuple[str, list]:
+        if order_items:
+            parts.append("ORDER BY " + ", ".join(order_items))
+        if self.spec.limit is not None:
+            parts.append("LIMIT %s")
+            params.append(self.spec.limit)
+        return "\n".join(parts) + ";", params
+
+    # ---------- Денний ряд з віконними функціями ----------
+    def _daily_series(self) -> tuple[str, list]:
+        """
+        Звичайний звіт, згрупований за date (daily), доповнюється нульовими рядками на кожен день
+        для кожної комбінації решти полів, що трапилась у daily, — ряд щільний, тож вікно ROWS з N рядків
+        дорівнює N календарним дням. Ряд починається раніше за date_from настільки, щоб перші дні періоду
+        мали повні вікна, а підсумок з початку місяця враховував дні місяця до date_from;
+        зайві дні відкидаються вже після віконних функцій.
+        """
+        spec = self.spec
+        if "date" not in spec.group_by or spec.grouping_sets or spec.distinct_on:
+            raise ValueError("Вікна — лише для звіту, згрупованого за date (без grouping_sets і distinct_on)")
+        date_from, date_to = spec.filters.get("date_from"), spec.filters.get("date_to")
+        if not date_from or not date_to:
+            raise ValueError("Для вікон потрібен період: date_from і date_to")
+        if set(spec.columns) != set(spec.group_by):
+            raise ValueError("У звіті з вікнами колонки мають збігатися з group_by")
+        zeros = {}
+        for agg in spec.aggregates:
+            if agg.func not in ("sum", "count"):
+                raise ValueError(f"Денний ряд доповнюється нулями лише для sum і count, не '{agg.func}'")
+            zeros[agg.alias] = "0.00" if agg.func == "sum" and self.dialect == "postgres" else "0"   # SQLite: копійки
+
+        dialect = _SERIES[self.dialect]
+        keys = [c for c in spec.columns if c != "date"]
+        first = date.fromisoformat(str(date_from))
+        start = first
+        window_sql, window_params = [], []
+        for w in spec.windows:
+            if w.of not in zeros:
+                raise ValueError(f"Вікно '{w.alias}': невідомий агрегат '{w.of}'")
+            partition = list(keys)
+            if w.days is not None and w.reset is None:
+                days = int(w.days)
+                if days < 1:
+                    raise ValueError(f"Вікно '{w.alias}': days має бути >= 1")
+                frame = f"ROWS BETWEEN {days - 1} PRECEDING AND CURRENT ROW"
+                start = min(start, first - timedelta(days=days - 1))
+            elif w.days is None and w.reset == "month":
+                frame = "ROWS UNBOUNDED PRECEDING"
+                partition.append(dialect["month"])
+                start = min(start, first.replace(day=1))
+            elif w.days is None and w.reset == "period":
+                # дні до date_from — в окремому розділі, тож у підсумок періоду вони не входять
+                frame = "ROWS UNBOUNDED PRECEDING"
+                partition.append("date >= %s")
+                window_params.append(date_from)
+            else:
+                raise ValueError(f"Вікно '{w.alias}': потрібне або days, або reset = month | period")
+            over = (f"PARTITION BY {', '.join(partition)} " if partition else "") + f"ORDER BY date {frame}"
+            window_sql.append(f"SUM({w.of}) OVER ({over}) AS {w.alias}")
+
+        daily_spec = ReportSpec(
+            columns=spec.columns, aggregates=spec.aggregates,
+            filters={**spec.filters, "date_from": start.isoformat()}, group_by=spec.group_by,
+            source=spec.source, base_currency=spec.base_currency,
+        )
+        daily_sql, params = _Compiler(daily_spec, self.dialect, nested=True).compile()
+
+        names = [*keys, *zeros]
+        zero_rows = ", ".join([f"k.{c}" for c in keys] + [f"{z} AS {alias}" for alias, z in zeros.items()])
+        zero_source = "days d" + (f"\n        CROSS JOIN (SELECT DISTINCT {', '.join(keys)} FROM daily) k" if keys else "")
+        outer = [("date", dialect["date_alias"])] + [(c, c) for c in spec.columns if c != "date"]
+        outer += [(a, self.out(a)) for a in zeros] + [(w.alias, self.out(w.alias)) for w in spec.windows]
+
+        parts = [
+            f"{dialect['with']} daily AS (",
+            "    " + daily_sql.rstrip(";").replace("\n", "\n    "),
+            "),",
+            f"days AS ({dialect['days']}),",
+            "series AS (",
+            f"    SELECT date, {', '.join([*keys, *(f'SUM({a}) AS {a}' for a in zeros)])}",
+            "    FROM (",
+            f"        SELECT date, {', '.join(names)} FROM daily",
+            "        UNION ALL",
+            f"        SELECT d.date, {zero_rows}",
+            f"        FROM {zero_source}",
+            "    ) u",
+            f"    GROUP BY date{''.join(', ' + c for c in keys)}",
+            ")",
+            "SELECT " + ", ".join(f"{c} AS {alias}" if c != alias else c for c, alias in outer),
+            "FROM (",
+            f"    SELECT date, {', '.join(names)},",
+            "           " + ",\n           ".join(window_sql),
+            "    FROM series",
+            ") w",
+            "WHERE date >= %s",
+        ]
+        params += [start.isoformat(), str(date_to), *window_params, date_from]
+        return self._finish(parts, self.order(lambda name: name), params)
+
+    # ---------- SQLite: DISTINCT ON і GROUPING SETS там немає ----------
+    def _sqlite_distinct_on(self, columns, aggregates, group_by, source, params) -> tuple[str, list]:
+        """
+        DISTINCT ON -> ROW_NUMBER() OVER (PARTITION BY ... ORDER BY ...) = 1.
+        Поля DISTINCT ON / ORDER BY, яких немає серед колонок звіту, додаються у внутрішній запит
+        прихованими колонками _k0, _k1 ...
+        """
+        spec = self.spec
+        names = {c for c, _ in columns} | {alias for alias, _ in aggregates}
+        hidden: dict[str, str] = {}
+
+        def ref(name: str) -> str:
+            if name in names:
+                return name
+            if name not in hidden:
+                hidden[name] = f"_k{len(hidden)}"
+            return hidden[name]
+
+        partition = [ref(c) for c in spec.distinct_on]
+        order_items = self.order(ref)
+        select = [f"{expr} AS {c}" for c, expr in columns]
+        select += [f"{expr} AS {alias}" for alias, expr in aggregates]
+        select += [f"{self.field(name)} AS {key}" for name, key in hidden.items()]
+
+        inner = ["SELECT " + ",\n       ".join(select)] + source
+        if group_by:
+            inner.append("GROUP BY " + ", ".join(group_by))
+        inner_sql = "\n".join(inner)
+        # ORDER BY нижче посилається на колонки підзапиту: типізовані назви результату з ними не збігаються
+        parts = [
+            "SELECT " + ", ".join(self.rename(name) for name in [*(c for c, _ in columns), *(a for a, _ in aggregates)]),
+            "FROM (",
+            f"    SELECT q.*, ROW_NUMBER() OVER (PARTITION BY {', '.join(partition)}"
+            f" ORDER BY {', '.join(order_items)}) AS _rn",
+            f"    FROM ({inner_sql}) q",
+            ")",
+            "WHERE _rn = 1",
+        ]
+        return self._finish(parts, order_items, params)
+
+    def _sqlite_grouping_sets(self, columns, aggregates, grouped, source, params) -> tuple[str, list]:
+        """
+        GROUPING SETS -> UNION ALL окремих GROUP BY; колонки поза набором — NULL,
+        grouping — той самий бітовий номер, що повертає GROUPING() у Postgres.
+        """
+        spec = self.spec
+        names = {c for c, _ in columns} | {alias for alias, _ in aggregates}
+        for name, _ in spec.order_by:
+            if name not in names:
+                raise ValueError(f"Сортування за '{name}' з grouping_sets — лише за колонками звіту")
+
+        branches, all_params = [], []
+        for grouping_set in spec.grouping_sets:
+            bits = sum(1 << (len(grouped) - 1 - i) for i, c in enumerate(grouped) if c not in grouping_set)
+            select = [f"{expr if c in grouping_set else 'NULL'} AS {c}" for c, expr in columns]
+            select.append(f"{bits} AS grouping")
+            select += [f"{expr} AS {alias}" for alias, expr in aggregates]
+            branch = ["SELECT " + ",\n       ".join(select)] + source
+            if grouping_set:
+                branch.append("GROUP BY " + ", ".join(self.field(c) for c in grouping_set))
+            branches.append("\n".join(branch))
+            all_params += params
+        names = [*(c for c, _ in columns), "grouping", *(alias for alias, _ in aggregates)]
+        parts = ["SELECT " + ", ".join(self.rename(name) for name in names) + " FROM (",
+                 "\nUNION ALL\n".join(branches), ")"]
+        return self._finish(parts, self.order(lambda name: name), all_params)
+
+
+def compile_report(spec: ReportSpec, dialect: str | None = None) -> tuple[str, list]:
+    """ReportSpec -> (SQL, параметри). dialect — postgres або sqlite (типово — поточний DB_BACKEND)."""
+    return _Compiler(spec, dialect).compile()
+
+
+# форми звітів, що вже пройшли validate_report (значення фільтрів на перевірки не впливають)
+_validated: set[str] = set()
+
+
+def validate_report(spec: ReportSpec) -> None:
+    """
+    Ті самі перевірки полів, фільтрів, агрегатів і сортування, що й у compile_report, без SQL —
+    для виконавців звітів поза БД (analytics.py). Кожна форма звіту перевіряється один раз.
+    """
+    shape = repr((spec.source, spec.columns, spec.aggregates, sorted(spec.filters), spec.group_by,
+                  spec.grouping_sets, spec.distinct_on, spec.order_by, spec.base_currency is not None,
+                  spec.windows))
+    if shape not in _validated:
+        _Compiler(spec, "postgres").compile()
+        _validated.add(shape)
+
+
+def compile_filters(filters: dict, source: str = "expenses") -> tuple[str, list]:
+    """
+    Фільтри звітів -> (умова WHERE, параметри) — для масових UPDATE/DELETE за тими ж фільтрами.
+    Умова посилається на псевдонім таблиці джерела (e для expenses); фільтри по categories недоступні.
+    """
+    compiler = _Compiler(ReportSpec(source=source))
+    params: list = []
+    conditions = compiler.where(filters, params)
+    if compiler.uses_categories or compiler.uses_rates:
+        raise ValueError("Фільтр потребує приєднаних таблиць — для масових змін він недоступний")
+    if not conditions:
+        raise ValueError("Потрібен хоча б один фільтр")
+    return " AND ".join(conditions), params
+
+
+def run_report(spec: ReportSpec, conn=None) -> list[tuple]:
+    """Виконує звіт. Якщо conn не передано — бере з'єднання з пулу."""
+    sql, params = compile_report(spec)
+    with use_conn(conn) as c:
+        with c.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
@@ -0,0 +1,37 @@
+# report_registry.py
+"""
+Назви звітів, їхні параметри і типові значення — без імпорту бази й рушія звітів.
+cli.py будує з цього аргументи, тож --help і помилки в аргументах не тягнуть reports.py;
+функції звітів і колонки — у reports.REPORTS (набір назв і параметрів має збігатися).
+"""
+import os
+
+BASE_CURRENCY = os.getenv("BASE_CURRENCY", "UAH")
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "50"))
+EXPORT_DIR = "export"
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+
+# назва звіту -> параметри (у порядку аргументів функції з reports.REPORTS)
+REPORT_PARAMS = {
+    "expenses-by-period": ("date_from", "date_to"),
+    "filter-by-title": ("text", "limit", "offset"),
+    "expenses-by-category": ("category_id",),
+    "max-per-category": (),
+    "min-per-category": (),
+    "max-in-period": ("date_from", "date_to"),
+    "min-in-period": ("date_from", "date_to"),
+    "sum-by-category": ("date_from", "date_to"),
+    "top-category": ("date_from", "date_to"),
+    "avg-per-day": ("date_from", "date_to"),
+    "dashboard": ("date_from", "date_to"),
+    "sum-in-base": ("date_from", "date_to", "base"),
+    "unconverted": ("date_from", "date_to", "base"),
+    "rolling-spend": ("date_from", "date_to"),
+    "running-totals": ("date_from", "date_to"),
+}
+
+# Місячний пакет: пункти 1, 4-7 меню звітів і три підсумки
+MONTHLY_PACK = (
+    "expenses-by-period", "max-per-category", "max-in-period", "min-per-category", "min-in-period",
+    "sum-by-category", "top-category", "avg-per-day",
+)
@@ -1,9 +1,18 @@
 # reports.py
 import os
 import csv
-from db import get_conn
-from utils import read_date
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from db import has_extension, use_conn
+from utils import read_date, read_currency
 from categories import list_categories, get_category_name
+from rollup import rebuild_rollup_menu, check_rollup_menu
+from rates import BASE_CURRENCY, load_rates_from_csv
+from report_registry import EXPORT_DIR, EXPORT_FORMATS, MONTHLY_PACK, REPORT_PARAMS, SEARCH_PAGE_SIZE
+from report_engine import Aggregate, ReportSpec, Window, compile_report, run_report
 
 
 # ---------- helpers ----------
@@ -15,6 +24,431 @@ def _normalize_period(date_from: str, date_to: str) -> tuple[str, str]:
     return date_from, date_to
 
 
+def _read_period() -> tuple[str, str]:
+    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
+    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
+    return _normalize_period(date_from, date_to)
+
+
+def _days_in_period(date_from: str, date_to: str) -> int:
+    return (date.fromisoformat(date_to) - date.fromisoformat(date_from)).days + 1
+
+
+# ---------- Специфікації звітів (див. report_engine.py) ----------
+CENT = Decimal("0.01")
+EXPENSE_ROW = ["date", "category", "title", "amount", "currency", "description"]
+
+# max і min відрізняються лише напрямом сортування за сумою
+_EXTREME_ORDER = {"max": "DESC", "min": "ASC"}
+
+
+def spec_expenses_by_period(date_from: str, date_to: str) -> ReportSpec:
+    return ReportSpec(
+        columns=EXPENSE_ROW,
+        filters={"date_from": date_from, "date_to": date_to},
+        order_by=[("date", "ASC"), ("id", "ASC")],
+    )
+
+
+def spec_expenses_by_category(category_id: int) -> ReportSpec:
+    return ReportSpec(
+        columns=["id", "date", "title", "amount", "currency", "description"],
+        filters={"category_id": category_id},
+        order_by=[("date", "ASC"), ("id", "ASC")],
+    )
+
+
+def spec_extreme_per_category(kind: str) -> ReportSpec:
+    return ReportSpec(
+        columns=["category", "currency", "id", "date", "title", "amount", "description"],
+        distinct_on=["category_id", "currency"],
+        order_by=[("category_id", "ASC"), ("currency", "ASC"), ("amount", _EXTREME_ORDER[kind]),
+                  ("date", "DESC"), ("id", "DESC")],
+    )
+
+
+def spec_extreme_in_period(kind: str, date_from: str, date_to: str) -> ReportSpec:
+    return ReportSpec(
+        columns=["currency", "id", "date", "category", "title", "amount", "description"],
+        filters={"date_from": date_from, "date_to": date_to},
+        distinct_on=["currency"],
+        order_by=[("currency", "ASC"), ("amount", _EXTREME_ORDER[kind]), ("date", "DESC"), ("id", "DESC")],
+    )
+
+
+def spec_sum_by_category(date_from: str, date_to: str) -> ReportSpec:
+    return ReportSpec(
+        source="rollup",
+        columns=["category", "currency"],
+        aggregates=[Aggregate("total_amount", "sum")],
+        filters={"date_from": date_from, "date_to": date_to},
+        group_by=["category", "currency"],
+        order_by=[("category", "ASC"), ("currency", "ASC")],
+    )
+
+
+def spec_top_category(date_from: str, date_to: str) -> ReportSpec:
+    # DISTINCT ON виконується після GROUP BY — перша (найбільша) сума в кожній валюті
+    return ReportSpec(
+        source="rollup",
+        columns=["currency", "category"],
+        aggregates=[Aggregate("total_amount", "sum")],
+        filters={"date_from": date_from, "date_to": date_to},
+        group_by=["currency", "category"],
+        distinct_on=["currency"],
+        order_by=[("currency", "ASC"), ("total_amount", "DESC")],
+    )
+
+
+def spec_total_by_currency(date_from: str, date_to: str) -> ReportSpec:
+    return ReportSpec(
+        source="rollup",
+        columns=["currency"],
+        aggregates=[Aggregate("total_amount", "sum")],
+        filters={"date_from": date_from, "date_to": date_to},
+        group_by=["currency"],
+        order_by=[("currency", "ASC")],
+    )
+
+
+def spec_period_dashboard(date_from: str, date_to: str) -> ReportSpec:
+    # (категорія, валюта) і (валюта) — за один прохід по rollup
+    return ReportSpec(
+        source="rollup",
+        columns=["currency", "category"],
+        aggregates=[
+            Aggregate("total_amount", "sum"),
+            Aggregate("expenses_count", "count"),
+            Aggregate("min_amount", "min"),
+            Aggregate("max_amount", "max"),
+        ],
+        filters={"date_from": date_from, "date_to": date_to},
+        grouping_sets=[("currency", "category"), ("currency",)],
+        order_by=[("currency", "ASC"), ("total_amount", "DESC")],
+    )
+
+
+def spec_sum_in_base(date_from: str, date_to: str, base: str) -> ReportSpec:
+    # усі валюти, перераховані в base за курсом на день витрати; (категорія) і загальний підсумок за один прохід
+    return ReportSpec(
+        source="rollup",
+        columns=["category"],
+        aggregates=[
+            Aggregate("total_base", "sum", "amount_base"),
+            Aggregate("expenses_count", "count", where={"unconverted": False}),
+        ],
+        filters={"date_from": date_from, "date_to": date_to},
+        grouping_sets=[("category",), ()],
+        order_by=[("total_base", "DESC"), ("category", "ASC")],
+        base_currency=base,
+    )
+
+
+def spec_unconverted(date_from: str, date_to: str, base: str) -> ReportSpec:
+    # те, що не вдалося перерахувати: немає курсу валюти (або базової валюти) на дату витрати
+    return ReportSpec(
+        source="rollup",
+        columns=["currency"],
+        aggregates=[Aggregate("total_amount", "sum"), Aggregate("expenses_count", "count")],
+        filters={"date_from": date_from, "date_to": date_to, "unconverted": True},
+        group_by=["currency"],
+        order_by=[("currency", "ASC")],
+        base_currency=base,
+    )
+
+
+# ковзні вікна — календарні дні: дні без витрат у ряду є нулями
+ROLLING_DAYS = (7, 30)
+SERIES_COLUMNS = ["date", "category", "currency"]
+
+
+def spec_rolling_spend(date_from: str, date_to: str) -> ReportSpec:
+    # кожен день періоду для кожної (категорії, валюти) — ковзні суми за 7 і 30 днів одним запитом
+    return ReportSpec(
+        source="rollup",
+        columns=SERIES_COLUMNS,
+        aggregates=[Aggregate("day_total", "sum")],
+        filters={"date_from": date_from, "date_to": date_to},
+        group_by=SERIES_COLUMNS,
+        order_by=[("category", "ASC"), ("currency", "ASC"), ("date", "ASC")],
+        windows=[Window(f"sum_{n}d", "day_total", days=n) for n in ROLLING_DAYS],
+    )
+
+
+def spec_running_totals(date_from: str, date_to: str) -> ReportSpec:
+    # наростаючі підсумки: з початку місяця (і дні місяця до date_from) та з початку періоду
+    return ReportSpec(
+        source="rollup",
+        columns=SERIES_COLUMNS,
+        aggregates=[Aggregate("day_total", "sum")],
+        filters={"date_from": date_from, "date_to": date_to},
+        group_by=SERIES_COLUMNS,
+        order_by=[("category", "ASC"), ("currency", "ASC"), ("date", "ASC")],
+        windows=[Window("month_to_date", "day_total", reset="month"),
+                 Window("period_to_date", "day_total", reset="period")],
+    )
+
+
+# ---------- Режим аналітики ----------
+# Звіти виконуються над знімком витрат у пам'яті (analytics.py) замість запиту до БД.
+# Вмикається ANALYTICS_MODE=1, `cli.py --analytics` або пунктом меню звітів.
+ANALYTICS_MODE = os.getenv("ANALYTICS_MODE", "0") == "1"
+_analytics = {"enabled": ANALYTICS_MODE}
+
+
+def set_analytics_mode(enabled: bool):
+    _analytics["enabled"] = enabled
+
+
+def analytics_enabled() -> bool:
+    return _analytics["enabled"]
+
+
+def analytics_snapshot():
+    """Знімок витрат на весь процес (numpy імпортується лише тут)."""
+    try:
+        import analytics
+    except ImportError as e:
+        raise RuntimeError("Для режиму аналітики встановіть: pip install numpy") from e
+    return analytics.get_snapshot()
+
+
+def run_spec(spec: ReportSpec, conn=None) -> list[tuple]:
+    """Виконує звіт у БД або, в режимі аналітики, над знімком у пам'яті (результат той самий)."""
+    # вікна над денним рядом знімок не рахує — такі звіти завжди йдуть у БД
+    if _analytics["enabled"] and not spec.windows:
+        return analytics_snapshot().run(spec, conn)
+    return run_report(spec, conn)
+
+
+# ---------- Дані звітів (без print/input) ----------
+# Кожна функція лише рахує і повертає рядки; меню нижче та cli.py відповідають за ввід і вивід.
+# conn — необов'язкове з'єднання (щоб пакет звітів ішов через одне з'єднання).
+def fetch_expenses_by_period(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return run_spec(spec_expenses_by_period(date_from, date_to), conn)
+
+
+def fetch_expenses_by_category(category_id: int, conn=None) -> list[tuple]:
+    return run_spec(spec_expenses_by_category(category_id), conn)
+
+
+def fetch_extreme_per_category(kind: str, conn=None) -> list[tuple]:
+    return run_spec(spec_extreme_per_category(kind), conn)
+
+
+def fetch_extreme_in_period(kind: str, date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return run_spec(spec_extreme_in_period(kind, date_from, date_to), conn)
+
+
+def fetch_sum_by_category(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return run_spec(spec_sum_by_category(date_from, date_to), conn)
+
+
+def fetch_top_category(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    return run_spec(spec_top_category(date_from, date_to), conn)
+
+
+# Обробка рядків після запиту винесена окремо — її використовують і async-версії (async_api.py)
+def avg_per_day_rows(rows: list[tuple], date_from: str, date_to: str) -> list[tuple]:
+    days = _days_in_period(date_from, date_to)
+    return [
+        (curr, total, days, (total / days).quantize(CENT) if days > 0 else Decimal(0))
+        for curr, total in rows
+    ]
+
+
+def dashboard_rows(rows: list[tuple], date_from: str, date_to: str) -> list[tuple]:
+    days = _days_in_period(date_from, date_to)
+    result = []
+    top: dict[str, str] = {}
+    # рядки відсортовані за сумою спадно — перша категорія у валюті і є ТОП
+    for curr, cat, grouping, *_ in rows:
+        if grouping == 0:
+            top.setdefault(curr, cat)
+    for curr, cat, grouping, total, count, min_amount, max_amount in rows:
+        avg = (total / days).quantize(CENT) if days > 0 else Decimal(0)
+        if grouping == 1:
+            result.append(("currency", curr, top.get(curr, ""), total, count, min_amount, max_amount, avg))
+        else:
+            result.append(("category", curr, cat, total, count, min_amount, max_amount, avg))
+    return result
+
+
+def sum_in_base_rows(rows: list[tuple]) -> list[tuple]:
+    result = []
+    for cat, grouping, total, count in rows:
+        if total is None:
+            continue
+        level = "total" if grouping else "category"
+        result.append((level, cat if level == "category" else "", total.quantize(CENT), count))
+    return result
+
+
+def rolling_rows(rows: list[tuple]) -> list[tuple]:
+    # середнє на день у вікні — як у avg_per_day_rows, ділимо на всі дні, а не лише дні з витратами
+    result = []
+    for d, cat, curr, day_total, *sums in rows:
+        averages = [(total / n).quantize(CENT) for total, n in zip(sums, ROLLING_DAYS)]
+        result.append((d, cat, curr, day_total, *(v for pair in zip(sums, averages) for v in pair)))
+    return result
+
+
+def running_totals_rows(rows: list[tuple], date_from: str) -> list[tuple]:
+    first = date.fromisoformat(str(date_from))
+    result = []
+    for d, cat, curr, day_total, month_total, period_total in rows:
+        days = (d - first).days + 1
+        result.append((d, cat, curr, day_total, month_total, period_total, (period_total / days).quantize(CENT)))
+    return result
+
+
+def fetch_avg_per_day(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    """(валюта, сума, днів у періоді, середнє на день)."""
+    return avg_per_day_rows(run_spec(spec_total_by_currency(date_from, date_to), conn), date_from, date_to)
+
+
+def fetch_period_dashboard(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    """
+    (рівень, валюта, категорія, сума, кількість, мін., макс., середнє/день).
+    Рівень "currency" — підсумок по валюті (категорія = ТОП категорія), "category" — по категорії у валюті.
+    """
+    return dashboard_rows(run_spec(spec_period_dashboard(date_from, date_to), conn), date_from, date_to)
+
+
+def fetch_sum_in_base(date_from: str, date_to: str, base: str, conn=None) -> list[tuple]:
+    """
+    (рівень, категорія, сума в base, кількість). Рівень "total" — підсумок по всіх категоріях.
+    Витрати без курсу сюди не входять — див. fetch_unconverted.
+    """
+    return sum_in_base_rows(run_spec(spec_sum_in_base(date_from, date_to, base), conn))
+
+
+def fetch_unconverted(date_from: str, date_to: str, base: str, conn=None) -> list[tuple]:
+    """(валюта, сума, кількість) витрат, які не вдалося перерахувати в base."""
+    return run_spec(spec_unconverted(date_from, date_to, base), conn)
+
+
+def fetch_rolling_spend(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    """
+    (дата, категорія, валюта, сума за день, сума за 7 днів, середнє/день за 7, сума за 30, середнє/день за 30)
+    на кожен день періоду — і на дні без витрат (нулі).
+    """
+    return rolling_rows(run_spec(spec_rolling_spend(date_from, date_to), conn))
+
+
+def fetch_running_totals(date_from: str, date_to: str, conn=None) -> list[tuple]:
+    """
+    (дата, категорія, валюта, сума за день, з початку місяця, з початку періоду, середнє/день з початку періоду)
+    на кожен день періоду; в останній день середнє збігається з avg-per-day.
+    """
+    return running_totals_rows(run_spec(spec_running_totals(date_from, date_to), conn), date_from)
+
+
+# Реєстр для неінтерактивного режиму: назва -> (функція, параметри, назви колонок)
+REPORTS = {
+    "expenses-by-period": (
+        fetch_expenses_by_period, ("date_from", "date_to"),
+        ["date", "category", "title", "amount", "currency", "description"],
+    ),
+    "filter-by-title": (
+        lambda text, limit, offset=0, conn=None: search_expenses_by_title(text, limit, offset, conn),
+        ("text", "limit", "offset"),
+        ["date", "category", "title", "amount", "currency", "description"],
+    ),
+    "expenses-by-category": (
+        fetch_expenses_by_category, ("category_id",),
+        ["id", "date", "title", "amount", "currency", "description"],
+    ),
+    "max-per-category": (
+        lambda conn=None: fetch_extreme_per_category("max", conn), (),
+        ["category", "currency", "id", "date", "title", "amount", "description"],
+    ),
+    "min-per-category": (
+        lambda conn=None: fetch_extreme_per_category("min", conn), (),
+        ["category", "currency", "id", "date", "title", "amount", "description"],
+    ),
+    "max-in-period": (
+        lambda date_from, date_to, conn=None: fetch_extreme_in_period("max", date_from, date_to, conn),
+        ("date_from", "date_to"),
+        ["currency", "id", "date", "category", "title", "amount", "description"],
+    ),
+    "min-in-period": (
+        lambda date_from, date_to, conn=None: fetch_extreme_in_period("min", date_from, date_to, conn),
+        ("date_from", "date_to"),
+        ["currency", "id", "date", "category", "title", "amount", "description"],
+    ),
+    "sum-by-category": (
+        fetch_sum_by_category, ("date_from", "date_to"),
+        ["category", "currency", "total_amount"],
+    ),
+    "top-category": (
+        fetch_top_category, ("date_from", "date_to"),
+        ["currency", "category", "total_amount"],
+    ),
+    "avg-per-day": (
+        fetch_avg_per_day, ("date_from", "date_to"),
+        ["currency", "total_amount", "days", "avg_per_day"],
+    ),
+    "dashboard": (
+        fetch_period_dashboard, ("date_from", "date_to"),
+        ["level", "currency", "category", "total_amount", "expenses_count", "min_amount", "max_amount",
+         "avg_per_day"],
+    ),
+    "sum-in-base": (
+        fetch_sum_in_base, ("date_from", "date_to", "base"),
+        ["level", "category", "total", "expenses_count"],
+    ),
+    "unconverted": (
+        fetch_unconverted, ("date_from", "date_to", "base"),
+        ["currency", "total_amount", "expenses_count"],
+    ),
+    "rolling-spend": (
+        fetch_rolling_spend, ("date_from", "date_to"),
+        ["date", "category", "currency", "day_total", "sum_7d", "avg_7d", "sum_30d", "avg_30d"],
+    ),
+    "running-totals": (
+        fetch_running_totals, ("date_from", "date_to"),
+        ["date", "category", "currency", "day_total", "month_to_date", "period_to_date", "avg_per_day"],
+    ),
+}
+
+
+assert {name: params for name, (_, params, _) in REPORTS.items()} == REPORT_PARAMS, \
+    "REPORTS і report_registry.REPORT_PARAMS розійшлися"
+
+
+# ---------- Пакет звітів (MONTHLY_PACK — у report_registry.py) ----------
+# Більше потоків, ніж з'єднань у пулі, не пришвидшить: зайві чекатимуть на вільне з'єднання
+REPORT_PACK_WORKERS = int(os.getenv("REPORT_PACK_WORKERS", os.getenv("DB_POOL_MAX", "5")))
+
+
+def _run_pack_item(name: str, args: dict) -> dict:
+    fn, params, columns = REPORTS[name]
+    started = time.perf_counter()
+    try:
+        rows, error = fn(*(args[p] for p in params)), None
+    except Exception as e:
+        rows, error = [], str(e)
+    return {"name": name, "columns": columns, "rows": rows,
+            "ms": (time.perf_counter() - started) * 1000, "error": error}
+
+
+def run_report_pack(names, args: dict, workers: int | None = None) -> list[dict]:
+    """
+    Виконує звіти з REPORTS одночасно в пулі потоків; кожен бере власне з'єднання з пулу БД.
+    args — значення параметрів звітів (date_from, date_to, base ...).
+    Результати — у порядку names: {"name", "columns", "rows", "ms", "error"};
+    помилка одного звіту не зупиняє решту.
+    """
+    names = list(names)
+    if not names:
+        return []
+    workers = max(1, min(len(names), workers or REPORT_PACK_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-pack") as executor:
+        futures = [executor.submit(_run_pack_item, name, args) for name in names]
+        return [f.result() for f in futures]
+
+
 # ---------- Reports меню ----------
 def reports_menu():
     while True:
@@ -27,7 +461,10 @@ def reports_menu():
         print("6. Мінімальна витрата у кожній категорії")
         print("7. Мінімальна витрата у періоді")
         print("8. Підсумки по категоріях за період (підменю)")
-        print("9. Експорт витрат за період у CSV")
+        print("9. Експорт витрат за період (CSV / Parquet / Arrow)")
+        print("10. Пакет звітів за період (паралельно)")
+        print(f"11. Режим аналітики (знімок у пам'яті): {'увімк.' if _analytics['enabled'] else 'вимк.'}")
+        print("12. Інкрементальний експорт за період (лише зміни з минулого разу)")
         print("0. Назад")
 
         choice = input("Ваш вибір: ").strip()
@@ -50,6 +487,12 @@ def reports_menu():
             summary_menu()
         elif choice == "9":
             export_expenses_by_period_to_csv()
+        elif choice == "10":
+            report_pack_menu()
+        elif choice == "11":
+            toggle_analytics_mode()
+        elif choice == "12":
+            export_changes_menu()
         elif choice == "0":
             return
         else:
@@ -62,6 +505,13 @@ def summary_menu():
         print("1. Сума по кожній категорії за період (окремо по валюті)")
         print("2. ТОП категорія за період (де витрат найбільше, окремо по валюті)")
         print("3. Середні витрати на день за період (окремо по валюті)")
+        print("4. Зведення за період (усі підсумки одним запитом)")
+        print("5. Перебудувати денні агрегати")
+        print("6. Перевірити узгодженість денних агрегатів")
+        print("7. Сума по категоріях за період в одній валюті (за курсом)")
+        print("8. Завантажити курси валют з CSV")
+        print("9. Ковзні суми за 7 і 30 днів (по днях, окремо по валюті)")
+        print("10. Наростаючі підсумки з початку місяця і періоду (по днях)")
         print("0. Назад")
 
         choice = input("Ваш вибір: ").strip()
@@ -72,6 +522,20 @@ def summary_menu():
             report_top_category_in_period()
         elif choice == "3":
             report_avg_per_day_in_period()
+        elif choice == "4":
+            report_period_dashboard()
+        elif choice == "5":
+            rebuild_rollup_menu()
+        elif choice == "6":
+            check_rollup_menu()
+        elif choice == "7":
+            report_sum_in_base_currency()
+        elif choice == "8":
+            load_rates_from_csv()
+        elif choice == "9":
+            report_rolling_spend()
+        elif choice == "10":
+            report_running_totals()
         elif choice == "0":
             return
         else:
@@ -81,43 +545,67 @@ def summary_menu():
 # ---------- 1) Витрати за період ----------
 def report_expenses_by_period():
     print("\n--- Звіт: витрати за період ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
+    date_from, date_to = _read_period()
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    e.expense_date,
-                    c.name AS category,
-                    e.title,
-                    e.amount,
-                    e.currency,
-                    COALESCE(e.description, '')
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.expense_date BETWEEN %s AND %s
-                ORDER BY e.expense_date, e.id;
-            """, (date_from, date_to))
-            rows = cur.fetchall()
-
-        if not rows:
-            print("За цей період витрат немає.")
-            return
+    rows = fetch_expenses_by_period(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
 
-        print("\nДата | Категорія | Назва | Сума | Валюта | Опис")
-        print("-" * 100)
-        for d, cat, title, amount, curr, desc in rows:
-            tail = f" | {desc}" if desc else ""
-            print(f"{d} | {cat} | {title} | {amount} | {curr}{tail}")
-        print()
-    finally:
-        conn.close()
+    print("\nДата | Категорія | Назва | Сума | Валюта | Опис")
+    print("-" * 100)
+    for d, cat, title, amount, curr, desc in rows:
+        tail = f" | {desc}" if desc else ""
+        print(f"{d} | {cat} | {title} | {amount} | {curr}{tail}")
+    print()
 
 
 # ---------- 2) Фільтрація за назвою витрати (title) ----------
+def search_query(text: str, limit: int, offset: int, trigram: bool) -> tuple[str, tuple]:
+    """(SQL, параметри) пошуку за назвою; trigram — чи встановлено pg_trgm."""
+    pattern = f"%{text}%"
+    if trigram:
+        order_by = "similarity(LOWER(e.title), LOWER(%s)) DESC, e.expense_date, e.id"
+        params = (pattern, text, limit, offset)
+    else:
+        order_by = "e.expense_date, e.id"
+        params = (pattern, limit, offset)
+
+    sql = f"""
+        SELECT
+            e.expense_date,
+            c.name AS category,
+            e.title,
+            e.amount,
+            e.currency,
+            COALESCE(e.description, '')
+        FROM expenses e
+        JOIN categories c ON c.id = e.category_id
+        WHERE LOWER(e.title) LIKE LOWER(%s)
+        ORDER BY {order_by}
+        LIMIT %s OFFSET %s;
+    """
+    return sql, params
+
+
+def search_expenses_by_title(text: str, limit: int, offset: int = 0, conn=None) -> list[tuple]:
+    """
+    Пошук витрат за частиною назви.
+    З pg_trgm — через GIN-індекс і з ранжуванням за схожістю; без нього — звичайний LIKE, за датою.
+    """
+    if _analytics["enabled"]:
+        # у знімку немає ранжування pg_trgm — збіги за датою, як без розширення
+        spec = ReportSpec(columns=EXPENSE_ROW, filters={"title_like": text},
+                          order_by=[("date", "ASC"), ("id", "ASC")], limit=limit + offset)
+        return run_spec(spec, conn)[offset:]
+
+    sql, params = search_query(text, limit, offset, has_extension("pg_trgm"))
+    with use_conn(conn) as c:
+        with c.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+
 def report_filter_by_title():
     print("\n--- Фільтрація витрат за назвою витрати (title) ---")
     text = input("Введіть назву витрати або її частину: ").strip()
@@ -126,26 +614,15 @@ def report_filter_by_title():
         print(" Текст не може бути порожнім")
         return
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    e.expense_date,
-                    c.name AS category,
-                    e.title,
-                    e.amount,
-                    e.currency,
-                    COALESCE(e.description, '')
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE LOWER(e.title) LIKE LOWER(%s)
-                ORDER BY e.expense_date, e.id;
-            """, (f"%{text}%",))
-            rows = cur.fetchall()
+    offset = 0
+    while True:
+        # +1 рядок, щоб знати, чи є наступна сторінка
+        rows = search_expenses_by_title(text, SEARCH_PAGE_SIZE + 1, offset)
+        has_more = len(rows) > SEARCH_PAGE_SIZE
+        rows = rows[:SEARCH_PAGE_SIZE]
 
         if not rows:
-            print("Нічого не знайдено.")
+            print("Нічого не знайдено." if offset == 0 else "Більше нічого не знайдено.")
             return
 
         print("\nДата | Категорія | Назва | Сума | Валюта | Опис")
@@ -154,11 +631,16 @@ def report_filter_by_title():
             tail = f" | {desc}" if desc else ""
             print(f"{d} | {cat} | {title} | {amount} | {curr}{tail}")
         print()
-    finally:
-        conn.close()
+
+        if not has_more:
+            return
+        more = input(f"Показати наступні {SEARCH_PAGE_SIZE}? (так/ні): ").strip().lower()
+        if more != "так":
+            return
+        offset += SEARCH_PAGE_SIZE
 
 
-# ---------- 3) Витрати по конкретній категорії (WHERE e.category_id = %s) ----------
+# ---------- 3) Витрати по конкретній категорії ----------
 def report_expenses_by_category_id():
     print("\n--- Звіт: витрати по конкретній категорії (category_id) ---")
     list_categories()
@@ -173,342 +655,500 @@ def report_expenses_by_category_id():
         print(" Категорію з таким ID не знайдено.")
         return
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    e.id,
-                    e.expense_date,
-                    e.title,
-                    e.amount,
-                    e.currency,
-                    COALESCE(e.description, '')
-                FROM expenses e
-                WHERE e.category_id = %s
-                ORDER BY e.expense_date, e.id;
-            """, (category_id,))
-            rows = cur.fetchall()
-
-        if not rows:
-            print("У цій категорії витрат немає.")
-            return
-
-        print("\nID | Дата | Назва | Сума | Валюта | Опис")
-        print("-" * 100)
-        for eid, dt, title, amount, curr, desc in rows:
-            tail = f" | {desc}" if desc else ""
-            print(f"{eid} | {dt} | {title} | {amount} | {curr}{tail}")
-        print()
-    finally:
-        conn.close()
-
-
-# ---------- 4) Максимальна витрата у кожній категорії (DISTINCT ON) ----------
-def report_max_expense_per_category():
-    print("\n--- Звіт: максимальна витрата у кожній категорії (окремо по валюті) ---")
-
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT ON (c.id, e.currency)
-                    c.name AS category,
-                    e.currency,
-                    e.id,
-                    e.expense_date,
-                    e.title,
-                    e.amount,
-                    COALESCE(e.description, '') AS description
-                FROM categories c
-                JOIN expenses e ON e.category_id = c.id
-                ORDER BY c.id, e.currency, e.amount DESC, e.expense_date DESC, e.id DESC;
-            """)
-            rows = cur.fetchall()
+    rows = fetch_expenses_by_category(category_id)
+    if not rows:
+        print("У цій категорії витрат немає.")
+        return
 
-        if not rows:
-            print("Витрат поки що немає.")
-            return
+    print("\nID | Дата | Назва | Сума | Валюта | Опис")
+    print("-" * 100)
+    for eid, dt, title, amount, curr, desc in rows:
+        tail = f" | {desc}" if desc else ""
+        print(f"{eid} | {dt} | {title} | {amount} | {curr}{tail}")
+    print()
 
-        print("\nКатегорія | Валюта | ID | Дата | Назва | Сума | Опис")
-        print("-" * 120)
-        for cat, curr, eid, dt, title, amount, desc in rows:
-            tail = f" | {desc}" if desc else ""
-            print(f"{cat} | {curr} | {eid} | {dt} | {title} | {amount}{tail}")
-        print()
-    finally:
-        conn.close()
 
+# ---------- 4) / 6) Максимальна / мінімальна витрата у кожній категорії (DISTINCT ON) ----------
+def _report_extreme_per_category(kind: str):
+    label = "максимальна" if kind == "max" else "мінімальна"
+    print(f"\n--- Звіт: {label} витрата у кожній категорії (окремо по валюті) ---")
 
-# ---------- 5) Максимальна витрата за вибраний період ----------
-def report_max_expense_in_period():
-    print("\n--- Звіт: максимальна витрата у періоді (окремо по валюті) ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
+    rows = fetch_extreme_per_category(kind)
+    if not rows:
+        print("Витрат поки що немає.")
+        return
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT ON (e.currency)
-                    e.currency,
-                    e.id,
-                    e.expense_date,
-                    c.name AS category,
-                    e.title,
-                    e.amount,
-                    COALESCE(e.description, '') AS description
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.expense_date BETWEEN %s AND %s
-                ORDER BY e.currency, e.amount DESC, e.expense_date DESC, e.id DESC;
-            """, (date_from, date_to))
-            rows = cur.fetchall()
+    print("\nКатегорія | Валюта | ID | Дата | Назва | Сума | Опис")
+    print("-" * 120)
+    for cat, curr, eid, dt, title, amount, desc in rows:
+        tail = f" | {desc}" if desc else ""
+        print(f"{cat} | {curr} | {eid} | {dt} | {title} | {amount}{tail}")
+    print()
 
-        if not rows:
-            print("За цей період витрат немає.")
-            return
 
-        print("\nMAX витрата за період (окремо по валюті):")
-        for curr, eid, dt, cat, title, amount, desc in rows:
-            tail = f" | {desc}" if desc else ""
-            print(f"{curr}: ID={eid} | {dt} | {cat} | {title} | {amount} {curr}{tail}")
-        print()
-    finally:
-        conn.close()
+def report_max_expense_per_category():
+    _report_extreme_per_category("max")
 
 
-# ---------- 6) Мінімальна витрата у кожній категорії ----------
 def report_min_expense_per_category():
-    print("\n--- Звіт: мінімальна витрата у кожній категорії (окремо по валюті) ---")
+    _report_extreme_per_category("min")
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT ON (c.id, e.currency)
-                    c.name AS category,
-                    e.currency,
-                    e.id,
-                    e.expense_date,
-                    e.title,
-                    e.amount,
-                    COALESCE(e.description, '') AS description
-                FROM categories c
-                JOIN expenses e ON e.category_id = c.id
-                ORDER BY c.id, e.currency, e.amount ASC, e.expense_date DESC, e.id DESC;
-            """)
-            rows = cur.fetchall()
 
-        if not rows:
-            print("Витрат поки що немає.")
-            return
+# ---------- 5) / 7) Максимальна / мінімальна витрата за вибраний період ----------
+def _report_extreme_in_period(kind: str):
+    label = "максимальна" if kind == "max" else "мінімальна"
+    print(f"\n--- Звіт: {label} витрата у періоді (окремо по валюті) ---")
+    date_from, date_to = _read_period()
 
-        print("\nКатегорія | Валюта | ID | Дата | Назва | Сума | Опис")
-        print("-" * 120)
-        for cat, curr, eid, dt, title, amount, desc in rows:
-            tail = f" | {desc}" if desc else ""
-            print(f"{cat} | {curr} | {eid} | {dt} | {title} | {amount}{tail}")
-        print()
-    finally:
-        conn.close()
+    rows = fetch_extreme_in_period(kind, date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
 
+    print(f"\n{kind.upper()} витрата за період (окремо по валюті):")
+    for curr, eid, dt, cat, title, amount, desc in rows:
+        tail = f" | {desc}" if desc else ""
+        print(f"{curr}: ID={eid} | {dt} | {cat} | {title} | {amount} {curr}{tail}")
+    print()
 
-# ---------- 7) Мінімальна витрата за вибраний період ----------
-def report_min_expense_in_period():
-    print("\n--- Звіт: мінімальна витрата у періоді (окремо по валюті) ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT ON (e.currency)
-                    e.currency,
-                    e.id,
-                    e.expense_date,
-                    c.name AS category,
-                    e.title,
-                    e.amount,
-                    COALESCE(e.description, '') AS description
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.expense_date BETWEEN %s AND %s
-                ORDER BY e.currency, e.amount ASC, e.expense_date DESC, e.id DESC;
-            """, (date_from, date_to))
-            rows = cur.fetchall()
+def report_max_expense_in_period():
+    _report_extreme_in_period("max")
 
-        if not rows:
-            print("За цей період витрат немає.")
-            return
 
-        print("\nMIN витрата за період (окремо по валюті):")
-        for curr, eid, dt, cat, title, amount, desc in rows:
-            tail = f" | {desc}" if desc else ""
-            print(f"{curr}: ID={eid} | {dt} | {cat} | {title} | {amount} {curr}{tail}")
-        print()
-    finally:
-        conn.close()
+def report_min_expense_in_period():
+    _report_extreme_in_period("min")
 
 
+# ---------- 8) Підсумки — з денних агрегатів expense_daily_rollup, а не з усіх рядків expenses ----------
 # ---------- 8.1) Сума по кожній категорії за період ----------
 def report_sum_by_category_in_period():
     print("\n--- Підсумки: сума по кожній категорії за період (окремо по валюті) ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
+    date_from, date_to = _read_period()
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    c.name AS category,
-                    e.currency,
-                    SUM(e.amount) AS total_amount
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.expense_date BETWEEN %s AND %s
-                GROUP BY c.name, e.currency
-                ORDER BY c.name, e.currency;
-            """, (date_from, date_to))
-            rows = cur.fetchall()
+    rows = fetch_sum_by_category(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
 
-        if not rows:
-            print("За цей період витрат немає.")
-            return
-
-        print("\nКатегорія | Валюта | Загальна сума")
-        print("-" * 60)
-        for name, curr, total in rows:
-            print(f"{name} | {curr} | {total}")
-        print()
-    finally:
-        conn.close()
+    print("\nКатегорія | Валюта | Загальна сума")
+    print("-" * 60)
+    for name, curr, total in rows:
+        print(f"{name} | {curr} | {total}")
+    print()
 
 
 # ---------- 8.2) ТОП категорія за період ----------
 def report_top_category_in_period():
     print("\n--- Підсумки: ТОП категорія за період (окремо по валюті) ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
+    date_from, date_to = _read_period()
 
-    conn = get_conn()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                WITH sums AS (
-                    SELECT
-                        c.name AS category,
-                        e.currency,
-                        SUM(e.amount) AS total_amount
-                    FROM expenses e
-                    JOIN categories c ON c.id = e.category_id
-                    WHERE e.expense_date BETWEEN %s AND %s
-                    GROUP BY c.name, e.currency
-                )
-                SELECT DISTINCT ON (currency)
-                    currency, category, total_amount
-                FROM sums
-                ORDER BY currency, total_amount DESC;
-            """, (date_from, date_to))
-            rows = cur.fetchall()
-
-        if not rows:
-            print("За цей період витрат немає.")
-            return
+    rows = fetch_top_category(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
 
-        print("\nВалюта | ТОП категорія | Сума")
-        print("-" * 55)
-        for curr, cat, total in rows:
-            print(f"{curr} | {cat} | {total}")
-        print()
-    finally:
-        conn.close()
+    print("\nВалюта | ТОП категорія | Сума")
+    print("-" * 55)
+    for curr, cat, total in rows:
+        print(f"{curr} | {cat} | {total}")
+    print()
 
 
 # ---------- 8.3) Середні витрати на день за період ----------
 def report_avg_per_day_in_period():
     print("\n--- Підсумки: середні витрати на день за період (окремо по валюті) ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
+    date_from, date_to = _read_period()
+
+    rows = fetch_avg_per_day(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
+
+    print("\nВалюта | Сума за період | Днів | Середнє/день")
+    print("-" * 70)
+    for curr, total, days, avg in rows:
+        print(f"{curr} | {total} | {days} | {avg}")
+    print()
+
+
+# ---------- 8.4) Зведення за період: 8.1 + 8.2 + 8.3 + min/max одним запитом ----------
+def report_period_dashboard():
+    print("\n--- Зведення за період (окремо по валюті) ---")
+    date_from, date_to = _read_period()
+
+    rows = fetch_period_dashboard(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
+
+    print("\nВалюта | Сума | Кількість | Середнє/день | Мін. | Макс. | ТОП категорія")
+    print("-" * 100)
+    for level, curr, top, total, count, min_amount, max_amount, avg in rows:
+        if level == "currency":
+            print(f"{curr} | {total} | {count} | {avg} | {min_amount} | {max_amount} | {top}")
+
+    print("\nКатегорія | Валюта | Сума | Кількість")
+    print("-" * 60)
+    for level, curr, cat, total, count, *_ in rows:
+        if level == "category":
+            print(f"{cat} | {curr} | {total} | {count}")
+    print()
+
+
+# ---------- 8.7) Сума по категоріях в одній валюті ----------
+def report_sum_in_base_currency():
+    print("\n--- Підсумки: сума по категоріях за період в одній валюті ---")
+    date_from, date_to = _read_period()
+    base = read_currency("Валюта звіту (Enter = UAH, UAH/USD/EUR): ")
+
+    rows = fetch_sum_in_base(date_from, date_to, base)
+    missing = fetch_unconverted(date_from, date_to, base)
+    if not rows and not missing:
+        print("За цей період витрат немає.")
+        return
+
+    if rows:
+        print(f"\nКатегорія | Сума, {base} | Кількість")
+        print("-" * 60)
+        for level, cat, total, count in rows:
+            if level == "category":
+                print(f"{cat} | {total} | {count}")
+        for level, _, total, count in rows:
+            if level == "total":
+                print("-" * 60)
+                print(f"Разом | {total} | {count}")
+
+    if missing:
+        print("\n Без курсу (не враховано в сумі вище):")
+        for curr, total, count in missing:
+            print(f"  {curr} | {total} | {count}")
+        print(" Завантажте курси валют (пункт 8).")
+    print()
+
+
+# ---------- 8.9) Ковзні суми за 7 і 30 днів ----------
+def report_rolling_spend():
+    print("\n--- Підсумки: ковзні суми за 7 і 30 днів (окремо по валюті) ---")
+    date_from, date_to = _read_period()
+
+    rows = fetch_rolling_spend(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
+
+    group = None
+    for d, cat, curr, day_total, sum_7d, avg_7d, sum_30d, avg_30d in rows:
+        if (cat, curr) != group:
+            group = (cat, curr)
+            print(f"\n{cat} | {curr}")
+            print("Дата | За день | 7 днів | Середнє/день | 30 днів | Середнє/день")
+            print("-" * 80)
+        print(f"{d} | {day_total} | {sum_7d} | {avg_7d} | {sum_30d} | {avg_30d}")
+    print()
+
+
+# ---------- 8.10) Наростаючі підсумки ----------
+def report_running_totals():
+    print("\n--- Підсумки: наростаючі суми з початку місяця і періоду (окремо по валюті) ---")
+    date_from, date_to = _read_period()
+
+    rows = fetch_running_totals(date_from, date_to)
+    if not rows:
+        print("За цей період витрат немає.")
+        return
 
-    conn = get_conn()
+    group = None
+    for d, cat, curr, day_total, month_total, period_total, avg in rows:
+        if (cat, curr) != group:
+            group = (cat, curr)
+            print(f"\n{cat} | {curr}")
+            print("Дата | За день | З початку місяця | З початку періоду | Середнє/день")
+            print("-" * 80)
+        print(f"{d} | {day_total} | {month_total} | {period_total} | {avg}")
+    print()
+
+
+# ---------- 9) Експорт за період у CSV ----------
+EXPORT_ITERSIZE = int(os.getenv("EXPORT_ITERSIZE", "2000"))
+
+
+def write_period_csv(date_from: str, date_to: str, filename: str, conn=None) -> int:
+    """
+    Пише витрати за період у CSV потоково (server-side cursor, по EXPORT_ITERSIZE рядків),
+    спочатку у тимчасовий файл, який потім атомарно перейменовується у filename.
+    Повертає кількість рядків; якщо їх 0 — файл не створюється.
+    """
+    directory = os.path.dirname(filename) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".export_", suffix=".csv.tmp", dir=directory)
+
+    count = 0
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    e.currency,
-                    SUM(e.amount) AS total_amount,
-                    (DATE(%s) - DATE(%s) + 1) AS days_count
-                FROM expenses e
-                WHERE e.expense_date BETWEEN %s AND %s
-                GROUP BY e.currency
-                ORDER BY e.currency;
-            """, (date_to, date_from, date_from, date_to))
-            rows = cur.fetchall()
+        with os.fdopen(fd, "w", newline="", encoding="utf-8-sig") as f, use_conn(conn) as c:
+            with c.cursor(name="export_expenses") as cur:
+                cur.itersize = EXPORT_ITERSIZE
+                cur.execute(*compile_report(spec_expenses_by_period(date_from, date_to)))
+
+                writer = csv.writer(f, delimiter=";")
+                writer.writerow(["date", "category", "title", "amount", "currency", "description"])
+                for r in cur:
+                    writer.writerow(r)
+                    count += 1
+            f.flush()
+            os.fsync(f.fileno())
+            c.commit()
+
+        if count:
+            os.chmod(tmp_path, 0o644)  # mkstemp створює файл з правами 0600
+            os.replace(tmp_path, filename)
+        return count
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-        if not rows:
-            print("За цей період витрат немає.")
-            return
 
-        print("\nВалюта | Сума за період | Днів | Середнє/день")
-        print("-" * 70)
-        for curr, total, days in rows:
-            days_int = int(days)
-            avg = float(total) / days_int if days_int > 0 else 0
-            print(f"{curr} | {total} | {days_int} | {avg:.2f}")
-        print()
+# ---------- 9a) Колонковий експорт: Parquet / Arrow IPC ----------
+EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "65536"))
+
+
+class _DictionaryEncoder:
+    """Словник рядків, спільний для всіх пакетів файлу: індекси не змінюються, новий пакет лише дописує значення."""
+
+    def __init__(self):
+        self.values: list[str] = []
+        self.index: dict[str, int] = {}
+
+    def encode(self, pa, column):
+        indices = []
+        for value in column:
+            i = self.index.get(value)
+            if i is None:
+                i = self.index[value] = len(self.values)
+                self.values.append(value)
+            indices.append(i)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), pa.array(self.values, pa.string()))
+
+
+def write_period_columnar(date_from: str, date_to: str, filename: str, fmt: str = "parquet", conn=None) -> int:
+    """
+    Пише витрати за період у Parquet (fmt="parquet") або Arrow IPC (fmt="arrow") з типізованими колонками:
+    date — date32, amount — decimal128(12, 2), category/currency — словникові рядки.
+    Рядки читаються server-side курсором по EXPORT_ROW_GROUP_SIZE — кожна порція стає row group / record batch.
+    Як і CSV: запис у тимчасовий файл з атомарним перейменуванням; 0 рядків — файл не створюється.
+    """
+    try:
+        import pyarrow as pa
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Для експорту в Parquet/Arrow встановіть: pip install pyarrow") from e
+
+    schema = pa.schema([
+        ("date", pa.date32()),
+        ("category", pa.dictionary(pa.int32(), pa.string())),
+        ("title", pa.string()),
+        ("amount", pa.decimal128(12, 2)),
+        ("currency", pa.dictionary(pa.int32(), pa.string())),
+        ("description", pa.string()),
+    ])
+    categories, currencies = _DictionaryEncoder(), _DictionaryEncoder()
+
+    directory = os.path.dirname(filename) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".export_", suffix=f".{fmt}.tmp", dir=directory)
+    os.close(fd)
+
+    count = 0
+    writer = None
+    try:
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+        else:
+            # дельти словника: новий пакет дописує лише нові категорії, а не весь словник
+            writer = pa.ipc.new_file(tmp_path, schema, options=pa.ipc.IpcWriteOptions(
+                compression="zstd", emit_dictionary_deltas=True))
+
+        with use_conn(conn) as c:
+            with c.cursor(name="export_expenses_columnar") as cur:
+                cur.itersize = EXPORT_ROW_GROUP_SIZE
+                cur.execute(*compile_report(spec_expenses_by_period(date_from, date_to)))
+                while True:
+                    rows = cur.fetchmany(EXPORT_ROW_GROUP_SIZE)
+                    if not rows:
+                        break
+                    dates, cats, titles, amounts, currs, descs = zip(*rows)
+                    writer.write_batch(pa.record_batch([
+                        pa.array(dates, pa.date32()),
+                        categories.encode(pa, cats),
+                        pa.array(titles, pa.string()),
+                        pa.array(amounts, pa.decimal128(12, 2)),
+                        currencies.encode(pa, currs),
+                        pa.array(descs, pa.string()),
+                    ], schema=schema))
+                    count += len(rows)
+            c.commit()
+
+        writer.close()
+        writer = None
+        if count:
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, filename)
+        return count
     finally:
-        conn.close()
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_period_export(date_from: str, date_to: str, filename: str, fmt: str = "csv", conn=None) -> int:
+    """Експорт за період у потрібному форматі (EXPORT_FORMATS)."""
+    if fmt == "csv":
+        return write_period_csv(date_from, date_to, filename, conn)
+    if fmt in ("parquet", "arrow"):
+        return write_period_columnar(date_from, date_to, filename, fmt, conn)
+    raise ValueError(f"Невідомий формат експорту: {fmt}")
 
 
-# ---------- 9) Експорт за період у CSV ----------
 def export_expenses_by_period_to_csv():
-    print("\n--- Експорт у CSV: витрати за період ---")
-    date_from = read_date("Дата ВІД (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_to = read_date("Дата ДО (YYYY-MM-DD або DD.MM.YYYY): ")
-    date_from, date_to = _normalize_period(date_from, date_to)
+    print("\n--- Експорт: витрати за період ---")
+    date_from, date_to = _read_period()
+    fmt = input("Формат (Enter = csv, csv/parquet/arrow): ").strip().lower() or "csv"
+    if fmt not in EXPORT_FORMATS:
+        print(" Невірний формат. Дозволено: csv, parquet, arrow.")
+        return
 
-    conn = get_conn()
+    filename = f"{EXPORT_DIR}/expenses_{date_from}_to_{date_to}.{fmt}"
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                SELECT
-                    e.expense_date,
-                    c.name AS category,
-                    e.title,
-                    e.amount,
-                    e.currency,
-                    COALESCE(e.description, '')
-                FROM expenses e
-                JOIN categories c ON c.id = e.category_id
-                WHERE e.expense_date BETWEEN %s AND %s
-                ORDER BY e.expense_date, e.id;
-            """, (date_from, date_to))
-            rows = cur.fetchall()
+        count = write_period_export(date_from, date_to, filename, fmt)
+    except Exception as e:
+        print(" Не вдалося зробити експорт.")
+        print(e)
+        return
 
-        if not rows:
-            print("За цей період витрат немає — експортувати нічого.")
-            return
+    if not count:
+        print("За цей період витрат немає — експортувати нічого.")
+        return
 
-        os.makedirs("export", exist_ok=True)
-        filename = f"export/expenses_{date_from}_to_{date_to}.csv"
+    print(f"✅ Файл збережено: {filename} (рядків: {count})")
 
-        with open(filename, "w", newline="", encoding="utf-8-sig") as f:
-            writer = csv.writer(f, delimiter=";")
-            writer.writerow(["date", "category", "title", "amount", "currency", "description"])
-            for r in rows:
-                writer.writerow(r)
 
-        print(f"✅ CSV збережено: {filename}")
+# ---------- 12) Інкрементальний експорт (див. incremental_export.py) ----------
+def export_changes_menu():
+    from incremental_export import export_changes, compact_changes, drop_stream
+
+    print("\n--- Інкрементальний експорт: витрати за період ---")
+    date_from, date_to = _read_period()
+    print("1. Вивантажити зміни з минулого експорту")
+    print("2. Злити дельти в повний знімок")
+    print("3. Зробити повний знімок заново")
+    print("4. Забути потік (журнал змін для нього більше не зберігається)")
+    print("0. Скасувати")
+    action = input("Ваш вибір: ").strip()
+    if action not in ("1", "2", "3", "4"):
+        print(" Скасовано.")
+        return
+
+    try:
+        if action == "2":
+            result = compact_changes(date_from, date_to)
+        elif action == "4":
+            result = drop_stream(date_from, date_to)
+        else:
+            result = export_changes(date_from, date_to, full=action == "3")
+    except ValueError as e:
+        print(f" {e}")
+        return
     except Exception as e:
         print(" Не вдалося зробити експорт.")
         print(e)
-    finally:
-        conn.close()
+        return
+
+    if action == "4":
+        print("✅ Потік забуто, файли лишились на диску." if result else "Такого потоку немає.")
+    elif action == "2":
+        if result["rows"] is None:
+            print(f"Дельт немає — знімок актуальний: {result['file']}")
+        else:
+            print(f"✅ Злито дельт: {result['deltas']}. Знімок: {result['file']} (рядків: {result['rows']})")
+    elif result["mode"] == "snapshot":
+        print(f"✅ Повний знімок: {result['file']} (рядків: {result['rows']})")
+    elif result["file"] is None:
+        print("Змін з минулого експорту немає.")
+    else:
+        print(f"✅ Дельта: {result['file']} (рядків: {result['rows']}, з них видалених: {result['deleted']})")
+
+
+# ---------- 10) Пакет звітів за період ----------
+def report_pack_menu():
+    print("\n--- Пакет звітів за період (паралельно) ---")
+    available = [name for name, (_, params, _) in REPORTS.items()
+                 if set(params) <= {"date_from", "date_to", "base"}]
+    for i, name in enumerate(available, start=1):
+        mark = " *" if name in MONTHLY_PACK else ""
+        print(f"{i}. {name}{mark}")
+    raw = input("Номери звітів через кому (Enter = місячний пакет, позначено *): ").strip()
+
+    if raw:
+        names = []
+        for part in raw.split(","):
+            part = part.strip()
+            if not part.isdigit() or not 1 <= int(part) <= len(available):
+                print(f" Невірний номер: {part}")
+                return
+            if available[int(part) - 1] not in names:
+                names.append(available[int(part) - 1])
+    else:
+        names = list(MONTHLY_PACK)
+
+    date_from, date_to = _read_period()
+    args = {"date_from": date_from, "date_to": date_to, "base": BASE_CURRENCY}
+    if any("base" in REPORTS[name][1] for name in names):
+        args["base"] = read_currency("Валюта звіту (Enter = UAH, UAH/USD/EUR): ")
+
+    started = time.perf_counter()
+    results = run_report_pack(names, args)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    for r in results:
+        print(f"\n=== {r['name']} ({r['ms']:.0f} мс) ===")
+        if r["error"]:
+            print(f" Помилка: {r['error']}")
+            continue
+        if not r["rows"]:
+            print("Даних немає.")
+            continue
+        print(" | ".join(r["columns"]))
+        print("-" * 80)
+        for row in r["rows"]:
+            print(" | ".join("" if v is None else str(v) for v in row))
+
+    print("\nЧас виконання:")
+    for r in results:
+        status = "помилка" if r["error"] else f"рядків: {len(r['rows'])}"
+        print(f"  {r['name']}: {r['ms']:.0f} мс ({status})")
+    print(f"  Загалом: {wall_ms:.0f} мс (послідовно було б ~{sum(r['ms'] for r in results):.0f} мс)")
+    print()
+
+
+# ---------- 11) Режим аналітики ----------
+def toggle_analytics_mode():
+    if _analytics["enabled"]:
+        set_analytics_mode(False)
+        print(" Режим аналітики вимкнено: звіти знову виконуються в БД.")
+        return
+
+    print("Завантаження витрат у пам'ять...")
+    try:
+        snapshot = analytics_snapshot()
+        snapshot.refresh(full=True)
+    except RuntimeError as e:
+        print(f" {e}")
+        return
+    info = snapshot.info()
+    set_analytics_mode(True)
+    print(f" Режим аналітики увімкнено: {info['rows']} витрат, {info['bytes'] / 1024 / 1024:.1f} МБ, "
+          f"завантаження {info['load_ms']:.0f} мс.")
@@ -0,0 +1,107 @@
+# rollup.py
+"""
+Службові дії над expense_daily_rollup (денні агрегати для підсумкових звітів).
+Сам rollup підтримується тригерами (див. migrations.py, міграція 4); тут — повна перебудова
+і перевірка узгодженості з "сирими" даними в expenses.
+"""
+from db import DB_BACKEND, get_conn
+from report_engine import money_alias
+
+# rollup vs expenses по кожному ключу (день, категорія, валюта); розбіжності — де щось не збігається.
+# Суми з actual у SQLite — вирази, тож тип CENTS їм дає назва колонки (money_alias)
+_CHECK_SQL = f"""
+    WITH actual AS (
+        SELECT expense_date AS day, category_id, COALESCE(currency, 'UAH') AS currency,
+               SUM(amount) AS total, COUNT(*) AS cnt, MIN(amount) AS min_amount, MAX(amount) AS max_amount
+        FROM expenses
+        GROUP BY 1, 2, 3
+    )
+    SELECT
+        COALESCE(a.day, r.day),
+        COALESCE(a.category_id, r.category_id),
+        COALESCE(a.currency, r.currency),
+        r.total, a.total AS {money_alias("actual_total")},
+        r.cnt, a.cnt,
+        r.min_amount, a.min_amount AS {money_alias("actual_min")},
+        r.max_amount, a.max_amount AS {money_alias("actual_max")}
+    FROM actual a
+    FULL JOIN expense_daily_rollup r
+      ON r.day = a.day AND r.category_id = a.category_id AND r.currency = a.currency
+    WHERE r.day IS NULL
+       OR a.day IS NULL
+       OR r.total <> a.total
+       OR r.cnt <> a.cnt
+       OR r.min_amount <> a.min_amount
+       OR r.max_amount <> a.max_amount
+    ORDER BY 1, 2, 3;
+"""
+
+
+def rebuild_rollup() -> int:
+    """Повністю перераховує rollup з expenses (одна транзакція). Повертає кількість ключів."""
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            if DB_BACKEND == "postgres":
+                cur.execute("LOCK TABLE expense_daily_rollup IN EXCLUSIVE MODE;")
+            # у SQLite транзакція з записом і так виключна
+            cur.execute("DELETE FROM expense_daily_rollup;")
+            cur.execute("""
+                INSERT INTO expense_daily_rollup
+                    (day, category_id, currency, total, cnt, min_amount, max_amount)
+                SELECT expense_date, category_id, COALESCE(currency, 'UAH'),
+                       SUM(amount), COUNT(*), MIN(amount), MAX(amount)
+                FROM expenses
+                GROUP BY 1, 2, 3;
+            """)
+            count = cur.rowcount
+        conn.commit()
+        return count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def check_rollup() -> list[tuple]:
+    """
+    Порівнює rollup з агрегатами по expenses.
+    Повертає розбіжності: (day, category_id, currency, rollup_total, actual_total, rollup_cnt, actual_cnt,
+    rollup_min, actual_min, rollup_max, actual_max). Порожній список — усе узгоджено.
+    """
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_CHECK_SQL)
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def rebuild_rollup_menu():
+    print("\n--- Перебудова денних агрегатів (rollup) ---")
+    try:
+        count = rebuild_rollup()
+    except Exception as e:
+        print(" Не вдалося перебудувати агрегати.")
+        print(e)
+        return
+    print(f" Агрегати перебудовано (ключів день/категорія/валюта: {count})")
+
+
+def check_rollup_menu():
+    print("\n--- Перевірка узгодженості агрегатів (rollup) ---")
+    rows = check_rollup()
+    if not rows:
+        print(" Агрегати узгоджені з витратами.")
+        return
+
+    print(f" Знайдено розбіжностей: {len(rows)}")
+    print("\nДата | Категорія ID | Валюта | Сума (rollup / факт) | Кількість (rollup / факт)")
+    print("-" * 100)
+    for day, cat_id, curr, r_total, a_total, r_cnt, a_cnt, *_ in rows[:50]:
+        print(f"{day} | {cat_id} | {curr} | {r_total} / {a_total} | {r_cnt} / {a_cnt}")
+    if len(rows) > 50:
+        print(f"... і ще {len(rows) - 50}")
+    print(" Виправити: перебудуйте агрегати.")
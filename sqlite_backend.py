@@ -0,0 +1,202 @@
+# sqlite_backend.py
+"""
+Вбудований бекенд SQLite (DB_BACKEND=sqlite): база в одному файлі (DB_SQLITE_PATH), без сервера і мережі.
+Для ноутбуків без доступу до Postgres і для швидких локальних прогонів.
+
+З'єднання поводиться як psycopg2 настільки, наскільки цього потребують модулі застосунку:
+  - параметри %s (перекладаються у ? SQLite);
+  - транзакція починається першим запитом і триває до commit()/rollback(); autocommit = True — без неї;
+  - суми зберігаються цілими копійками з типом CENTS: Decimal-параметр — завжди сума (пишеться копійками),
+    колонки CENTS і вирази з назвою "колонка [CENTS]" повертаються як Decimal, колонки DATE — як date;
+    курси — REAL (передаються рядками або float) і теж повертаються як Decimal;
+  - cursor() — контекстний менеджер; name= (server-side курсор у Postgres) приймається й ігнорується.
+Журнал WAL: читання не блокує запис і навпаки, тож з'єднання з пулу працюють паралельно
+(записує одночасно лише одне — інші чекають до SQLITE_BUSY_TIMEOUT секунд).
+
+Відмінності SQL (DISTINCT ON, GROUPING SETS) враховує report_engine, схему — migrations.py.
+"""
+import os
+import re
+import time
+import sqlite3
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+import query_log
+
+DB_SQLITE_PATH = os.getenv(
+    "DB_SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "expenses.db")
+)
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "10"))
+
+# статуси транзакції — ті самі значення, що й psycopg2.extensions.TRANSACTION_STATUS_* (див. db.ConnectionPool)
+TRANSACTION_STATUS_IDLE = 0
+TRANSACTION_STATUS_INTRANS = 2
+
+_PLACEHOLDER_RE = re.compile(r"%([%s])")
+
+
+def _adapt_cents(value: Decimal) -> int:
+    # Decimal-параметр — сума: пишеться цілими копійками, з округленням як у NUMERIC(12, 2)
+    return int((value * 100).to_integral_value(ROUND_HALF_UP))
+
+
+sqlite3.register_adapter(Decimal, _adapt_cents)
+sqlite3.register_adapter(date, date.isoformat)
+
+
+def _convert_date(value: bytes):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return text  # '-infinity' у курсах UAH
+
+
+def _convert_cents(value: bytes) -> Decimal:
+    # ціле — сума в копійках; дробове — сума, перерахована за курсом (REAL), теж у копійках
+    return Decimal(value.decode()).scaleb(-2)
+
+
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("CENTS", _convert_cents)
+
+
+def _row(cursor, row: tuple) -> tuple:
+    # REAL (курси) -> Decimal, як NUMERIC у Postgres
+    return tuple(Decimal(repr(v)) if type(v) is float else v for v in row)
+
+
+def _lower(value):
+    # вбудований LOWER у SQLite змінює регістр лише латиниці
+    return value.lower() if isinstance(value, str) else value
+
+
+def _exchange_rate_day(currency, day):
+    # як однойменна функція в Postgres (міграція 6): курс UAH зберігається одним рядком
+    return "-infinity" if currency == "UAH" else day
+
+
+def _translate(query: str, params) -> str:
+    """%s -> ?, %% -> % (як у psycopg2: % екранується лише в запитах з параметрами)."""
+    if params is None:
+        return query
+    return _PLACEHOLDER_RE.sub(lambda m: "?" if m.group(1) == "s" else "%", query)
+
+
+class SQLiteCursor:
+    def __init__(self, connection: "SQLiteConnection"):
+        self.connection = connection
+        self._cur = connection._raw.cursor()
+        self.name = None      # для query_log: це не server-side курсор
+        self.query = None
+        self.itersize = 2000
+
+    @property
+    def rowcount(self) -> int:
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        error = None
+        try:
+            self.connection._begin()
+            self._cur.execute(_translate(query, vars), vars or ())
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            query_log.observe(self, query, started, error)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        error = None
+        try:
+            self.connection._begin()
+            self._cur.executemany(_translate(query, ()), vars_list)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            query_log.observe(self, query, started, error)
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size: int | None = None):
+        return self._cur.fetchmany(size or self.itersize)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def close(self):
+        self._cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class SQLiteConnection:
+    def __init__(self, raw: sqlite3.Connection):
+        self._raw = raw
+        self.autocommit = False
+        self.closed = False
+
+    def _begin(self):
+        if not self.autocommit and not self._raw.in_transaction:
+            self._raw.execute("BEGIN")
+
+    def cursor(self, name: str | None = None, cursor_factory=None) -> SQLiteCursor:
+        return SQLiteCursor(self)
+
+    def commit(self):
+        if self._raw.in_transaction:
+            self._raw.execute("COMMIT")
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.execute("ROLLBACK")
+
+    def get_transaction_status(self) -> int:
+        return TRANSACTION_STATUS_INTRANS if self._raw.in_transaction else TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        if not self.closed:
+            self._raw.close()
+            self.closed = True
+
+
+def connect() -> SQLiteConnection:
+    # isolation_level=None: модуль sqlite3 сам транзакцій не відкриває — це робить SQLiteConnection._begin
+    raw = sqlite3.connect(
+        DB_SQLITE_PATH,
+        timeout=SQLITE_BUSY_TIMEOUT,
+        isolation_level=None,
+        check_same_thread=False,   # з'єднання з пулу може перейти в інший потік (пакет звітів)
+        # колонки з оголошеним типом DATE чи CENTS, а також вирази з назвою "колонка [DATE]" (у них типу немає)
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+    )
+    raw.execute("PRAGMA journal_mode = WAL;")
+    # у WAL коміт без fsync журналу: після збою застосунку дані цілі, після збою живлення
+    # можна втратити останні коміти
+    raw.execute("PRAGMA synchronous = NORMAL;")
+    raw.execute("PRAGMA foreign_keys = ON;")
+    raw.create_function("LOWER", 1, _lower, deterministic=True)
+    raw.create_function("exchange_rate_day", 2, _exchange_rate_day, deterministic=True)
+    raw.row_factory = _row
+    return SQLiteConnection(raw)
+
+
+def database_label() -> str:
+    return f"SQLite {sqlite3.sqlite_version} ({DB_SQLITE_PATH})"
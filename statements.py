@@ -0,0 +1,93 @@
+# statements.py
+"""
+Реєстр підготовлених запитів для частих вибірок за id.
+Запит готується (PREPARE) один раз на кожне фізичне з'єднання з пулу, далі виконується за іменем
+(EXECUTE) — Postgres не розбирає і не планує його на кожен виклик.
+
+    SELECT_BY_ID = statements.register("expense_by_id", "SELECT ... WHERE e.id = %s;")
+    statements.execute(cur, SELECT_BY_ID, (expense_id,))
+
+Час кожного запиту накопичується в stats(). PREPARED_STATEMENTS=0 вимикає підготовку
+(запити йдуть як звичайні) — так можна порівняти час з підготовкою і без.
+У SQLite PREPARE/EXECUTE немає: модуль sqlite3 сам кешує підготовлені запити на з'єднанні.
+"""
+import os
+import time
+import threading
+import weakref
+from db import DB_BACKEND
+
+PREPARED_STATEMENTS = os.getenv("PREPARED_STATEMENTS", "1") != "0" and DB_BACKEND == "postgres"
+
+_sql: dict[str, str] = {}            # назва -> SQL з %s (для звичайного виконання)
+_prepare_sql: dict[str, str] = {}    # назва -> PREPARE ... з $1, $2 ...
+_execute_sql: dict[str, str] = {}    # назва -> EXECUTE назва(%s, ...)
+
+# які запити вже підготовлені на з'єднанні; нове з'єднання (зокрема після reconnect) — порожній набір
+_prepared: "weakref.WeakKeyDictionary[object, set[str]]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_stats: dict[str, dict] = {}
+
+
+def register(name: str, sql: str) -> str:
+    """Реєструє запит з параметрами %s під назвою name (ідентифікатор SQL). Повертає назву."""
+    parts = sql.strip().rstrip(";").split("%s")
+    numbered = parts[0] + "".join(f"${i}{part}" for i, part in enumerate(parts[1:], start=1))
+    args = ", ".join(["%s"] * (len(parts) - 1))
+
+    _sql[name] = sql
+    _prepare_sql[name] = f"PREPARE {name} AS {numbered}"
+    _execute_sql[name] = f"EXECUTE {name}({args})" if args else f"EXECUTE {name}"
+    with _lock:
+        _stats.setdefault(name, {"calls": 0, "total_ms": 0.0, "prepares": 0, "prepare_ms": 0.0})
+    return name
+
+
+def execute(cur, name: str, params=()):
+    """Виконує зареєстрований запит на курсорі cur (готує його на з'єднанні, якщо ще не готували)."""
+    if not PREPARED_STATEMENTS:
+        started = time.perf_counter()
+        cur.execute(_sql[name], params)
+        _record(name, (time.perf_counter() - started) * 1000)
+        return
+
+    raw = cur.connection
+    with _lock:
+        prepared = _prepared.setdefault(raw, set())
+    if name not in prepared:
+        started = time.perf_counter()
+        cur.execute(_prepare_sql[name])
+        prepared.add(name)  # PREPARE не відкочується разом з транзакцією
+        _record(name, (time.perf_counter() - started) * 1000, prepare=True)
+
+    started = time.perf_counter()
+    cur.execute(_execute_sql[name], params)
+    _record(name, (time.perf_counter() - started) * 1000)
+
+
+def _record(name: str, ms: float, prepare: bool = False):
+    with _lock:
+        s = _stats[name]
+        if prepare:
+            s["prepares"] += 1
+            s["prepare_ms"] += ms
+        else:
+            s["calls"] += 1
+            s["total_ms"] += ms
+
+
+def stats() -> dict[str, dict]:
+    """Назва -> calls, total_ms, avg_ms, prepares (скільки разів готували), prepare_ms."""
+    with _lock:
+        result = {}
+        for name, s in _stats.items():
+            item = dict(s)
+            item["avg_ms"] = s["total_ms"] / s["calls"] if s["calls"] else 0.0
+            result[name] = item
+        return result
+
+
+def reset_stats():
+    with _lock:
+        for s in _stats.values():
+            s.update(calls=0, total_ms=0.0, prepares=0, prepare_ms=0.0)
@@ -0,0 +1,70 @@
+# tests/conftest.py
+"""
+Оточення тестів — до першого імпорту db (він читає DB_BACKEND і .env один раз).
+Типово тести працюють з тимчасовою SQLite і не чіпають базу з .env; Postgres — лише явно:
+    DB_BACKEND=postgres DB_NAME=expense_plans python -m pytest tests/test_query_plans.py
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SCHEMA_STAMP_FILE", "")   # міграції перевіряються щоразу, файл-позначка не пишеться
+os.environ.setdefault("SQL_LOG", "0")
+os.environ.setdefault("ANALYTICS_MODE", "0")
+# тести даних видаляють усе — тож SQLite завжди тимчасова, навіть якщо DB_SQLITE_PATH задано
+_SQLITE_DIR = tempfile.mkdtemp(prefix="expenses_tests_")
+os.environ["DB_SQLITE_PATH"] = os.path.join(_SQLITE_DIR, "expenses.db")
+
+# таблиці з даними; порядок — щоб не порушити зовнішні ключі
+_DATA_TABLES = ("expense_changes", "export_watermarks", "expenses", "categories", "expense_daily_rollup",
+                "exchange_rates")
+
+
+def pytest_unconfigure(config):
+    from db import close_pool
+
+    close_pool()
+    shutil.rmtree(_SQLITE_DIR, ignore_errors=True)
+
+
+def _clear_data():
+    """Видаляє витрати, категорії й курси, скидає кеші."""
+    from db import get_conn
+    from categories import invalidate_category_cache
+    from rates import invalidate_rates_cache
+    import reports
+
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            for table in _DATA_TABLES:
+                cur.execute(f"DELETE FROM {table};")
+        conn.commit()
+    finally:
+        conn.close()
+    invalidate_category_cache()
+    invalidate_rates_cache()
+    reports.set_analytics_mode(False)
+
+
+@pytest.fixture(scope="session")
+def sqlite_db():
+    """
+    Тимчасова SQLite зі схемою застосунку; на інших бекендах тести даних пропускаються.
+    Повертає функцію очищення даних — для фікстур з ширшою областю, ніж empty_db.
+    """
+    from db import DB_BACKEND, init_db
+
+    if DB_BACKEND != "sqlite":
+        pytest.skip("тести даних — лише на тимчасовій SQLite (DB_BACKEND=sqlite)")
+    init_db()
+    return _clear_data
+
+
+@pytest.fixture
+def empty_db(sqlite_db):
+    """Порожня база перед тестом."""
+    sqlite_db()
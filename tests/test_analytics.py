@@ -0,0 +1,32 @@
+# tests/test_analytics.py
+"""Знімок витрат у пам'яті (analytics.py): копійки з сум і перевірка специфікацій звітів."""
+from decimal import Decimal
+
+import pytest
+
+import report_engine
+from analytics import _cents
+from report_engine import Aggregate, ReportSpec, validate_report
+
+
+@pytest.mark.parametrize("amount, cents", [(0.29, 29), (Decimal("0.29"), 29),
+                                           (Decimal("12345678.91"), 1234567891), (9999999999.99, 999999999999)])
+def test_cents_are_rounded_not_truncated(amount, cents):
+    assert _cents(amount) == cents
+
+
+def test_validate_report_compiles_each_shape_once(monkeypatch):
+    compiled = []
+    real_compile = report_engine._Compiler.compile
+    monkeypatch.setattr(report_engine._Compiler, "compile", lambda self: compiled.append(1) or real_compile(self))
+    monkeypatch.setattr(report_engine, "_validated", set())
+
+    def spec(date_from):
+        return ReportSpec(columns=["currency"], aggregates=[Aggregate("total", "sum")], group_by=["currency"],
+                          filters={"date_from": date_from}, source="rollup")
+
+    validate_report(spec("2026-01-01"))
+    validate_report(spec("2026-02-01"))   # інші значення фільтрів — та сама форма
+    assert len(compiled) == 1
+    with pytest.raises(ValueError):
+        validate_report(ReportSpec(columns=["nope"]))
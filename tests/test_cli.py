@@ -0,0 +1,32 @@
+# tests/test_cli.py
+"""Розбір аргументів cli.py: --help і помилки в аргументах не імпортують базу й рушій звітів."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("reports", "rates", "categories", "report_engine", "db", "psycopg2")
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["sum-by-category", "--from", "не дата"]])
+def test_parser_does_not_import_reports(argv):
+    code = (
+        "import sys, cli\n"
+        "try:\n"
+        f"    cli.build_parser().parse_args({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print('loaded:', ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "loaded: "
+
+
+def test_registry_matches_reports():
+    from report_registry import REPORT_PARAMS
+    from reports import REPORTS
+
+    assert {name: params for name, (_, params, _) in REPORTS.items()} == REPORT_PARAMS
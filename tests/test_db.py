@@ -0,0 +1,16 @@
+# tests/test_db.py
+"""Обгортка з'єднання з пулу: після close() — помилка драйвера, як у закритого з'єднання."""
+import pytest
+
+from db import _driver_error, get_conn
+
+
+def test_closed_pooled_connection_raises_driver_error(sqlite_db):
+    conn = get_conn()
+    conn.close()
+    assert conn.closed
+    conn.close()   # повторний close() нічого не робить
+    with pytest.raises(_driver_error()):
+        conn.cursor()
+    with pytest.raises(_driver_error()):
+        conn.autocommit = True
@@ -0,0 +1,146 @@
+# tests/test_expenses.py
+"""
+Шляхи запису й читання витрат на тимчасовій SQLite: тригери rollup, keyset-пагінація списку,
+масові зміни порціями.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+import categories
+import db
+from db import get_conn
+from expenses import INSERT_EXPENSE_SQL, fetch_expenses_page, update_expense
+from bulk import bulk_update, bulk_delete
+from report_engine import money_alias
+from rollup import check_rollup
+
+
+def _execute(sql: str, params=()):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall() if cur.description else None
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def expenses(empty_db):
+    """200 витрат у двох категоріях і валютах, по кілька на день — щоб ключ сторінки збігався за датою."""
+    categories = [_execute("INSERT INTO categories (name) VALUES (%s) RETURNING id;", (name,))[0][0]
+                  for name in ("Їжа", "Транспорт")]
+    rng = random.Random(3)
+    rows = []
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            for i in range(200):
+                values = (f"Витрата {i}", Decimal(rng.randint(1, 100_000)) / 100,
+                          date(2026, 1, 1) + timedelta(days=rng.randrange(40)), rng.choice(categories),
+                          None, rng.choice(["UAH", "USD"]))
+                cur.execute(INSERT_EXPENSE_SQL, values)
+                rows.append((cur.fetchone()[0], *values))
+        conn.commit()
+    finally:
+        conn.close()
+    return {"categories": categories, "rows": rows}
+
+
+def _ids(sql: str, params=()) -> list[int]:
+    return [r[0] for r in _execute(sql, params)]
+
+
+def test_rollup_follows_writes(expenses):
+    assert check_rollup() == []
+    some = [r[0] for r in expenses["rows"][:30]]
+    _execute("UPDATE expenses SET amount = amount + %s WHERE id = %s;", (Decimal("0.10"), some[0]))
+    _execute("UPDATE expenses SET expense_date = %s, currency = %s WHERE id = %s;", ("2026-03-01", "EUR", some[1]))
+    _execute("UPDATE expenses SET category_id = %s WHERE id = %s;", (expenses["categories"][0], some[2]))
+    _execute("DELETE FROM expenses WHERE id = %s;", (some[3],))
+    _execute("DELETE FROM expenses WHERE expense_date < %s;", ("2026-01-05",))
+    assert check_rollup() == []
+    # останню витрату ключа видалено — ключа в rollup більше немає
+    assert not _execute("SELECT 1 FROM expense_daily_rollup WHERE day < %s;", ("2026-01-05",))
+
+
+def test_amounts_stored_as_cents(expenses):
+    assert _execute("SELECT DISTINCT typeof(amount) FROM expenses;") == [("integer",)]
+    total = sum(r[2] for r in expenses["rows"])
+    assert _execute(f"SELECT SUM(amount) AS {money_alias('total')} FROM expenses;") == [(total,)]
+    _execute("UPDATE expenses SET amount = %s WHERE id = %s;", (Decimal("0.105"), expenses["rows"][0][0]))
+    assert _execute("SELECT amount FROM expenses WHERE id = %s;", (expenses["rows"][0][0],)) == [(Decimal("0.11"),)]
+
+
+def test_keyset_pages_walk_both_ways(expenses):
+    expected = sorted(expenses["rows"], key=lambda r: (r[3], r[0]), reverse=True)
+    pages, after = [], None
+    while True:
+        page = fetch_expenses_page({}, 17, after=after)
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1][1], page[-1][0])
+    assert [row[0] for page in pages for row in page] == [r[0] for r in expected]
+
+    # назад від останньої сторінки — ті самі сторінки у зворотному порядку
+    for previous, current in zip(reversed(pages[:-1]), reversed(pages[1:])):
+        assert fetch_expenses_page({}, 17, before=(current[0][1], current[0][0])) == previous
+
+
+def test_keyset_page_filters(expenses):
+    category = expenses["categories"][1]
+    filters = {"category_id": category, "currency": "USD", "date_from": "2026-01-10", "date_to": "2026-01-20"}
+    expected = [r[0] for r in sorted(expenses["rows"], key=lambda r: (r[3], r[0]), reverse=True)
+                if r[4] == category and r[6] == "USD" and date(2026, 1, 10) <= r[3] <= date(2026, 1, 20)]
+    assert [row[0] for row in fetch_expenses_page(filters, 1000)] == expected
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 1000])
+def test_bulk_update_in_chunks(expenses, chunk_size):
+    filters = {"date_from": "2026-01-10", "date_to": "2026-01-25", "category_id": expenses["categories"][0]}
+    matching = _ids("SELECT id FROM expenses WHERE expense_date BETWEEN %s AND %s AND category_id = %s ORDER BY id;",
+                    ("2026-01-10", "2026-01-25", expenses["categories"][0]))
+    assert matching
+
+    count = bulk_update(filters, {"currency": "EUR", "title": "Масова"}, chunk_size)
+    assert count == len(matching)
+    assert _ids("SELECT id FROM expenses WHERE currency = 'EUR' AND title = 'Масова' ORDER BY id;") == matching
+    assert check_rollup() == []
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 1000])
+def test_bulk_delete_in_chunks(expenses, chunk_size):
+    filters = {"currency": "USD", "date_to": "2026-01-20"}
+    kept = [r[0] for r in expenses["rows"] if not (r[6] == "USD" and r[3] <= date(2026, 1, 20))]
+
+    count = bulk_delete(filters, chunk_size)
+    assert count == len(expenses["rows"]) - len(kept)
+    assert _ids("SELECT id FROM expenses ORDER BY id;") == sorted(kept)
+    assert check_rollup() == []
+
+
+def test_update_expense_with_single_connection_pool(expenses, monkeypatch, capsys):
+    """Меню редагування не тримає з'єднання, поки шукає категорію: вистачає пулу з одного з'єднання."""
+    eid = expenses["rows"][0][0]
+    single = db.ConnectionPool(minconn=1, maxconn=1, timeout=0.5, healthcheck_idle=30)
+    monkeypatch.setattr(db, "_pool", single)
+    monkeypatch.setattr(categories, "CATEGORY_CACHE_TTL", 0)
+    answers = iter([str(eid), "Нова назва", "2026-02-01", "транспорт", "12,34", "EUR", "-"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    try:
+        update_expense()
+    finally:
+        single.closeall()
+        monkeypatch.undo()   # далі — звичайний пул тестів
+
+    assert "Витрату оновлено." in capsys.readouterr().out
+    assert _execute("SELECT title, expense_date, category_id, amount, currency, description FROM expenses "
+                    "WHERE id = %s;", (eid,)) == [("Нова назва", date(2026, 2, 1), expenses["categories"][1],
+                                                   Decimal("12.34"), "EUR", None)]
+    assert check_rollup() == []
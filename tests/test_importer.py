@@ -0,0 +1,46 @@
+# tests/test_importer.py
+"""Імпорт CSV на тимчасовій SQLite: невалідні рядки відхиляються поіменно, решта імпортується."""
+from decimal import Decimal
+
+import pytest
+
+from db import get_conn
+from importer import import_expenses_csv
+from utils import parse_amount
+
+
+@pytest.mark.parametrize("raw", ["inf", "-inf", "nan", "1e999", "10000000000", "0", "-5", "abc", ""])
+def test_parse_amount_rejects(raw):
+    assert parse_amount(raw) is None
+
+
+def test_parse_amount_accepts():
+    assert parse_amount(" 1 250,50 грн ") == 1250.5
+
+
+def test_bad_lines_are_rejected_not_fatal(empty_db, tmp_path):
+    path = tmp_path / "import.csv"
+    path.write_text(
+        "date;category;title;amount;currency;description\n"
+        "2026-01-05;Їжа;Кава;45,50;UAH;\n"
+        "2026-01-05;Їжа;Нескінченна;inf;UAH;\n"
+        "2026-01-06;Їжа;Переповнення;1e999;UAH;\n"
+        "2026-01-06;Їжа;Завелика;10000000000;UAH;\n"
+        "2026-01-06;Їжа;Округлюється в нуль;0,004;UAH;\n"
+        "31.02.2026;Їжа;Дата;10;UAH;\n"
+        "2026-01-07;Їжа;Валюта;10;GBP;\n"
+        "2026-01-07;Транспорт;Таксі;120;;поїздка\n",
+        encoding="utf-8",
+    )
+    result = import_expenses_csv(str(path))
+
+    assert result["inserted"] == 2
+    assert [line for line, _ in result["rejected"]] == [3, 4, 5, 6, 7, 8]
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT title, amount, currency, description FROM expenses ORDER BY id;")
+            rows = cur.fetchall()
+    finally:
+        conn.close()
+    assert rows == [("Кава", Decimal("45.50"), "UAH", None), ("Таксі", Decimal("120.00"), "UAH", "поїздка")]
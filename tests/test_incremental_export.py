@@ -0,0 +1,120 @@
+# tests/test_incremental_export.py
+"""
+Інкрементальний експорт на тимчасовій SQLite: знімок + дельти (і compact_changes) мають давати
+той самий стан, що й новий повний знімок; журнал змін чиститься, коли потоків не лишилось.
+"""
+import csv
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from db import get_conn
+from expenses import INSERT_EXPENSE_SQL
+from incremental_export import export_changes, compact_changes, drop_stream
+
+PERIOD = ("2026-01-15", "2026-02-28")
+
+
+def _execute(sql: str, params=()):
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone() if cur.description else None
+        conn.commit()
+        return row
+    finally:
+        conn.close()
+
+
+def _add(title: str, amount: str, day: date, category_id: int) -> int:
+    return _execute(INSERT_EXPENSE_SQL, (title, Decimal(amount), day, category_id, None, "UAH"))[0]
+
+
+def _read(path: str) -> list[list[str]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f, delimiter=";"))[1:]
+
+
+@pytest.fixture
+def stream(empty_db, tmp_path):
+    """Категорії, 60 витрат за січень-березень і перший (повний) знімок потоку за PERIOD."""
+    categories = [_execute("INSERT INTO categories (name) VALUES (%s) RETURNING id;", (name,))[0]
+                  for name in ("Їжа", "Транспорт")]
+    ids = [_add(f"Витрата {i}", f"{10 + i}.{i % 100:02d}", date(2026, 1, 1) + timedelta(days=i * 3 % 80),
+                categories[i % 2]) for i in range(60)]
+    first = export_changes(*PERIOD, directory=str(tmp_path))
+    assert first["mode"] == "snapshot"
+    return {"dir": str(tmp_path), "categories": categories, "ids": ids, "files": [first["file"]]}
+
+
+def _in_period(expense_id: int) -> bool:
+    day = _execute("SELECT expense_date FROM expenses WHERE id = %s;", (expense_id,))[0]
+    return PERIOD[0] <= str(day) <= PERIOD[1]
+
+
+def _change_everything(s: dict, round_no: int):
+    """Нові, змінені, перенесені в період і з нього, видалені витрати й перейменування категорії."""
+    inside = [i for i in s["ids"] if _in_period(i)]
+    outside = [i for i in s["ids"] if not _in_period(i)]
+    s["ids"].append(_add(f"Нова {round_no}", "99.99", date(2026, 2, 1), s["categories"][0]))
+    s["ids"].append(_add(f"Поза періодом {round_no}", "5.00", date(2026, 3, 30), s["categories"][1]))
+    _execute("UPDATE expenses SET amount = amount + %s, title = %s WHERE id = %s;",
+             (Decimal(1), f"Змінена {round_no}", inside[0]))
+    _execute("UPDATE expenses SET expense_date = %s WHERE id = %s;", ("2026-03-25", inside[1]))
+    _execute("UPDATE expenses SET expense_date = %s WHERE id = %s;", ("2026-02-10", outside[0]))
+    _execute("DELETE FROM expenses WHERE id = %s;", (inside[2],))
+    s["ids"].remove(inside[2])
+    _execute("UPDATE categories SET name = %s WHERE id = %s;", (f"Транспорт {round_no}", s["categories"][1]))
+
+
+def _fresh_snapshot(tmp_path) -> list[list[str]]:
+    result = export_changes(*PERIOD, directory=str(tmp_path / "fresh"))
+    assert result["mode"] == "snapshot"
+    return _read(result["file"])
+
+
+def test_deltas_apply_to_snapshot(stream, tmp_path):
+    for round_no in range(1, 4):
+        _change_everything(stream, round_no)
+        result = export_changes(*PERIOD, directory=stream["dir"])
+        assert result["mode"] == "delta" and result["file"] is not None
+        stream["files"].append(result["file"])
+    assert export_changes(*PERIOD, directory=stream["dir"])["file"] is None   # змін немає — файлу немає
+
+    state = {row[0]: row for row in _read(stream["files"][0])}
+    for path in stream["files"][1:]:
+        for op, *row in _read(path):
+            if op == "D":
+                state.pop(row[0], None)
+            else:
+                state[row[0]] = row
+    expected = _fresh_snapshot(tmp_path)
+    assert sorted(state.values()) == sorted(expected)
+
+
+def test_compact_matches_full_snapshot(stream, tmp_path):
+    for round_no in range(1, 3):
+        _change_everything(stream, round_no)
+        export_changes(*PERIOD, directory=stream["dir"])
+
+    result = compact_changes(*PERIOD, directory=stream["dir"])
+    assert result["deltas"] == 2
+    assert _read(result["file"]) == _fresh_snapshot(tmp_path)   # і порядок рядків той самий
+    # другий прогін без нових дельт нічого не змінює
+    assert compact_changes(*PERIOD, directory=stream["dir"])["rows"] is None
+
+
+def test_dropping_last_stream_empties_change_log(stream, tmp_path):
+    _change_everything(stream, 1)
+    assert _execute("SELECT COUNT(*) FROM expense_changes;")[0] > 0
+
+    assert drop_stream(*PERIOD, directory=stream["dir"])
+    assert not drop_stream(*PERIOD, directory=stream["dir"])
+    assert _execute("SELECT COUNT(*) FROM expense_changes;")[0] == 0
+    # поки потоків немає, журнал не ведеться
+    _add("Без потоку", "1.00", date(2026, 2, 2), stream["categories"][0])
+    assert _execute("SELECT COUNT(*) FROM expense_changes;")[0] == 0
+    # наступний запуск потоку — знову з повного знімка
+    assert export_changes(*PERIOD, directory=stream["dir"])["mode"] == "snapshot"
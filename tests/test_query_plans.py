@@ -0,0 +1,66 @@
+# tests/test_query_plans.py
+"""
+Регресія планів запитів: кожен звіт з reports.REPORTS — EXPLAIN (ANALYZE, BUFFERS) проти бюджету
+з plan_check.BUDGETS. Потрібні DB_BACKEND=postgres і база з еталонним набором (plan_check.py --reset),
+інакше тести пропускаються; перевірка бюджетів для всіх звітів працює завжди.
+"""
+import pytest
+
+import plan_check
+from reports import REPORTS
+
+
+def test_every_report_has_budget():
+    missing = sorted(set(REPORTS) - set(plan_check.BUDGETS))
+    assert not missing, f"Немає бюджету плану в plan_check.BUDGETS: {', '.join(missing)}"
+
+
+def test_no_budget_for_unknown_report():
+    unknown = sorted(set(plan_check.BUDGETS) - set(REPORTS))
+    assert not unknown, f"Бюджети для звітів, яких немає в REPORTS: {', '.join(unknown)}"
+
+
+@pytest.fixture(scope="module")
+def plan_db():
+    from db import DB_BACKEND, get_conn, has_extension
+    import reports
+
+    if DB_BACKEND != "postgres":
+        pytest.skip("перевірка планів — лише DB_BACKEND=postgres")
+    try:
+        conn = get_conn()
+    except Exception as e:
+        pytest.skip(f"немає з'єднання з Postgres: {e}")
+    try:
+        try:
+            data = plan_check.dataset(conn)
+        except Exception as e:
+            conn.rollback()
+            pytest.skip(f"у базі немає схеми застосунку: {e}")
+        if data["count"] != plan_check.REFERENCE_ROWS:
+            pytest.skip(f"у базі {data['count']} витрат, бюджети — для еталонного набору "
+                        f"{plan_check.REFERENCE_ROWS} (plan_check.py --reset)")
+        reports.set_analytics_mode(False)
+        yield conn, data, has_extension("pg_trgm")
+    finally:
+        conn.close()
+
+
+def _assert_within(name: str, budget, measured: dict, trigram: bool):
+    found = plan_check.problems(budget, measured, trigram)
+    assert not found, f"{name}: {'; '.join(found)}\n  {'; '.join(measured['scans'])}"
+
+
+@pytest.mark.parametrize("name", sorted(REPORTS))
+def test_report_plan(plan_db, name):
+    conn, data, trigram = plan_db
+    budget = plan_check.BUDGETS.get(name)
+    if budget is None:
+        pytest.fail(f"Немає бюджету плану для '{name}'")
+    _assert_within(name, budget, plan_check.measure_report(conn, name, data), trigram)
+
+
+@pytest.mark.parametrize("name", sorted(plan_check.PAGE_CHECKS))
+def test_page_plan(plan_db, name):
+    conn, data, trigram = plan_db
+    _assert_within(name, plan_check.PAGE_CHECKS[name][1], plan_check.measure_page(conn, name, data), trigram)
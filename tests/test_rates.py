@@ -0,0 +1,89 @@
+# tests/test_rates.py
+"""Курси на тимчасовій SQLite: кеш окремих курсів, перерахунок сум і звіти за курсами без обмеження в часі."""
+import threading
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+import rates
+import reports
+from db import get_conn
+
+
+def _add_rate(day: str, currency: str, rate: str):
+    # напряму в БД, як завантаження з іншого процесу: кеш цього процесу не скидається
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO exchange_rates (rate_date, currency, rate) VALUES (%s, %s, %s);",
+                        (day, currency, rate))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_cache_notices_rates_from_other_process(empty_db, monkeypatch):
+    monkeypatch.setattr(rates, "RATES_CACHE_TTL", 0)
+    assert rates.get_rate("USD", "2026-03-01") is None
+    _add_rate("2026-02-01", "USD", "41.5")
+    assert rates.get_rate("USD", "2026-03-01") == Decimal("41.5")
+    assert rates.convert(Decimal("83.00"), "UAH", date(2026, 3, 1), base="USD") == Decimal("2.00")
+
+
+def test_revalidation_does_not_hold_lock_during_query(empty_db, monkeypatch):
+    """Поки один потік чекає на з'єднання для звірки версії, інший не блокується на _rates_lock."""
+    monkeypatch.setattr(rates, "RATES_CACHE_TTL", 0)
+    rates.invalidate_rates_cache()
+    in_query, release = threading.Event(), threading.Event()
+    real_get_conn = rates.get_conn
+
+    def slow_get_conn():
+        in_query.set()
+        release.wait(5)
+        return real_get_conn()
+
+    monkeypatch.setattr(rates, "get_conn", slow_get_conn)
+    worker = threading.Thread(target=rates._revalidate_rates_cache)
+    worker.start()
+    try:
+        assert in_query.wait(5)
+        assert rates._rates_lock.acquire(timeout=1)
+        rates._rates_lock.release()
+    finally:
+        release.set()
+        worker.join()
+
+
+@pytest.fixture
+def far_dated(empty_db):
+    """Курси USD лише за січень-лютий 2026 і витрати далеко після них — за межами року від завантаження."""
+    from expenses import INSERT_EXPENSE_SQL
+
+    _add_rate("2026-01-01", "USD", "40")
+    _add_rate("2026-02-01", "USD", "42")
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("INSERT INTO categories (name) VALUES (%s) RETURNING id;", ("Їжа",))
+            category_id = cur.fetchone()[0]
+            for amount, day, currency in (("84.00", "2030-05-05", "UAH"), ("10.00", "2026-01-15", "USD"),
+                                          ("10.00", "2029-12-31", "USD"), ("5.00", "2030-01-01", "EUR")):
+                cur.execute(INSERT_EXPENSE_SQL, ("Витрата", Decimal(amount), day, category_id, None, currency))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("analytics_mode", [False, True])
+def test_last_rate_has_no_horizon(far_dated, analytics_mode):
+    reports.set_analytics_mode(analytics_mode)
+    if analytics_mode:
+        reports.analytics_snapshot().refresh(full=True)
+    args = ("2026-01-01", "2030-12-31")
+
+    rows = {row[0]: row for row in reports.REPORTS["sum-in-base"][0](*args, "USD")}
+    # 84 UAH / 42 + 10 USD (курс 40) + 10 USD (останній курс 42, через 4 роки)
+    assert rows["total"][2:] == (Decimal("22.00"), 3)
+    assert reports.REPORTS["unconverted"][0](*args, "USD") == [("EUR", Decimal("5.00"), 1)]
+    assert rates.get_rate("USD", "2031-01-01") == Decimal("42")
@@ -0,0 +1,308 @@
+# tests/test_reports.py
+"""
+Кожен звіт з reports.REPORTS на тимчасовій SQLite проти наївного обчислення в Python
+над тими самими витратами (без SQL, rollup і курсів по днях), а також режим аналітики проти SQL.
+"""
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from reports import REPORTS, CENT, ROLLING_DAYS
+
+CATEGORIES = ["Їжа", "Транспорт", "Житло", "Розваги", "Здоров'я"]
+TITLES = ["Кава", "кава з собою", "Таксі", "Taxi додому", "Оренда", "Кіно", "Аптека", "Продукти"]
+CURRENCIES = ["UAH", "UAH", "UAH", "USD", "EUR"]
+FIRST_DAY, LAST_DAY = date(2026, 1, 1), date(2026, 4, 30)
+PERIOD = ("2026-02-10", "2026-03-20")
+ARGS = {"date_from": PERIOD[0], "date_to": PERIOD[1], "base": "USD", "text": "кава", "limit": 5, "offset": 2}
+
+
+@dataclass
+class Expense:
+    id: int
+    date: date
+    category_id: int
+    category: str
+    title: str
+    amount: Decimal
+    currency: str
+    description: str | None
+
+
+@pytest.fixture(scope="module")
+def dataset(sqlite_db):
+    """Витрати за 4 місяці в трьох валютах; курс USD — з 10 січня, EUR — лише з березня."""
+    from db import get_conn
+    from expenses import INSERT_EXPENSE_SQL
+
+    sqlite_db()
+    rng = random.Random(7)
+    rates = [(FIRST_DAY + timedelta(days=9 + 7 * i), "USD", Decimal("41.10") + Decimal(i) / 4) for i in range(16)]
+    rates += [(date(2026, 3, 1) + timedelta(days=10 * i), "EUR", Decimal("44.80") + Decimal(i) / 5) for i in range(6)]
+    expenses = []
+    conn = get_conn()
+    try:
+        with conn.cursor() as cur:
+            category_ids = {}
+            for name in CATEGORIES:
+                cur.execute("INSERT INTO categories (name) VALUES (%s) RETURNING id;", (name,))
+                category_ids[name] = cur.fetchone()[0]
+            # курси — рядками: Decimal-параметр у SQLite — це сума в копійках
+            cur.executemany("INSERT INTO exchange_rates (rate_date, currency, rate) VALUES (%s, %s, %s);",
+                            [(day, currency, str(rate)) for day, currency, rate in rates])
+
+            rows = []
+            for _ in range(600):
+                day = FIRST_DAY + timedelta(days=rng.randrange((LAST_DAY - FIRST_DAY).days + 1))
+                rows.append((rng.choice(TITLES), Decimal(rng.randint(1, 500_000)) / 100, day,
+                             rng.choice(CATEGORIES), rng.choice([None, "", "чек"]), rng.choice(CURRENCIES)))
+            # однакові крайні суми: max/min серед рівних — пізніша дата, потім більший id
+            rows += [("Кава", Decimal("9999.99"), date(2026, 2, 12), "Їжа", None, "USD"),
+                     ("Кава", Decimal("9999.99"), date(2026, 3, 2), "Їжа", None, "USD"),
+                     ("Кава", Decimal("0.01"), date(2026, 3, 5), "Їжа", None, "EUR"),
+                     ("Кава", Decimal("0.01"), date(2026, 3, 5), "Їжа", None, "EUR")]
+            for title, amount, day, category, description, currency in rows:
+                cur.execute(INSERT_EXPENSE_SQL,
+                            (title, amount, day, category_ids[category], description, currency))
+                expenses.append(Expense(cur.fetchone()[0], day, category_ids[category], category, title,
+                                        amount, currency, description))
+        conn.commit()
+    finally:
+        conn.close()
+    return {"expenses": expenses, "rates": rates, "category_id": category_ids["Їжа"]}
+
+
+# ---------- наївні обчислення ----------
+def _in_period(expenses, date_from, date_to):
+    lo, hi = date.fromisoformat(date_from), date.fromisoformat(date_to)
+    return [e for e in expenses if lo <= e.date <= hi]
+
+
+def _row(e: Expense) -> tuple:
+    return e.date, e.category, e.title, e.amount, e.currency, e.description or ""
+
+
+def _rate(rates, currency, day):
+    if currency == "UAH":
+        return Decimal(1)
+    known = [(d, r) for d, c, r in rates if c == currency and d <= day]
+    return max(known)[1] if known else None
+
+
+def _totals(expenses, key):
+    totals = defaultdict(Decimal)
+    for e in expenses:
+        totals[key(e)] += e.amount
+    return totals
+
+
+def _extreme(expenses, key, kind):
+    # сума за напрямом звіту, серед рівних — пізніша дата, потім більший id
+    sign = 1 if kind == "max" else -1
+    best = {}
+    for e in expenses:
+        rank = (sign * e.amount, e.date, e.id)
+        if key(e) not in best or rank > best[key(e)][0]:
+            best[key(e)] = (rank, e)
+    return [best[k][1] for k in sorted(best)]
+
+
+def naive_extreme_per_category(data, kind):
+    return [(e.category, e.currency, e.id, e.date, e.title, e.amount, e.description or "")
+            for e in _extreme(data["expenses"], lambda e: (e.category_id, e.currency), kind)]
+
+
+def naive_extreme_in_period(data, kind):
+    expenses = _in_period(data["expenses"], PERIOD[0], PERIOD[1])
+    return [(e.currency, e.id, e.date, e.category, e.title, e.amount, e.description or "")
+            for e in _extreme(expenses, lambda e: e.currency, kind)]
+
+
+def naive_by_period(data):
+    return [_row(e) for e in sorted(_in_period(data["expenses"], *PERIOD), key=lambda e: (e.date, e.id))]
+
+
+def naive_by_title(data):
+    found = sorted((e for e in data["expenses"] if ARGS["text"] in e.title.lower()), key=lambda e: (e.date, e.id))
+    return [_row(e) for e in found][ARGS["offset"]:ARGS["offset"] + ARGS["limit"]]
+
+
+def naive_by_category(data):
+    found = sorted((e for e in data["expenses"] if e.category_id == data["category_id"]),
+                   key=lambda e: (e.date, e.id))
+    return [(e.id, e.date, e.title, e.amount, e.currency, e.description or "") for e in found]
+
+
+def naive_sum_by_category(data):
+    totals = _totals(_in_period(data["expenses"], *PERIOD), lambda e: (e.category, e.currency))
+    return [(cat, cur, total) for (cat, cur), total in sorted(totals.items())]
+
+
+def naive_top_category(data):
+    totals = _totals(_in_period(data["expenses"], *PERIOD), lambda e: (e.currency, e.category))
+    top = {}
+    for (cur, cat), total in totals.items():
+        if cur not in top or total > top[cur][1]:
+            top[cur] = (cat, total)
+    return [(cur, cat, total) for cur, (cat, total) in sorted(top.items())]
+
+
+def _days():
+    return (date.fromisoformat(PERIOD[1]) - date.fromisoformat(PERIOD[0])).days + 1
+
+
+def naive_avg_per_day(data):
+    totals = _totals(_in_period(data["expenses"], *PERIOD), lambda e: e.currency)
+    return [(cur, total, _days(), (total / _days()).quantize(CENT)) for cur, total in sorted(totals.items())]
+
+
+def naive_dashboard(data):
+    expenses = _in_period(data["expenses"], *PERIOD)
+    result = []
+    for cur in sorted({e.currency for e in expenses}):
+        groups = defaultdict(list)
+        for e in expenses:
+            if e.currency == cur:
+                groups[e.category].append(e.amount)
+        levels = [("category", cat, amounts) for cat, amounts in groups.items()]
+        levels.sort(key=lambda level: sum(level[2]), reverse=True)
+        levels.insert(0, ("currency", levels[0][1], [a for amounts in groups.values() for a in amounts]))
+        for level, cat, amounts in levels:
+            total = sum(amounts)
+            result.append((level, cur, cat, total, len(amounts), min(amounts), max(amounts),
+                           (total / _days()).quantize(CENT)))
+    return result
+
+
+def _daily_in_base(data):
+    """{(день, категорія, валюта): (сума, кількість, сума в ARGS["base"] або None)} — як у rollup."""
+    keys = defaultdict(list)
+    for e in _in_period(data["expenses"], *PERIOD):
+        keys[(e.date, e.category, e.currency)].append(e.amount)
+    result = {}
+    for (day, cat, cur), amounts in keys.items():
+        rate, base = _rate(data["rates"], cur, day), _rate(data["rates"], ARGS["base"], day)
+        converted = sum(amounts) * rate / base if rate is not None and base is not None else None
+        result[(day, cat, cur)] = (sum(amounts), len(amounts), converted)
+    return result
+
+
+def naive_sum_in_base(data):
+    totals, counts = defaultdict(Decimal), defaultdict(int)
+    for (_, cat, _), (_, count, converted) in _daily_in_base(data).items():
+        if converted is not None:
+            totals[cat] += converted
+            counts[cat] += count
+    rows = [("category", cat, total, counts[cat]) for cat, total in totals.items()]
+    rows.append(("total", "", sum(totals.values()), sum(counts.values())))
+    rows.sort(key=lambda r: (-r[2], r[1]))
+    return [(level, cat, total.quantize(CENT), count) for level, cat, total, count in rows]
+
+
+def naive_unconverted(data):
+    totals, counts = defaultdict(Decimal), defaultdict(int)
+    for (_, _, cur), (total, count, converted) in _daily_in_base(data).items():
+        if converted is None:
+            totals[cur] += total
+            counts[cur] += count
+    return [(cur, totals[cur], counts[cur]) for cur in sorted(totals)]
+
+
+def _daily_series(data, start: date):
+    """({(категорія, валюта): {день: сума}} з витрат від start, дні періоду)."""
+    first, last = date.fromisoformat(PERIOD[0]), date.fromisoformat(PERIOD[1])
+    series = defaultdict(lambda: defaultdict(Decimal))
+    for e in data["expenses"]:
+        if start <= e.date <= last:
+            series[(e.category, e.currency)][e.date] += e.amount
+    days = [first + timedelta(days=i) for i in range(_days())]
+    return {key: series[key] for key in sorted(series)}, days
+
+
+def naive_rolling_spend(data):
+    first = date.fromisoformat(PERIOD[0])
+    series, days = _daily_series(data, first - timedelta(days=max(ROLLING_DAYS) - 1))
+    result = []
+    for (cat, cur), by_day in series.items():
+        for d in days:
+            window = []
+            for n in ROLLING_DAYS:
+                total = sum((by_day.get(d - timedelta(days=i), Decimal(0)) for i in range(n)), Decimal(0))
+                window += [total, (total / n).quantize(CENT)]
+            result.append((d, cat, cur, by_day.get(d, Decimal(0)), *window))
+    return result
+
+
+def naive_running_totals(data):
+    first = date.fromisoformat(PERIOD[0])
+    series, days = _daily_series(data, first.replace(day=1))
+    result = []
+    for (cat, cur), by_day in series.items():
+        for d in days:
+            month = sum((t for day, t in by_day.items() if d.replace(day=1) <= day <= d), Decimal(0))
+            period = sum((t for day, t in by_day.items() if first <= day <= d), Decimal(0))
+            result.append((d, cat, cur, by_day.get(d, Decimal(0)), month, period,
+                           (period / ((d - first).days + 1)).quantize(CENT)))
+    return result
+
+
+NAIVE = {
+    "expenses-by-period": naive_by_period,
+    "filter-by-title": naive_by_title,
+    "expenses-by-category": naive_by_category,
+    "max-per-category": lambda data: naive_extreme_per_category(data, "max"),
+    "min-per-category": lambda data: naive_extreme_per_category(data, "min"),
+    "max-in-period": lambda data: naive_extreme_in_period(data, "max"),
+    "min-in-period": lambda data: naive_extreme_in_period(data, "min"),
+    "sum-by-category": naive_sum_by_category,
+    "top-category": naive_top_category,
+    "avg-per-day": naive_avg_per_day,
+    "dashboard": naive_dashboard,
+    "sum-in-base": naive_sum_in_base,
+    "unconverted": naive_unconverted,
+    "rolling-spend": naive_rolling_spend,
+    "running-totals": naive_running_totals,
+}
+
+
+def test_every_report_has_naive_check():
+    missing = sorted(set(REPORTS) - set(NAIVE))
+    assert not missing, f"Немає наївного обчислення в NAIVE: {', '.join(missing)}"
+
+
+@pytest.mark.parametrize("name", sorted(REPORTS))
+def test_report_matches_naive(dataset, name):
+    if name not in NAIVE:
+        pytest.fail(f"Немає наївного обчислення для '{name}'")
+    fn, params, columns = REPORTS[name]
+    values = {**ARGS, "category_id": dataset["category_id"]}
+    rows = fn(*(values[p] for p in params))
+    expected = NAIVE[name](dataset)
+    assert expected, f"{name}: набір даних не дає жодного рядка — перевірка нічого не варта"
+    assert all(len(row) == len(columns) for row in rows)
+    assert [tuple(row) for row in rows] == expected
+
+
+WINDOW_REPORTS = {"rolling-spend", "running-totals"}
+
+
+@pytest.mark.parametrize("name", sorted(REPORTS))
+def test_analytics_matches_sql(dataset, name, monkeypatch):
+    """Режим аналітики (знімок у пам'яті) дає ті самі рядки, що й SQL, для кожного звіту з REPORTS."""
+    pytest.importorskip("numpy")
+    import analytics
+    import reports
+
+    fn, params, _ = REPORTS[name]
+    values = {**ARGS, "category_id": dataset["category_id"]}
+    expected = fn(*(values[p] for p in params))
+    monkeypatch.setattr(analytics, "_snapshot", analytics.Snapshot())
+    monkeypatch.setitem(reports._analytics, "enabled", True)
+    rows = fn(*(values[p] for p in params))
+    # звіти з вікнами знімок не рахує — вони і в режимі аналітики йдуть у БД
+    assert analytics._snapshot.stats["full_loads"] == (0 if name in WINDOW_REPORTS else 1)
+    assert [tuple(row) for row in rows] == [tuple(row) for row in expected]
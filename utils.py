@@ -1,6 +1,30 @@
+import math
 from datetime import datetime
 
 ALLOWED_CURRENCIES = {"UAH", "USD", "EUR"}
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+MAX_AMOUNT = 10 ** 10  # amount NUMERIC(12, 2): суми менші за 10 млрд
+
+
+def parse_amount(s: str) -> float | None:
+    """'125,50 грн' -> 125.5; None, якщо це не додатне число, менше за MAX_AMOUNT ('inf', '1e999' — теж None)."""
+    s = s.strip().lower().replace("грн", "").replace(" ", "").replace(",", ".")
+    try:
+        value = float(s)
+    except ValueError:
+        return None
+    return value if math.isfinite(value) and 0 < value < MAX_AMOUNT else None
+
+
+def parse_date(s: str) -> str | None:
+    """YYYY-MM-DD або DD.MM.YYYY -> YYYY-MM-DD; None, якщо формат невірний."""
+    s = s.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return None
 
 
 def read_int(prompt: str) -> int:
@@ -13,32 +37,21 @@ def read_int(prompt: str) -> int:
 
 def read_amount(prompt: str) -> float:
     while True:
-        s = input(prompt).strip().lower()
-        s = s.replace("грн", "").replace(" ", "").replace(",", ".")
-        try:
-            value = float(s)
-            if value <= 0:
-                print(" Сума має бути більшою за 0.")
-                continue
+        value = parse_amount(input(prompt))
+        if value is not None:
             return value
-        except ValueError:
-            print(" Введіть число (наприклад 125.50 або 3400 грн).")
+        print(" Введіть суму більшу за 0 (наприклад 125.50 або 3400 грн).")
 
 
 def read_optional_amount(prompt: str) -> float | None:
-    s = input(prompt).strip().lower()
-    if s == "":
-        return None
-    s = s.replace("грн", "").replace(" ", "").replace(",", ".")
-    try:
-        value = float(s)
-        if value <= 0:
-            print(" Сума має бути більшою за 0.")
-            return read_optional_amount(prompt)
-        return value
-    except ValueError:
-        print(" Введіть число або Enter щоб не змінювати.")
-        return read_optional_amount(prompt)
+    while True:
+        s = input(prompt)
+        if s.strip() == "":
+            return None
+        value = parse_amount(s)
+        if value is not None:
+            return value
+        print(" Введіть суму більшу за 0 або Enter щоб не змінювати.")
 
 
 def read_date(prompt: str = "Дата (YYYY-MM-DD або DD.MM.YYYY): ") -> str:
@@ -47,13 +60,9 @@ def read_date(prompt: str = "Дата (YYYY-MM-DD або DD.MM.YYYY): ") -> str:
     Вихід: YYYY-MM-DD (уніфіковано для PostgreSQL)
     """
     while True:
-        s = input(prompt).strip()
-        for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
-            try:
-                dt = datetime.strptime(s, fmt)
-                return dt.strftime("%Y-%m-%d")
-            except ValueError:
-                pass
+        value = parse_date(input(prompt))
+        if value is not None:
+            return value
         print(" Невірний формат. Введіть YYYY-MM-DD (2026-02-25) або DD.MM.YYYY (25.02.2026).")
 
 
@@ -61,12 +70,9 @@ def read_optional_date(prompt: str = "Нова дата (Enter = не зміню
     s = input(prompt).strip()
     if s == "":
         return None
-    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
-        try:
-            dt = datetime.strptime(s, fmt)
-            return dt.strftime("%Y-%m-%d")
-        except ValueError:
-            pass
+    value = parse_date(s)
+    if value is not None:
+        return value
     print(" Невірний формат. Введіть YYYY-MM-DD або DD.MM.YYYY. Або Enter щоб не змінювати.")
     return read_optional_date(prompt)
 